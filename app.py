@@ -1,25 +1,57 @@
-from flask import Flask, render_template, jsonify, request
+import startup  # 시작 시간 측정 기준점이 되도록 가장 먼저 불러옵니다.
+import math
+from flask import Flask, Response, render_template, jsonify, request, url_for
 
+import cache
+import jobs
+import metrics
 import scraper
-import logic
+
+# numpy를 쓰는 모듈은 해당 라우트가 처음 불릴 때(또는 예열 스레드에서) 불러옵니다.
+logic = startup.lazy_module("logic")
+deck_similarity = startup.lazy_module("deck_similarity")
+weight_sweep = startup.lazy_module("weight_sweep")
 
 app = Flask(__name__)
 
+MAX_AGGREGATE_POSTS = 500
+MAX_BATCH_DECKS = 10000
+MAX_SIMILAR_DECKS = 100
+MAX_CLUSTERS = 20
+MAX_SWEEP_POINTS = 2000
+MAX_JOB_WAIT = 25
+# 브라우저/CDN이 다시 묻지 않고 재사용할 시간(초). 이후에는 ETag로 재검증하므로 대부분 304로 끝납니다.
+ANALYSIS_MAX_AGE = 300
+DECK_NAMES_MAX_AGE = 300
+POST_LIST_MAX_AGE = 60
+
+@app.before_request
+def start_request_timer():
+    metrics.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    # 스트리밍 응답은 본문을 보내기 전에 여기를 지나므로, SSE는 연결을 연 시점까지만 잽니다.
+    metrics.end_request(request.endpoint, request.method, response.status_code, request.path)
+    return response
+
 @app.route("/")
 def index():
     """메인 페이지. 포스트를 가져오고 초기 뷰를 렌더링합니다."""
     try:
-        posts = scraper.get_post_list()
-        if not posts:
-            return "포스트 목록을 가져오지 못했습니다.", 500
+        # 캐시에 없어 Selenium으로 폴백하는 단계들은 한 요청 동안 세션 하나를 함께 씁니다.
+        with scraper.shared_session():
+            posts = cache.get_post_list()
+            if not posts:
+                return "포스트 목록을 가져오지 못했습니다.", 500
 
-        default_post_url = posts[0]['url']
-        deck_names = scraper.get_deck_names(default_post_url)
-        if not deck_names:
-            return "덱 이름을 가져오지 못했습니다.", 500
-        
-        default_deck_name = deck_names[0]
-        initial_data = logic.analyze_live_data(default_post_url, default_deck_name)
+            default_post_url = posts[0]['url']
+            deck_names = cache.get_deck_names(default_post_url)
+            if not deck_names:
+                return "덱 이름을 가져오지 못했습니다.", 500
+
+            default_deck_name = deck_names[0]
+            initial_data = cache.analyze_live_data(default_post_url, default_deck_name)
         
         if not initial_data:
             return "초기 데이터를 로드하지 못했습니다.", 500
@@ -30,6 +62,40 @@ def index():
         # 프로덕션 환경에서는 더 사용자 친화적인 오류 페이지를 제공하는 것이 좋습니다.
         return "내부 서버 오류가 발생했습니다.", 500
 
+def encoded_response(encoded, max_age):
+    """미리 직렬화·압축해 둔 JSON을 ETag/Cache-Control과 함께 보냅니다. ETag가 같으면 본문 없이 304를 보냅니다."""
+    headers = {
+        "ETag": f'W/"{encoded.etag}"',  # 압축 방식만 다른 본문끼리 같은 ETag를 쓰므로 약한 ETag입니다.
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if request.if_none_match.contains_weak(encoded.etag):
+        return Response(status=304, headers=headers)
+    encoding, body = encoded.negotiate(request.accept_encodings)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype="application/json", headers=headers)
+
+def wants_async():
+    """?async=1 또는 'Prefer: respond-async' 헤더로 비동기 처리를 요청했는지 확인합니다."""
+    return request.args.get('async') in ('1', 'true') or 'respond-async' in request.headers.get('Prefer', '')
+
+def job_accepted(job):
+    """작업 ID와 상태 조회 주소를 담은 202 응답을 만듭니다."""
+    status_url = url_for('get_job', job_id=job.id)
+    response = jsonify({**job.to_dict(include_result=False), "status_url": status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+def job_response(job):
+    """끝난 작업은 200과 결과(또는 오류)를, 진행 중인 작업은 202와 상태를 반환합니다."""
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    if job.status == jobs.DONE and not job.result:
+        return jsonify({**job.to_dict(), "status": jobs.FAILED, "error": "데이터 로딩에 실패했거나 데이터가 없습니다."})
+    return jsonify(job.to_dict())
+
 @app.route("/get_deck_analysis")
 def get_deck_analysis():
     """특정 덱에 대한 분석 데이터를 가져오는 API 엔드포인트입니다."""
@@ -38,15 +104,176 @@ def get_deck_analysis():
     if not post_url or not deck_name:
         return jsonify({"error": "URL과 덱 이름이 필요합니다."}), 400
 
+    if wants_async():
+        # 이미 계산된 결과는 바로 돌려주고, 스크래핑이 필요할 때만 작업으로 넘깁니다.
+        encoded = cache.peek_encoded_analysis(post_url, deck_name)
+        if encoded:
+            return encoded_response(encoded, ANALYSIS_MAX_AGE)
+        job = jobs.manager.submit(
+            ("analysis", post_url, deck_name), lambda: cache.analyze_live_data(post_url, deck_name)
+        )
+        return job_accepted(job)
+
     try:
-        analysis_results = logic.analyze_live_data(post_url, deck_name)
-        if not analysis_results:
+        encoded = cache.encoded_analysis(post_url, deck_name)
+        if not encoded:
             return jsonify({"error": "데이터 로딩에 실패했거나 데이터가 없습니다."}), 500
-        return jsonify(analysis_results)
+        # 재추출을 다 채우지 못한 결과는 서버에 캐시되지 않으므로, 브라우저도 바로 다시 묻게 합니다.
+        max_age = 0 if logic.is_partial(encoded.source) else ANALYSIS_MAX_AGE
+        return encoded_response(encoded, max_age)
     except Exception as e:
         print(f"get_deck_analysis 라우트에서 오류 발생: {e}")
         return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
 
+@app.route("/get_aggregate_analysis")
+def get_aggregate_analysis():
+    """최신 N개 포스트(또는 최근 며칠)의 같은 덱 타입 표본을 합친 분석 데이터를 반환합니다."""
+    deck_name = request.args.get('deck_name')
+    if not deck_name:
+        return jsonify({"error": "덱 이름이 필요합니다."}), 400
+    try:
+        post_limit = int(request.args.get('posts', logic.AGGREGATE_POST_LIMIT))
+        since_days = request.args.get('since_days')
+        since_days = int(since_days) if since_days else None
+    except ValueError:
+        return jsonify({"error": "posts와 since_days는 정수여야 합니다."}), 400
+    if post_limit < 1 or post_limit > MAX_AGGREGATE_POSTS:
+        return jsonify({"error": f"posts는 1에서 {MAX_AGGREGATE_POSTS} 사이여야 합니다."}), 400
+    source = "snapshot" if request.args.get('source') == "snapshot" else "live"
+
+    try:
+        aggregate = cache.analyze_aggregate(deck_name, post_limit, since_days, source)
+        if not aggregate["results"]:
+            return jsonify({"error": "합칠 수 있는 데이터가 없습니다."}), 500
+        return jsonify(aggregate)
+    except Exception as e:
+        print(f"get_aggregate_analysis 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+@app.route("/similar_decks", methods=['POST'])
+def similar_decks():
+    """스냅샷 기록에 있는 같은 덱 타입의 리스트 중 주어진 덱과 가장 가까운 n개를 반환합니다."""
+    data = request.get_json()
+    if not data or not data.get('deck_name') or not isinstance(data.get('deck'), (list, dict)):
+        return jsonify({"error": "덱 이름과 덱 데이터가 필요합니다."}), 400
+    try:
+        n = int(data.get('n', 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "n은 정수여야 합니다."}), 400
+
+    try:
+        index = cache.deck_list_index(data['deck_name'])
+        if not index:
+            return jsonify({"error": "저장된 덱 리스트가 없습니다."}), 404
+        return jsonify(index.nearest(data['deck'], max(1, min(n, MAX_SIMILAR_DECKS))))
+    except Exception as e:
+        print(f"similar_decks 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+@app.route("/deck_clusters")
+def deck_clusters():
+    """덱 타입의 표본 리스트를 세부 유형 k개로 나누고, 유형별 대표 덱 분석 결과를 반환합니다."""
+    deck_name = request.args.get('deck_name')
+    if not deck_name:
+        return jsonify({"error": "덱 이름이 필요합니다."}), 400
+    try:
+        k = int(request.args.get('k', deck_similarity.DEFAULT_CLUSTERS))
+    except ValueError:
+        return jsonify({"error": "k는 정수여야 합니다."}), 400
+    if k < 1 or k > MAX_CLUSTERS:
+        return jsonify({"error": f"k는 1에서 {MAX_CLUSTERS} 사이여야 합니다."}), 400
+
+    try:
+        clusters = cache.deck_clusters(deck_name, k)
+        if not clusters:
+            return jsonify({"error": "저장된 덱 리스트가 없습니다."}), 404
+        return jsonify(clusters)
+    except Exception as e:
+        print(f"deck_clusters 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+def parse_float_list(name, default):
+    """쉼표로 구분된 실수 목록 쿼리 파라미터. 없으면 [default]. 형식이 틀리거나 nan/inf가 있으면 ValueError."""
+    value = request.args.get(name)
+    if not value:
+        return [default]
+    values = [float(item) for item in value.split(',') if item.strip()]
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError(f"{name}에 유한하지 않은 값이 있습니다.")
+    return values
+
+@app.route("/weight_sweep")
+def get_weight_sweep():
+    """가중치 설정(반감기, 레이팅 기준점, 레이팅 기울기) 격자에서 추천 리스트가 어떻게 바뀌는지 반환합니다.
+
+    각 파라미터는 쉼표로 구분한 값 목록이며, 모두 값 하나이면 그 설정으로 다시 분석한 결과(results)도 함께 반환합니다.
+    """
+    post_url = request.args.get('url')
+    deck_name = request.args.get('deck_name')
+    if not post_url or not deck_name:
+        return jsonify({"error": "URL과 덱 이름이 필요합니다."}), 400
+    try:
+        half_lives = parse_float_list('half_life_days', logic.HALF_LIFE_DAYS)
+        pivots = parse_float_list('rating_pivot', logic.RATING_PIVOT)
+        slopes = parse_float_list('rating_slope', logic.RATING_SLOPE)
+    except ValueError:
+        return jsonify({"error": "half_life_days, rating_pivot, rating_slope는 쉼표로 구분한 유한한 숫자여야 합니다."}), 400
+    if not half_lives or not pivots or not slopes or min(half_lives) <= 0:
+        return jsonify({"error": "half_life_days는 0보다 커야 하고, 각 파라미터에는 값이 하나 이상 필요합니다."}), 400
+    if len(half_lives) * len(pivots) * len(slopes) > MAX_SWEEP_POINTS:
+        return jsonify({"error": f"격자점은 최대 {MAX_SWEEP_POINTS}개까지 계산할 수 있습니다."}), 400
+
+    try:
+        sweep_input = cache.sweep_input(post_url, deck_name)
+        if not sweep_input:
+            return jsonify({"error": "데이터 로딩에 실패했거나 데이터가 없습니다."}), 500
+        result = weight_sweep.sweep(sweep_input, half_lives, pivots, slopes)
+        if len(half_lives) == len(pivots) == len(slopes) == 1:
+            result["results"] = weight_sweep.what_if(sweep_input, half_lives[0], pivots[0], slopes[0])
+        return jsonify(result)
+    except Exception as e:
+        print(f"get_weight_sweep 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+def start_analysis_stream(post_url, deck_name):
+    """스트리밍 분석을 시작합니다. (이미 계산된 결과, None) 또는 (None, 작업)을 반환합니다."""
+    analysis_results = cache.peek_analysis(post_url, deck_name)
+    if analysis_results:
+        return analysis_results, None
+    job = jobs.manager.submit(
+        ("analysis", post_url, deck_name), lambda: cache.analyze_live_data(post_url, deck_name), keep_alive=False
+    )
+    return None, job
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.route("/get_deck_analysis/stream")
+def stream_deck_analysis():
+    """분석 진행 단계(page_loaded, deck_selected, table_parsed, card_stats)를 Server-Sent Events로 보내고,
+    마지막에 40장으로 조정된 결과(result)를 보냅니다. 연결이 끊기면 스크래핑을 취소합니다."""
+    post_url = request.args.get('url')
+    deck_name = request.args.get('deck_name')
+    if not post_url or not deck_name:
+        return jsonify({"error": "URL과 덱 이름이 필요합니다."}), 400
+
+    analysis_results, job = start_analysis_stream(post_url, deck_name)
+    if job is None:
+        body = jobs.format_sse("result", {"result": analysis_results})
+        return Response(body, mimetype="text/event-stream", headers=SSE_HEADERS)
+    return Response(jobs.stream_events(job), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+@app.route("/get_post_list")
+def get_post_list():
+    """포스트 목록([{"title", "url"}, ...])을 반환합니다."""
+    try:
+        encoded = cache.encoded_post_list()
+        if not encoded:
+            return jsonify({"error": "포스트 목록을 가져오지 못했습니다."}), 500
+        return encoded_response(encoded, POST_LIST_MAX_AGE)
+    except Exception as e:
+        print(f"get_post_list 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
 @app.route("/get_deck_names_for_post")
 def get_deck_names_for_post():
     """특정 포스트에 대한 덱 이름 목록을 가져오는 API 엔드포인트입니다."""
@@ -55,10 +282,10 @@ def get_deck_names_for_post():
         return jsonify({"error": "URL이 필요합니다."}), 400
     
     try:
-        deck_names = scraper.get_deck_names(post_url)
-        if not deck_names:
+        encoded = cache.encoded_deck_names(post_url)
+        if not encoded:
             return jsonify({"error": "덱 이름을 가져오지 못했습니다."}), 500
-        return jsonify(deck_names)
+        return encoded_response(encoded, DECK_NAMES_MAX_AGE)
     except Exception as e:
         print(f"get_deck_names_for_post 라우트에서 오류 발생: {e}")
         return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
@@ -75,19 +302,113 @@ def generate_deck_code():
     
     try:
         hashes = logic.generate_deck_hashes(card_names_list)
-        deck_code = f"https://shadowverse-wb.com/web/Deck/share?hash=2.{class_id}." + ".".join(hashes) + "&lang=ko"
-        return jsonify({"deck_code": deck_code})
+        return jsonify({"deck_code": logic.deck_share_url(hashes, class_id)})
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
         print(f"generate_deck_code 라우트에서 오류 발생: {e}")
         return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
 
+@app.route("/decode_deck_code", methods=['POST'])
+def decode_deck_code():
+    """덱 공유 URL을 카드 ID, 매수, 이름 목록으로 풉니다."""
+    data = request.get_json()
+    if not data or not isinstance(data.get('deck_code'), str):
+        return jsonify({"error": "덱 코드가 필요합니다."}), 400
+
+    try:
+        return jsonify(logic.decode_deck_code(data['deck_code']))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"decode_deck_code 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+@app.route("/deck_codes", methods=['POST'])
+def deck_codes():
+    """덱 여러 개를 한 번에 인코딩({"encode": [...]})하거나 디코딩({"decode": [...]})합니다.
+
+    결과는 요청 순서대로이며, 실패한 덱은 해당 자리에 {"error": ...}가 들어갑니다.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not any(data.get(key) is not None for key in ('encode', 'decode')):
+        return jsonify({"error": "encode 또는 decode 목록이 필요합니다."}), 400
+    if any(data.get(key) is not None and not isinstance(data[key], list) for key in ('encode', 'decode')):
+        return jsonify({"error": "encode와 decode는 목록이어야 합니다."}), 400
+    if sum(len(data.get(key) or []) for key in ('encode', 'decode')) > MAX_BATCH_DECKS:
+        return jsonify({"error": f"한 번에 최대 {MAX_BATCH_DECKS}개 덱까지 처리할 수 있습니다."}), 400
+
+    try:
+        response = {}
+        if isinstance(data.get('encode'), list):
+            response['encode'] = logic.encode_decks(data['encode'])
+        if isinstance(data.get('decode'), list):
+            response['decode'] = logic.decode_decks(data['decode'])
+        return jsonify(response)
+    except Exception as e:
+        print(f"deck_codes 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+@app.route("/adjust_deck", methods=['POST'])
+def adjust_deck():
+    """현재 매수와 +/- 편집 묶음을 받아, 40장이 유지되도록 재조정한 매수와 갱신된 점수를 반환합니다."""
+    data = request.get_json()
+    required_keys = ('average', 'std_dev', 'counts', 'edits')
+    if not data or any(key not in data for key in required_keys):
+        return jsonify({"error": "average, std_dev, counts, edits가 필요합니다."}), 400
+
+    try:
+        result = logic.rebalance_deck(data['average'], data['std_dev'], data['counts'], data['edits'])
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"adjust_deck 라우트에서 오류 발생: {e}")
+        return jsonify({"error": "내부 서버 오류가 발생했습니다."}), 500
+
+@app.route("/jobs/<job_id>", methods=['GET'])
+def get_job(job_id):
+    """작업 상태를 반환합니다. ?wait=N을 주면 최대 N초(상한 MAX_JOB_WAIT)까지 완료를 기다립니다."""
+    job = jobs.manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_JOB_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait는 숫자여야 합니다."}), 400
+    if wait > 0:
+        job.done.wait(wait)
+    return job_response(job)
+
+@app.route("/jobs/<job_id>", methods=['DELETE'])
+def cancel_job(job_id):
+    """진행 중인 작업을 취소합니다."""
+    job = jobs.manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(job.to_dict(include_result=False)), 202 if not job.finished else 200
+
+@app.route("/cache_stats")
+def cache_stats():
+    """캐시별 적중/실패 카운터를 반환합니다."""
+    return jsonify(cache.stats())
+
+@app.route("/metrics")
+def get_metrics():
+    """단계별 처리 시간, 요청 수, 드라이버/스크래핑 카운터, 캐시와 작업 상태를 Prometheus 텍스트 형식으로 반환합니다."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/healthz")
+def healthz():
+    """무거운 모듈을 불러오지 않고 응답하는 상태 확인 엔드포인트. 시작 단계별 시간과 예열 상태를 함께 보여 줍니다."""
+    return jsonify({"status": "ok", "startup": startup.stats()})
+
+
+startup.mark("app_imported")
+# gunicorn/uvicorn 워커는 포트를 연 뒤에 앱을 불러오므로, 예열(분석 모듈, 카드 인덱스, 드라이버)은
+# 요청 처리와 나란히 백그라운드에서 진행됩니다. 예열이 끝나기 전의 요청은 필요한 것을 직접 불러옵니다.
+startup.start_warm_up()
 
 if __name__ == '__main__':
-    # 필수 구성 요소 초기화
-    logic.load_card_database()
-    scraper.init_driver() # 종료 훅도 함께 등록됩니다
-    
     # Flask 앱 실행
     app.run(debug=True)
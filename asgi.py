@@ -0,0 +1,146 @@
+# asgi.py - ASGI 진입점
+#
+#   uvicorn asgi:app --port 8080
+#
+# 작업 완료를 기다리는 요청(GET /jobs/<id>?wait=N)과 분석 진행 스트림(GET /get_deck_analysis/stream)은
+# 이벤트 루프에서 직접 처리하므로, 대기 중인 클라이언트가 수백 명이어도 스레드를 점유하지 않습니다.
+# 그 밖의 요청은 asgiref의 WsgiToAsgi로 기존 Flask 앱에 그대로 넘깁니다.
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import app as flask_app
+import jobs
+import scraper
+
+# --- 설정 (환경 변수로 조정 가능) ---
+# Flask 라우트를 실행하는 스레드 수. 스크래핑 요청이 드라이버 풀을 모두 쓰고도 남는 스레드가
+# /healthz, /metrics, /adjust_deck 같은 가벼운 요청을 처리하도록 풀 크기보다 넉넉하게 둡니다.
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", str(max(8, scraper.POOL_SIZE * 4))))
+_wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+class _ThreadPoolWsgiInstance(WsgiToAsgiInstance):
+    """WsgiToAsgiInstance와 같지만 WSGI 앱을 공유 스레드 하나가 아닌 _wsgi_executor에서 실행합니다.
+
+    asgiref의 기본값(thread_sensitive=True)은 모든 요청을 한 스레드에서 차례로 실행하므로,
+    느린 스크래핑 요청 하나가 다른 모든 요청을 막습니다.
+    """
+
+    async def run_wsgi_app(self, body):
+        run = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func  # @sync_to_async로 감싸기 전의 함수
+        await sync_to_async(run, thread_sensitive=False, executor=_wsgi_executor)(self, body)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _ThreadPoolWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_app = ThreadPoolWsgiToAsgi(flask_app.app)
+JOBS_PREFIX = "/jobs/"
+STREAM_PATH = "/get_deck_analysis/stream"
+
+
+async def wait_for_job(job, timeout):
+    """job이 끝나거나 timeout초가 지날 때까지 기다립니다. 기다림을 멈춰도 작업 자체는 취소하지 않습니다."""
+    if job.finished or timeout <= 0:
+        return
+    try:
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+def _job_wait(scope):
+    """작업 대기 요청이면 (작업, 대기 시간, wait를 뺀 쿼리 문자열)을, 아니면 None을 반환합니다."""
+    if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(JOBS_PREFIX):
+        return None
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    try:
+        wait = min(float(query.pop("wait", ["0"])[0]), flask_app.MAX_JOB_WAIT)
+    except ValueError:
+        return None  # 잘못된 값은 Flask 라우트가 400으로 응답합니다.
+    job = jobs.manager.get(scope["path"][len(JOBS_PREFIX):])
+    if job is None or wait <= 0:
+        return None
+    return job, wait, urlencode(query, doseq=True).encode("latin-1")
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_chunk(send, text):
+    await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+
+
+async def stream_job(job, receive, send):
+    """job의 진행 이벤트를 SSE로 보냅니다. 클라이언트가 끊으면 구독을 해제해, 남은 구독자가 없을 때 작업이 취소되게 합니다."""
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    listener = lambda: loop.call_soon_threadsafe(wakeup.set)
+    jobs.manager.subscribe(job)
+    job.add_listener(listener)
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await _send_chunk(send, jobs.format_sse("job", job.to_dict(include_result=False)))
+        sent = 0
+        while True:
+            wakeup.clear()
+            events = job.events[sent:]
+            if not events:
+                woken = asyncio.ensure_future(wakeup.wait())
+                done, _ = await asyncio.wait({disconnected, woken}, timeout=jobs.SSE_HEARTBEAT,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                woken.cancel()
+                if disconnected.done():
+                    return
+                if not done:
+                    await _send_chunk(send, ": keep-alive\n\n")
+                continue
+            for stage, data in events:
+                await _send_chunk(send, jobs.format_sse(stage, data, sent))
+                sent += 1
+                if stage in ("result", "error"):
+                    return
+    finally:
+        job.remove_listener(listener)
+        disconnected.cancel()
+        jobs.manager.unsubscribe(job)
+
+
+async def stream_analysis(scope, receive, send):
+    query = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+    post_url, deck_name = query.get("url", [None])[0], query.get("deck_name", [None])[0]
+    if not post_url or not deck_name:
+        return await wsgi_app(scope, receive, send)  # 400 응답은 Flask 라우트가 만듭니다.
+
+    # 캐시/미리 계산된 결과 확인은 파일을 읽을 수 있으므로 기본 실행기에서 처리합니다.
+    loop = asyncio.get_running_loop()
+    analysis_results, job = await loop.run_in_executor(None, flask_app.start_analysis_stream, post_url, deck_name)
+    headers = [(b"content-type", b"text/event-stream; charset=utf-8")]
+    headers += [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in flask_app.SSE_HEADERS.items()]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    if job is None:
+        await _send_chunk(send, jobs.format_sse("result", {"result": analysis_results}))
+    else:
+        await stream_job(job, receive, send)
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == STREAM_PATH:
+        return await stream_analysis(scope, receive, send)
+    job_wait = _job_wait(scope)
+    if job_wait is not None:
+        job, wait, query_string = job_wait
+        await wait_for_job(job, wait)
+        # 응답 형식은 Flask 라우트와 같게 유지하되, 이미 기다렸으므로 wait 없이 넘깁니다.
+        scope = dict(scope, query_string=query_string)
+    await wsgi_app(scope, receive, send)
@@ -0,0 +1,276 @@
+# benchmarks/bench.py - 파서, 분석, 덱 코드 경로의 오프라인 벤치마크
+#
+#   python benchmarks/bench.py                     # 실행하고 결과만 출력
+#   python benchmarks/bench.py --save-baseline     # 결과를 baseline.json에 저장
+#   python benchmarks/bench.py --compare           # baseline.json과 비교해 느려졌으면 종료 코드 1
+#   python benchmarks/bench.py --only rating       # 이름에 rating이 들어간 픽스처만
+#   python benchmarks/bench.py record <포스트 URL>  # svlabo 포스트의 덱 테이블을 픽스처로 저장
+#   python benchmarks/bench.py fixtures            # 기본 합성 픽스처(레이트/연승/채용 매수 헤더)를 다시 생성
+#
+# 네트워크 없이 fixtures/*.html(헤더 배치별 svlabo 테이블)과 실행 중에 만드는 대형 합성 테이블로
+# 단계별 처리량(ops/s), p50/p99 지연 시간, 최대 메모리(tracemalloc)를 잽니다.
+# 기준값은 측정한 머신에 따라 다르므로, 비교는 같은 머신에서 저장한 baseline.json과 해야 의미가 있습니다.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bootstrap  # noqa: E402
+import logic  # noqa: E402
+import table_parser  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# 날짜 가중치가 실행 날짜에 따라 달라지지 않도록 기준일을 고정합니다.
+TODAY = datetime(2025, 11, 10)
+# 재추출은 bootstrap 단계에서 따로 잽니다. analyze_table 단계의 기준값이 재추출 전과 비교되도록 끄고,
+# bootstrap 단계는 횟수가 머신 속도에 따라 달라지지 않도록 시간 예산 없이 고정된 횟수만큼 돌립니다.
+BOOTSTRAP_REPLICATES = 500
+bootstrap.REPLICATES = 0
+MIN_TIME = 0.5       # 단계마다 최소 측정 시간(초)
+MIN_ROUNDS = 20
+MAX_ROUNDS = 5000
+WARMUP_ROUNDS = 3
+# --compare에서 기준값 대비 허용하는 증가율과, 아주 짧은 단계의 잡음을 흡수할 절대 여유
+TIME_TOLERANCE = 0.3
+TIME_SLACK_MS = 0.05
+MEMORY_TOLERANCE = 0.2
+MEMORY_SLACK_KIB = 64
+
+LAYOUT_LABELS = {"rating": "レート", "streak": "連勝数", "generic": "採用枚数"}
+SYNTHETIC_SIZES = [(150, 100), (400, 300)]  # (카드 수, 표본 수)
+
+
+# --- 픽스처 ---
+def card_names(count):
+    """카드 데이터베이스의 실제 이름을 count개 돌려줍니다. 모자라면 번호를 붙여 채웁니다(덱 코드 단계는 건너뜀)."""
+    with open(os.path.join(ROOT, "card_database.json"), "r", encoding="utf-8") as f:
+        names = sorted(json.load(f))
+    return names[:count] + [f"合成カード{i}" for i in range(max(0, count - len(names)))]
+
+
+def synthetic_table_html(num_cards, num_samples, layout="rating", seed=0):
+    """svlabo 덱 테이블과 같은 구조(#table_header, #decklist_body)의 HTML을 만듭니다."""
+    rng = random.Random(seed)
+    names = card_names(num_cards)
+    header = [f'<thead id="table_header"><tr><th>カード</th><th colspan="{num_samples}">{LAYOUT_LABELS[layout]}</th>'
+              '<th colspan="4">統計</th></tr>']
+    if layout == "rating":
+        header.append("<tr>" + "".join(f"<th>{rng.randint(1500, 1950)}</th>" for _ in range(num_samples))
+                      + "<th>平均</th><th>0枚</th><th>1枚</th><th>2枚</th></tr>")
+    header.append("</thead>")
+
+    body = ['<tbody id="decklist_body"><tr><th>使用日</th>'
+            + "".join(f"<td>{rng.randint(1, 12)}/{rng.randint(1, 28)}</td>" for _ in range(num_samples)) + "</tr>"]
+    popularity = [rng.random() ** 2 for _ in names]
+    for name, p in zip(names, popularity):
+        counts = [min(3, max(0, round(rng.gauss(p * 3, 0.7)))) for _ in range(num_samples)]
+        body.append(f'<tr><td><div class="name_backimg2">{name}</div></td>'
+                    + "".join(f"<td>{c}</td>" for c in counts) + f"<td>{sum(counts) / num_samples:.2f}</td></tr>")
+    body.append("</tbody>")
+    return "<html><body><table>" + "".join(header) + "".join(body) + "</table></body></html>"
+
+
+def write_default_fixtures():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for seed, layout in enumerate(LAYOUT_LABELS):
+        path = os.path.join(FIXTURE_DIR, f"{layout}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_table_html(35, 20, layout, seed))
+        print(f"픽스처 생성: {path}")
+
+
+def record_fixtures(post_url):
+    """포스트의 모든 덱 테이블을 fixtures/recorded_<n>.html로 저장합니다. 네트워크가 필요합니다."""
+    import scraper
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    try:
+        tables = scraper.scrape_all_decks(post_url)
+    finally:
+        scraper.shutdown_driver()
+    for i, (deck_name, html) in enumerate(tables.items()):
+        path = os.path.join(FIXTURE_DIR, f"recorded_{i}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<!-- {post_url} | {deck_name} -->\n{html}")
+        print(f"픽스처 저장: {path} ({deck_name})")
+
+
+def load_fixtures(only=None):
+    """[(이름, HTML)]. fixtures/*.html 다음에 대형 합성 테이블이 옵니다."""
+    fixtures = []
+    for filename in sorted(os.listdir(FIXTURE_DIR)):
+        if filename.endswith(".html"):
+            with open(os.path.join(FIXTURE_DIR, filename), "r", encoding="utf-8") as f:
+                fixtures.append((filename[:-len(".html")], f.read()))
+    for num_cards, num_samples in SYNTHETIC_SIZES:
+        fixtures.append((f"synthetic_{num_cards}x{num_samples}", synthetic_table_html(num_cards, num_samples)))
+    return [(name, html) for name, html in fixtures if not only or only in name]
+
+
+# --- 측정 ---
+def stages_for(html):
+    """[(단계 이름, setup, run)]. setup의 반환값이 run의 인자가 되며, setup 시간은 재지 않습니다."""
+    table = table_parser.parse_deck_table(html)
+    if table is None:
+        return []
+
+    def fresh_stats():
+        return logic.calculate_card_stats(table, TODAY)
+
+    def adjusted_stats():
+        cards = fresh_stats()
+        logic.adjust_deck_count(cards)
+        return cards
+
+    stages = [
+        ("parse", lambda: html, table_parser.parse_deck_table),
+        ("card_stats", lambda: table, lambda t: logic.calculate_card_stats(t, TODAY)),
+        ("adjust_deck_count", fresh_stats, logic.adjust_deck_count),
+        ("select_replacement_candidates", adjusted_stats, logic.select_replacement_candidates),
+        ("bootstrap", adjusted_stats, lambda cards: bootstrap.resample(
+            *cards.samples, cards.adjusted_count, replicates=BOOTSTRAP_REPLICATES, time_budget=float("inf"))),
+        ("analyze_table", lambda: table, lambda t: logic.analyze_table(t, TODAY)),
+    ]
+
+    results = logic.analyze_table(table, TODAY)
+    deck = [row["name"] for row in results if row["name"] != "총 합" for _ in range(int(row["adjusted_count"]))]
+    try:
+        deck_code = logic.deck_share_url(logic.generate_deck_hashes(deck), 2)
+    except ValueError:
+        return stages  # 데이터베이스에 없는 카드가 섞인 테이블은 덱 코드 단계를 건너뜁니다.
+    stages += [
+        ("generate_deck_hashes", lambda: deck, logic.generate_deck_hashes),
+        ("decode_deck_code", lambda: deck_code, logic.decode_deck_code),
+    ]
+    return stages
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(setup, run):
+    """run(setup())을 반복 실행해 지연 시간 분포를 재고, 별도 한 번의 실행으로 최대 메모리를 잽니다."""
+    for _ in range(WARMUP_ROUNDS):
+        run(setup())
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < MAX_ROUNDS and (len(latencies) < MIN_ROUNDS or time.perf_counter() - started < MIN_TIME):
+        argument = setup()
+        t0 = time.perf_counter()
+        run(argument)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    # tracemalloc은 실행을 느리게 하므로 지연 시간 측정과 따로 돌립니다. numpy 배열 할당도 잡힙니다.
+    argument = setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    run(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rounds": len(latencies),
+        "ops_per_s": round(len(latencies) / sum(latencies), 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_kib": round((peak - before) / 1024, 1),
+    }
+
+
+def run_benchmarks(only=None):
+    """{"<픽스처>/<단계>": 측정 결과}를 반환합니다."""
+    logic.load_card_database()
+    results = {}
+    for fixture, html in load_fixtures(only):
+        for stage, setup, run in stages_for(html):
+            key = f"{fixture}/{stage}"
+            results[key] = measure(setup, run)
+            r = results[key]
+            print(f"{key:60s} {r['ops_per_s']:>10.1f} ops/s  p50 {r['p50_ms']:>9.3f}ms  "
+                  f"p99 {r['p99_ms']:>9.3f}ms  peak {r['peak_kib']:>9.1f}KiB")
+    return results
+
+
+def compare(results, baseline):
+    """기준값보다 p50이나 최대 메모리가 허용 범위를 넘게 늘어난 항목의 설명 목록을 반환합니다."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        time_limit = previous["p50_ms"] * (1 + TIME_TOLERANCE) + TIME_SLACK_MS
+        if current["p50_ms"] > time_limit:
+            regressions.append(f"{key}: p50 {previous['p50_ms']}ms -> {current['p50_ms']}ms")
+        memory_limit = previous["peak_kib"] * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_KIB
+        if current["peak_kib"] > memory_limit:
+            regressions.append(f"{key}: peak {previous['peak_kib']}KiB -> {current['peak_kib']}KiB")
+    missing = sorted(set(baseline) - set(results))
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파서, 분석, 덱 코드 경로의 오프라인 벤치마크")
+    parser.add_argument("command", nargs="?", default="run", choices=("run", "record", "fixtures"))
+    parser.add_argument("post_url", nargs="?", help="record에서 저장할 svlabo 포스트 URL")
+    parser.add_argument("--only", help="이름에 이 문자열이 들어간 픽스처만 실행합니다.")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 baseline.json에 저장합니다.")
+    parser.add_argument("--compare", action="store_true", help="baseline.json과 비교해 느려진 단계가 있으면 실패합니다.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--json", help="결과를 이 파일에 JSON으로 씁니다.")
+    args = parser.parse_args()
+
+    if args.command == "fixtures":
+        write_default_fixtures()
+        return 0
+    if args.command == "record":
+        if not args.post_url:
+            parser.error("record에는 포스트 URL이 필요합니다.")
+        record_fixtures(args.post_url)
+        return 0
+
+    print(f"파서 백엔드: {table_parser.backend_name()}")
+    results = run_benchmarks(args.only)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"기준값 저장: {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, missing = compare(results, baseline)
+        if missing and not args.only:
+            print(f"기준값에는 있지만 이번에 실행되지 않은 항목: {', '.join(missing)}")
+        if regressions:
+            print("성능 저하:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("기준값 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# bootstrap.py - 표본 재추출로 추천 매수의 신뢰 구간과 안정도 추정
+#
+# 포스트 하나의 표본은 10~20개뿐이라 가중 평균과 추천 매수가 표본 몇 개에 크게 흔들립니다.
+# 표본 열을 복원 추출한 재표본마다 가중 통계와 40장 조정을 다시 계산하되, 재표본 묶음의
+# 가중치를 (재표본 수 × 표본 수) 행렬로 만들어 행렬 곱과 logic.greedy_deck_count_batch로 한 번에 처리합니다.
+import math
+import os
+import time
+
+import numpy as np
+
+import cancellation
+import logic
+import metrics
+
+# --- 설정 (환경 변수로 조정 가능) ---
+# 0이면 신뢰 구간을 계산하지 않습니다.
+REPLICATES = int(os.environ.get("BOOTSTRAP_REPLICATES", "2000"))
+# 응답 지연 목표(초). 다음 묶음까지 끝내면 이 시간을 넘길 것 같으면 재추출을 멈추고,
+# 그때까지의 재표본으로 만든 요약을 partial로 표시합니다. partial 결과는 캐시하지 않습니다.
+TIME_BUDGET = float(os.environ.get("BOOTSTRAP_TIME_BUDGET", "0.15"))
+CONFIDENCE = float(os.environ.get("BOOTSTRAP_CONFIDENCE", "0.95"))
+# 난수 시드와 묶음 크기를 고정해, 끝까지 계산한 결과는 같은 테이블이면 머신 속도와 관계없이 같습니다(같은 ETag).
+SEED = int(os.environ.get("BOOTSTRAP_SEED", "0"))
+# 첫 묶음의 재표본 수. 이 묶음에 걸린 시간으로 재표본 하나의 비용을 재서, 다음 묶음이 예산 안에 들어갈지 판단합니다.
+FIRST_CHUNK_SIZE = 16
+# 이후 묶음 하나의 재표본 수 (메모리 상한)
+CHUNK_SIZE = 250
+MAX_COPIES = 3
+
+
+class BootstrapResult:
+    """카드별 재추출 요약. 각 배열의 i번째 값이 i번째 카드의 값입니다.
+
+    average_ci와 count_ci는 (하한 배열, 상한 배열), count_frequency는 (카드 수 × 0~3장) 비율,
+    count_stability는 재표본에서 추천 매수(adjusted_count)와 같은 매수가 나온 비율입니다.
+    partial이면 시간 예산 때문에 요청한 재표본 수를 다 채우지 못한 요약입니다.
+    """
+
+    def __init__(self, replicates, average_ci, count_ci, count_frequency, count_stability, partial=False):
+        self.replicates = replicates
+        self.partial = partial
+        self.average_ci = average_ci
+        self.count_ci = count_ci
+        self.count_frequency = count_frequency
+        self.modal_count = count_frequency.argmax(axis=1)
+        self.count_stability = count_stability
+
+
+@metrics.timed("bootstrap")
+def resample(counts, weights, adjusted_count, replicates=None, time_budget=None, confidence=None, seed=None):
+    """(카드 수 × 표본 수) 매수 행렬과 표본 가중치로 replicates번 재추출해 BootstrapResult를 만듭니다.
+
+    재표본은 표본마다 뽑힌 횟수(다항 분포)를 원래 가중치에 곱한 가중치 행으로 표현합니다.
+    묶음 크기는 시간과 관계없이 FIRST_CHUNK_SIZE, 그다음부터 CHUNK_SIZE로 고정이라 난수 순서가 항상 같습니다.
+    첫 묶음은 항상 계산하고, 이후에는 지금까지의 재표본당 시간으로 보아 다음 묶음이 예산을 넘길 것 같으면
+    멈추고 partial 결과를 반환합니다. 묶음마다 작업 취소를 확인합니다.
+    주지 않은 인자는 호출 시점의 모듈 설정값을 씁니다.
+    """
+    replicates = REPLICATES if replicates is None else replicates
+    time_budget = TIME_BUDGET if time_budget is None else time_budget
+    confidence = CONFIDENCE if confidence is None else confidence
+    seed = SEED if seed is None else seed
+    counts = np.asarray(counts, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    num_samples = counts.shape[1]
+    squares = counts ** 2
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    averages, adjusted = [], []
+    done = 0
+    partial = False
+    while done < replicates:
+        cancellation.check()
+        size = min(FIRST_CHUNK_SIZE if done == 0 else CHUNK_SIZE, replicates - done)
+        picks = rng.multinomial(num_samples, np.full(num_samples, 1.0 / num_samples), size=size)
+        resampled = picks * weights
+        total = resampled.sum(axis=1, keepdims=True)
+        total[total == 0] = 1
+        chunk_averages = resampled @ counts.T / total
+        chunk_variances = np.maximum(resampled @ squares.T / total - chunk_averages ** 2, 0.0)
+        averages.append(chunk_averages)
+        adjusted.append(logic.greedy_deck_count_batch(chunk_averages, np.sqrt(chunk_variances)))
+        done += size
+        if done >= replicates or math.isinf(time_budget):
+            continue
+        elapsed = time.perf_counter() - started
+        next_size = min(CHUNK_SIZE, replicates - done)
+        if elapsed + elapsed / done * next_size > time_budget:
+            partial = True
+            break
+
+    averages = np.concatenate(averages)
+    adjusted = np.concatenate(adjusted)
+    tail = (1 - confidence) / 2
+    average_ci = np.quantile(averages, [tail, 1 - tail], axis=0)
+    count_ci = np.quantile(adjusted, [tail, 1 - tail], axis=0, method="nearest")
+    count_frequency = (adjusted[:, :, None] == np.arange(MAX_COPIES + 1)).mean(axis=0)
+    adjusted_count = np.clip(np.asarray(adjusted_count), 0, MAX_COPIES)
+    count_stability = count_frequency[np.arange(len(adjusted_count)), adjusted_count]
+    return BootstrapResult(done, (average_ci[0], average_ci[1]), (count_ci[0], count_ci[1]), count_frequency, count_stability, partial)
@@ -0,0 +1,298 @@
+# cache.py - 스크래핑 및 분석 결과 캐시 (TTL + LRU + single-flight)
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import post_index
+import scraper
+from encoded_json import EncodedJSON
+from precomputed import store as precomputed_store
+from startup import lazy_module
+
+# 분석 모듈은 numpy를 불러오므로, 캐시나 미리 계산된 결과만 읽는 요청에서는 불러오지 않습니다.
+logic = lazy_module("logic")
+deck_similarity = lazy_module("deck_similarity")
+weight_sweep = lazy_module("weight_sweep")
+
+# --- 캐시 설정 (초 / 바이트, 환경 변수로 조정 가능) ---
+POST_LIST_TTL = float(os.environ.get("CACHE_POST_LIST_TTL", "300"))
+DECK_NAMES_TTL = float(os.environ.get("CACHE_DECK_NAMES_TTL", "3600"))
+ANALYSIS_TTL = float(os.environ.get("CACHE_ANALYSIS_TTL", "3600"))
+# 모든 캐시를 합친 메모리 예산. 캐시마다 아래 비율만큼 나눠 가집니다.
+MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+BUDGET_SHARES = {
+    "post_list": 0.05,
+    "deck_names": 0.05,
+    "analysis": 0.3,
+    "deck_lists": 0.2,
+    "sweep_inputs": 0.1,
+    "encoded": 0.3,
+}
+
+
+def estimate_size(value):
+    """캐시 값이 차지하는 메모리를 JSON 직렬화 길이로 근사합니다. 배열 기반 값은 nbytes를 씁니다."""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class _Flight:
+    """같은 키에 대해 진행 중인 계산 하나. 뒤따라 온 요청은 결과를 기다립니다."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """항목별 만료 시간과 전체 메모리 예산을 가진 LRU 캐시.
+
+    get_or_compute는 같은 키에 대한 동시 요청을 한 번의 계산으로 합칩니다(single-flight).
+    비어 있는 결과와 예외는 캐시하지 않으므로 다음 요청에서 다시 시도됩니다.
+    """
+
+    def __init__(self, name, ttl, max_bytes=MAX_BYTES):
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, ttl):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            return entry[2] if entry else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """key의 값을 반환하고, 없으면 compute()로 계산해 저장합니다.
+
+        같은 key를 동시에 요청하면 한 번만 계산합니다. 빈 값이나 cacheable(value)가 거짓인 값은
+        기다리던 요청에만 돌려주고 저장하지 않습니다.
+        """
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if flight.value and (cacheable is None or cacheable(flight.value)):
+                self.set(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+def _budget(name):
+    return int(MAX_BYTES * BUDGET_SHARES[name])
+
+
+post_list_cache = TTLCache("post_list", POST_LIST_TTL, _budget("post_list"))
+deck_names_cache = TTLCache("deck_names", DECK_NAMES_TTL, _budget("deck_names"))
+analysis_cache = TTLCache("analysis", ANALYSIS_TTL, _budget("analysis"))
+deck_list_cache = TTLCache("deck_lists", ANALYSIS_TTL, _budget("deck_lists"))
+sweep_input_cache = TTLCache("sweep_inputs", ANALYSIS_TTL, _budget("sweep_inputs"))
+# 위 캐시 값들을 직렬화·압축해 둔 응답 본문. 원래 값이 갱신되면 다시 인코딩합니다.
+encoded_cache = TTLCache("encoded", ANALYSIS_TTL, _budget("encoded"))
+
+
+def _precomputed_or(load, compute):
+    """프리페치 프로세스가 저장해 둔 결과가 있으면 쓰고, 없을 때만 직접 계산합니다."""
+    def loader():
+        return load() or compute()
+    return loader
+
+
+def get_post_list():
+    return post_list_cache.get_or_compute(
+        "posts", _precomputed_or(precomputed_store.load_posts, post_index.get_posts)
+    )
+
+
+def get_deck_names(url):
+    return deck_names_cache.get_or_compute(
+        url, _precomputed_or(lambda: precomputed_store.load_deck_names(url), lambda: scraper.get_deck_names(url))
+    )
+
+
+def _complete_analysis(analysis_results):
+    return not logic.is_partial(analysis_results)
+
+
+def analyze_live_data(url, deck_name):
+    return analysis_cache.get_or_compute(
+        (url, deck_name),
+        _precomputed_or(
+            lambda: precomputed_store.load_analysis(url, deck_name),
+            lambda: logic.analyze_live_data(url, deck_name),
+        ),
+        cacheable=_complete_analysis,
+    )
+
+
+def peek_analysis(url, deck_name):
+    """계산을 시작하지 않고, 캐시나 미리 계산된 결과가 있을 때만 반환합니다."""
+    cached = analysis_cache.get((url, deck_name))
+    if cached is not None:
+        return cached
+    precomputed = precomputed_store.load_analysis(url, deck_name)
+    if precomputed:
+        analysis_cache.set((url, deck_name), precomputed)
+    return precomputed
+
+
+def encoded(key, value):
+    """value의 EncodedJSON을 반환합니다. 같은 key로 같은 값 객체를 이미 인코딩했으면 다시 하지 않습니다."""
+    if not value:
+        return None
+    cached = encoded_cache.get(key)
+    if cached is not None and cached.source is value:
+        return cached
+    result = EncodedJSON(value)
+    encoded_cache.set(key, result)
+    return result
+
+
+def encoded_post_list():
+    return encoded("posts", get_post_list())
+
+
+def encoded_deck_names(url):
+    return encoded(("deck_names", url), get_deck_names(url))
+
+
+def encoded_analysis(url, deck_name):
+    return encoded(("analysis", url, deck_name), analyze_live_data(url, deck_name))
+
+
+def peek_encoded_analysis(url, deck_name):
+    return encoded(("analysis", url, deck_name), peek_analysis(url, deck_name))
+
+
+def analyze_aggregate(deck_name, post_limit, since_days=None, source="live"):
+    return analysis_cache.get_or_compute(
+        ("aggregate", deck_name, post_limit, since_days, source),
+        lambda: logic.analyze_aggregate(deck_name, post_limit=post_limit, since_days=since_days, source=source),
+    )
+
+
+def deck_list_index(deck_name):
+    """스냅샷 기록으로 만든 deck_name의 DeckListIndex. 비어 있으면 캐시하지 않습니다."""
+    return deck_list_cache.get_or_compute(deck_name, lambda: deck_similarity.DeckListIndex.from_snapshots(deck_name))
+
+
+def deck_clusters(deck_name, k):
+    return analysis_cache.get_or_compute(
+        ("clusters", deck_name, k),
+        lambda: deck_similarity.cluster_archetype(deck_list_index(deck_name), k),
+    )
+
+
+def sweep_input(url, deck_name):
+    """가중치 격자 분석용으로 배열을 준비해 둔 덱 테이블. 테이블이 없으면 None (캐시하지 않음)."""
+    def load():
+        table, today = logic.load_deck_table(url, deck_name)
+        return weight_sweep.SweepInput(table, today) if table is not None and len(table.card_names) else None
+    return sweep_input_cache.get_or_compute((url, deck_name), load)
+
+
+def stats():
+    """캐시별 적중/실패 카운터를 반환합니다."""
+    return {c.name: c.stats() for c in (post_list_cache, deck_names_cache, analysis_cache, deck_list_cache, sweep_input_cache, encoded_cache)}
+
+
+def _collect_metrics():
+    families = []
+    cache_stats = stats()
+    for field in ("hits", "misses", "coalesced", "evictions", "entries", "bytes", "max_bytes"):
+        values = {(name,): entry[field] for name, entry in cache_stats.items()}
+        families.append((f"svmeta_cache_{field}", f"캐시별 {field}", ("cache",), values))
+    return families
+
+
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,76 @@
+# cancellation.py - 작업별 마감 시각, 취소 신호, 진행 상황 보고를 스크래핑 코드까지 전달하는 스레드 로컬 컨텍스트
+#
+# jobs.JobManager가 작업을 실행할 때 scope()를 열면, 그 스레드에서 호출되는 scraper/http_scraper의
+# 대기 함수들이 check()와 timeout()으로 취소 여부와 남은 시간을 확인하고, report()로 진행 단계를 알립니다.
+# scope 밖(동기 라우트, 프리페치 등)에서는 아무 제한도 걸리지 않습니다.
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """작업이 취소되었거나 마감 시각을 넘겼을 때 발생합니다."""
+
+
+def current():
+    """현재 스레드의 (취소 이벤트, 마감 시각, 진행 보고 함수) 또는 None."""
+    return getattr(_local, "scope", None)
+
+
+@contextmanager
+def scope(cancel_event=None, deadline=None, on_progress=None):
+    """with 블록 동안 이 스레드의 취소 이벤트, 마감 시각(time.monotonic 기준), 진행 보고 함수를 설정합니다."""
+    previous = current()
+    _local.scope = (cancel_event, deadline, on_progress)
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+
+def bind(func):
+    """현재 스레드의 scope를 다른 스레드(스레드 풀 작업 등)에서도 쓰도록 func를 감쌉니다."""
+    captured = current()
+    if captured is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        with scope(*captured):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def check():
+    """취소되었거나 마감 시각이 지났으면 JobCancelled를 발생시킵니다."""
+    captured = current()
+    if captured is None:
+        return
+    cancel_event, deadline, _ = captured
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled("작업이 취소되었습니다.")
+    if deadline is not None and time.monotonic() >= deadline:
+        raise JobCancelled("작업 마감 시간을 넘겼습니다.")
+
+
+def timeout(default):
+    """default 초와 남은 시간 중 짧은 쪽을 반환합니다. 이미 취소되었으면 JobCancelled."""
+    check()
+    captured = current()
+    if captured is None or captured[1] is None:
+        return default
+    return max(0.1, min(default, captured[1] - time.monotonic()))
+
+
+def reporting():
+    """진행 보고를 받는 쪽이 있는지 여부. 보고용 데이터를 만드는 비용을 아낄 때 씁니다."""
+    captured = current()
+    return captured is not None and captured[2] is not None
+
+
+def report(stage, **data):
+    """진행 단계를 보고합니다. scope 밖이거나 보고 함수가 없으면 아무 일도 하지 않습니다."""
+    captured = current()
+    if captured is not None and captured[2] is not None:
+        captured[2](stage, data)
@@ -0,0 +1,297 @@
+# card_index.py - card_database.json을 mmap으로 여는 정렬 인덱스 파일로 컴파일하고 조회하는 모듈
+#
+#   python card_index.py                       # card_database.json -> card_database.idx
+#   python card_index.py src.json -o out.idx
+#
+# 인덱스 파일 구조 (리틀 엔디언, 배열은 8바이트 정렬):
+#   헤더          magic "SVCI", 버전, 항목 수 n, 카드 ID 수 m, 문자열 블롭 길이
+#   key_offsets   u32[n+1]  정규화 이름(정렬됨)의 블롭 내 위치
+#   name_offsets  u32[n+1]  같은 순서의 원래 이름 위치
+#   entry_ids     u32[n]    같은 순서의 카드 ID
+#   loose_offsets u32[n+1]  느슨한 키(정렬됨)의 블롭 내 위치
+#   loose_entry   u32[n]    느슨한 키 -> 항목 번호
+#   id_sorted     u32[m]    정렬된 카드 ID
+#   id_entry      u32[m]    카드 ID -> 대표 이름의 항목 번호
+#   blob          UTF-8 문자열 블롭
+# 파일은 읽기 전용으로 mmap하므로 여러 gunicorn 워커가 같은 페이지 캐시를 공유합니다.
+import argparse
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+# --- 설정 (환경 변수로 조정 가능) ---
+SOURCE_PATH = os.environ.get("CARD_DATABASE_PATH", "card_database.json")
+INDEX_PATH = os.environ.get("CARD_INDEX_PATH", os.path.splitext(SOURCE_PATH)[0] + ".idx")
+# 파일이 바뀌었는지 확인하는 최소 간격(초). 조회할 때마다 stat을 부르지 않도록 합니다.
+RELOAD_CHECK_INTERVAL = float(os.environ.get("CARD_INDEX_RELOAD_INTERVAL", "5"))
+
+MAGIC = b"SVCI"
+VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+_U32 = np.dtype("<u4")
+
+# svlabo와 공식 사이트의 표기 차이로 흔한 기호들. 느슨한 키에서는 지우거나 하나로 모읍니다.
+_LOOSE_REMOVE = re.compile(r"[\s・·.,'\"!?「」『』()\[\]]")
+_LOOSE_DASHES = re.compile(r"[‐\-–—―−ｰ]")
+
+
+def normalize_card_name(name):
+    """카드 이름의 공백(반각/전각)을 지웁니다. 정확 조회에 쓰는 키입니다."""
+    return name.replace(" ", "").replace("　", "")
+
+
+def loose_card_key(name):
+    """표기 흔들림(전각/반각, 가운뎃점, 대시 종류, 대소문자)을 무시하는 조회 키."""
+    key = unicodedata.normalize("NFKC", name).casefold()
+    key = _LOOSE_REMOVE.sub("", key)
+    return _LOOSE_DASHES.sub("ー", key)
+
+
+# --- 컴파일 ---
+
+def _blob_offsets(strings, blob, position):
+    offsets = [position]
+    for s in strings:
+        encoded = s.encode("utf-8")
+        blob.append(encoded)
+        position += len(encoded)
+        offsets.append(position)
+    return offsets, position
+
+
+def _aligned(data):
+    return data + b"\0" * (-len(data) % 8)
+
+
+def compile_database(database, path=INDEX_PATH):
+    """{카드 이름: 카드 ID} 딕셔너리를 인덱스 파일로 씁니다. 다른 프로세스가 읽는 중이어도 안전하게 교체합니다."""
+    # 정규화 이름이 겹치면 기존 딕셔너리 방식과 같이 나중 항목이 남습니다.
+    by_key = {}
+    first_name_of_id = {}
+    for name, card_id in database.items():
+        try:
+            card_id = int(card_id)
+        except (TypeError, ValueError):
+            print(f"경고: '{name}'의 카드 ID '{card_id}'가 숫자가 아니어서 건너뜁니다.")
+            continue
+        key = normalize_card_name(name)
+        if key in by_key and by_key[key][1] != card_id:
+            print(f"경고: '{by_key[key][0]}'와 '{name}'의 이름이 공백을 빼면 같아 '{name}'({card_id})만 남깁니다.")
+        by_key[key] = (name, card_id)
+        first_name_of_id.setdefault(card_id, name)
+
+    keys = sorted(by_key, key=lambda k: k.encode("utf-8"))
+    names = [by_key[k][0] for k in keys]
+    entry_ids = [by_key[k][1] for k in keys]
+    entry_of_name = {name: i for i, name in enumerate(names)}
+    entry_of_id = {}
+    for i, card_id in enumerate(entry_ids):
+        entry_of_id.setdefault(card_id, i)
+
+    loose = sorted((loose_card_key(name).encode("utf-8"), i) for i, name in enumerate(names))
+    # 카드 ID의 대표 이름은 데이터베이스에서 처음 나온 이름입니다. 그 이름이 겹침으로 밀려났으면
+    # 같은 ID의 남은 이름을 쓰고, 남은 이름이 없는 ID는 이름으로 찾을 수 없으므로 ID 표에서도 뺍니다.
+    ids, id_entry = [], []
+    for card_id in sorted(first_name_of_id):
+        entry = entry_of_name.get(first_name_of_id[card_id])
+        if entry is None or entry_ids[entry] != card_id:
+            entry = entry_of_id.get(card_id)
+        if entry is None:
+            continue
+        ids.append(card_id)
+        id_entry.append(entry)
+
+    blob = []
+    key_offsets, position = _blob_offsets(keys, blob, 0)
+    name_offsets, position = _blob_offsets(names, blob, position)
+    loose_offsets, position = _blob_offsets([k.decode("utf-8") for k, _ in loose], blob, position)
+    blob = b"".join(blob)
+
+    sections = [
+        np.asarray(key_offsets, dtype=_U32), np.asarray(name_offsets, dtype=_U32),
+        np.asarray(entry_ids, dtype=_U32), np.asarray(loose_offsets, dtype=_U32),
+        np.asarray([i for _, i in loose], dtype=_U32),
+        np.asarray(ids, dtype=_U32), np.asarray(id_entry, dtype=_U32),
+    ]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_aligned(_HEADER.pack(MAGIC, VERSION, len(keys), len(ids), len(blob))))
+            for section in sections:
+                f.write(_aligned(section.tobytes()))
+            f.write(blob)
+        # mkstemp는 0600으로 만들므로, 다른 사용자로 도는 웹 워커도 읽을 수 있게 일반 파일 권한으로 맞춥니다.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(keys)
+
+
+def compile_file(source_path=SOURCE_PATH, index_path=INDEX_PATH):
+    with open(source_path, "r", encoding="utf-8") as f:
+        return compile_database(json.load(f), index_path)
+
+
+# --- 조회 ---
+
+class _SortedStrings:
+    """블롭 안의 정렬된 문자열 목록을 bisect로 탐색할 수 있게 감싼 시퀀스."""
+
+    def __init__(self, mm, base, offsets):
+        self.mm = mm
+        self.base = base
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.mm[self.base + int(self.offsets[i]):self.base + int(self.offsets[i + 1])]
+
+
+class CardIndex:
+    """mmap한 인덱스 파일 위의 읽기 전용 조회기.
+
+    명시적으로 닫지 않습니다. 다시 읽은 뒤에도 이전 객체를 잡고 있는 요청이 있을 수 있으므로,
+    mmap은 이 객체와 여기서 꺼낸 배열의 마지막 참조가 사라질 때 함께 해제됩니다.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, m, blob_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}는 지원하지 않는 카드 인덱스 파일입니다.")
+
+        position = len(_aligned(b"\0" * _HEADER.size))
+        arrays = []
+        for count in (n + 1, n + 1, n, n + 1, n, m, m):
+            arrays.append(np.frombuffer(self._mm, dtype=_U32, count=count, offset=position))
+            position += len(_aligned(b"\0" * (count * 4)))
+        (self._key_offsets, self._name_offsets, self._entry_ids, self._loose_offsets,
+         self._loose_entry, self._id_sorted, self._id_entry) = arrays
+        self._names = _SortedStrings(self._mm, position, self._name_offsets)
+        self._keys = _SortedStrings(self._mm, position, self._key_offsets)
+        self._loose = _SortedStrings(self._mm, position, self._loose_offsets)
+        self.mtime = os.path.getmtime(path)
+
+    def __len__(self):
+        return len(self._entry_ids)
+
+    def _name(self, entry):
+        return self._names[entry].decode("utf-8")
+
+    def _find(self, strings, key):
+        encoded = key.encode("utf-8")
+        i = bisect.bisect_left(strings, encoded)
+        if i < len(strings) and strings[i] == encoded:
+            return i
+        return None
+
+    def id_for_name(self, name):
+        """공백을 무시한 정확한 이름으로 카드 ID를 찾습니다. 없으면 None."""
+        entry = self._find(self._keys, normalize_card_name(name))
+        return int(self._entry_ids[entry]) if entry is not None else None
+
+    def name_for_id(self, card_id):
+        """카드 ID의 대표 이름을 찾습니다. 없으면 None."""
+        i = int(np.searchsorted(self._id_sorted, int(card_id)))
+        if i < len(self._id_sorted) and self._id_sorted[i] == int(card_id):
+            return self._name(int(self._id_entry[i]))
+        return None
+
+    def card_ids(self):
+        """인덱스에 있는 모든 카드 ID (정렬된 u32 배열)."""
+        return self._id_sorted
+
+    def prefix_search(self, prefix, limit=20):
+        """정규화 이름이 prefix로 시작하는 카드를 [(이름, ID), ...]로 반환합니다."""
+        encoded = normalize_card_name(prefix).encode("utf-8")
+        results = []
+        i = bisect.bisect_left(self._keys, encoded)
+        while i < len(self._keys) and len(results) < limit and self._keys[i].startswith(encoded):
+            results.append((self._name(i), int(self._entry_ids[i])))
+            i += 1
+        return results
+
+    def resolve(self, name):
+        """정확 조회, 느슨한 키 조회 순으로 (이름, ID)를 찾습니다. 없으면 None.
+
+        덱 코드에 비슷한 이름의 다른 카드가 들어가지 않도록 유사도 조회는 하지 않습니다.
+        """
+        card_id = self.id_for_name(name)
+        if card_id is not None:
+            return self._name(self._find(self._keys, normalize_card_name(name))), card_id
+        i = self._find(self._loose, loose_card_key(name))
+        if i is None:
+            return None
+        entry = int(self._loose_entry[i])
+        return self._name(entry), int(self._entry_ids[entry])
+
+
+# --- 핫 리로드 ---
+
+_index = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _stale(index_path, source_path):
+    if not os.path.exists(index_path):
+        return True
+    return os.path.exists(source_path) and os.path.getmtime(source_path) > os.path.getmtime(index_path)
+
+
+def load(source_path=SOURCE_PATH, index_path=INDEX_PATH):
+    """인덱스 파일을 엽니다. JSON이 더 새로우면 먼저 다시 컴파일합니다."""
+    global _index, _last_check
+    with _lock:
+        if _stale(index_path, source_path):
+            count = compile_file(source_path, index_path)
+            print(f"카드 인덱스 컴파일: {count}개 카드 -> {index_path}")
+        _index = CardIndex(index_path)
+        _last_check = time.monotonic()
+    return _index
+
+
+def get_index():
+    """현재 인덱스를 반환합니다. 파일이 바뀌었으면 재시작 없이 다시 엽니다."""
+    global _last_check
+    index = _index
+    if index is None:
+        return load()
+    if time.monotonic() - _last_check < RELOAD_CHECK_INTERVAL:
+        return index
+    _last_check = time.monotonic()
+    try:
+        changed = _stale(INDEX_PATH, SOURCE_PATH) or os.path.getmtime(INDEX_PATH) != index.mtime
+    except OSError:
+        return index
+    if changed:
+        try:
+            return load()
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            print(f"경고: 카드 인덱스 다시 읽기 실패, 이전 인덱스를 계속 사용합니다: {e}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="card_database.json을 mmap용 카드 인덱스 파일로 컴파일합니다.")
+    parser.add_argument("source", nargs="?", default=SOURCE_PATH)
+    parser.add_argument("-o", "--output", default=INDEX_PATH)
+    args = parser.parse_args()
+    print(f"{compile_file(args.source, args.output)}개 카드를 {args.output}에 저장했습니다.")
@@ -1,6 +1,19 @@
 # create_card_db.py
+#
+# 카드 일람의 페이지 범위를 여러 작업자에게 나눠 수집하고, 끝난 페이지는 체크포인트로 남깁니다.
+#   python create_card_db.py                 # 전체 재구축 (중단되었다면 이어서 진행)
+#   python create_card_db.py --incremental   # 기존 card_database.json에 없는 카드 ID만 이름을 읽어 추가
+#   python create_card_db.py --fresh         # 체크포인트를 지우고 처음부터
+import argparse
 import json
+import os
+import shutil
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
@@ -8,108 +21,384 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
-def scrape_page(driver, database):
-    """현재 페이지의 모든 카드 정보를 스크래핑하여 데이터베이스에 추가 (지연 로딩 처리)"""
-    try:
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "li.card-wrapper[data-card_id]")))
-        card_elements = driver.find_elements(By.CSS_SELECTOR, "li.card-wrapper[data-card_id]")
-        
-        if not card_elements:
-            return False
-
-        for card_element in card_elements:
-            # 지연 로딩을 트리거하기 위해 요소를 뷰로 스크롤
-            driver.execute_script("arguments[0].scrollIntoView(true);", card_element)
-            time.sleep(0.05) # 이미지가 로드될 시간을 아주 약간 줌
-
-            card_id = card_element.get_attribute('data-card_id')
-            card_name = ""
-            try:
-                # Selenium을 통해 직접 alt 속성 값 가져오기
-                img_element = card_element.find_element(By.CSS_SELECTOR, "img.card-img[alt]")
-                card_name = img_element.get_attribute('alt').strip()
-            except Exception:
-                # alt 속성이 없는 경우를 대비
-                continue
+import card_index
+import http_scraper
+import scraper
 
-            if card_id and card_name and card_name not in database:
-                database[card_name] = card_id
-        return True
-    except Exception as e:
-        print(f"   -> 페이지 스크래핑 중 오류: {e}")
-        return False
+# --- 설정 (환경 변수로 조정 가능) ---
+DECK_PORTAL_URL = "https://shadowverse-wb.com/ja/deck/"
+CARDLIST_URL = urljoin(DECK_PORTAL_URL, "cardslist/")
+# 정적 HTML로 특정 페이지를 받을 때 쓰는 주소 형식입니다.
+CARDLIST_PAGE_URL = os.environ.get("CARDLIST_PAGE_URL", CARDLIST_URL + "?page={page}")
+DATABASE_PATH = os.environ.get("CARD_DATABASE_PATH", "card_database.json")
+CHECKPOINT_DIR = os.environ.get("CARD_DB_CHECKPOINT_DIR", "card_db_checkpoint")
+WORKERS = int(os.environ.get("CARD_DB_WORKERS", "4"))
+# "auto"는 HTTP로 먼저 시도하고 카드가 보이지 않으면 Chrome으로 전환합니다.
+FETCH_MODE = os.environ.get("CARD_DB_FETCH_MODE", "auto")
+PAGE_RETRIES = 3
 
-def create_database():
-    print("--- 카드 데이터베이스 구축 시작 (지연 로딩 처리) ---")
-    driver = None
-    try:
+CARD_SELECTOR = "li.card-wrapper[data-card_id]"
+CARD_IMG_SELECTOR = "img.card-img[alt]"
+PAGER_SELECTOR = "a.pager-item-inner[data-page-id]"
+
+# 한 번의 스크립트 호출로 페이지의 모든 (카드 ID, 카드 이름)을 읽습니다.
+_READ_CARDS_SCRIPT = f"""
+return Array.from(document.querySelectorAll("{CARD_SELECTOR}")).map(li => {{
+    const img = li.querySelector("{CARD_IMG_SELECTOR}");
+    return [li.getAttribute("data-card_id"), img ? img.getAttribute("alt").trim() : ""];
+}});
+"""
+# 이름이 아직 비어 있는 카드만 뷰로 스크롤해 지연 로딩을 한 번에 트리거합니다.
+# arguments[0]에 있는 카드 ID(기존 데이터베이스에 있는 카드)는 건너뜁니다.
+_LOAD_MISSING_SCRIPT = f"""
+const skip = new Set(arguments[0]);
+document.querySelectorAll("{CARD_SELECTOR}").forEach(li => {{
+    if (skip.has(li.getAttribute("data-card_id"))) return;
+    const img = li.querySelector("{CARD_IMG_SELECTOR}");
+    if (!img || !img.getAttribute("alt").trim()) li.scrollIntoView(true);
+}});
+"""
+# 페이지 목록은 현재 페이지 주변 번호만 보여 줄 수 있으므로, 멀리 떨어진 페이지로 갈 때 거치는 최대 이동 횟수입니다.
+MAX_PAGER_HOPS = 50
+
+
+# --- 페이지 수집기 ---
+
+class BrowserFetcher:
+    """Chrome 세션 하나로 카드 일람 페이지를 여는 수집기. 작업자 스레드마다 하나씩 만들어집니다."""
+
+    name = "selenium"
+
+    def __init__(self):
+        self.driver = None
+
+    def _open(self):
         options = webdriver.ChromeOptions()
         options.add_experimental_option('prefs', {'intl.accept_languages': 'ja-JP,ja'})
-        service = Service(ChromeDriverManager().install())
+        service = Service(scraper.CHROMEDRIVER_PATH or ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=options)
         driver.set_window_size(1920, 1080)
-        
-        print("1. 덱 포탈 메인 페이지로 이동...")
-        driver.get("https://shadowverse-wb.com/ja/deck/")
-        
-        print("2. 쿠키 동의 바 처리...")
+        self.driver = driver
+
+        driver.get(DECK_PORTAL_URL)
         try:
             accept_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
             accept_button.click()
             WebDriverWait(driver, 10).until(EC.invisibility_of_element_located((By.ID, "onetrust-banner-sdk")))
-            print("   -> 쿠키 동의 완료.")
         except Exception:
-            print("   -> 쿠키 동의 바 없음.")
+            pass  # 쿠키 동의 바 없음
 
-        print("3. 본문의 '카드 일람' 버튼 클릭...")
         card_list_button = WebDriverWait(driver, 20).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "a.button.icon-cards[href='/ja/deck/cardslist/']"))
         )
         driver.execute_script("arguments[0].click();", card_list_button)
+        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, PAGER_SELECTOR)))
+
+    def _ensure_open(self):
+        if self.driver is None:
+            self._open()
+        return self.driver
+
+    def total_pages(self):
+        driver = self._ensure_open()
+        page_elements = driver.find_elements(By.CSS_SELECTOR, PAGER_SELECTOR)
+        return int(page_elements[-1].get_attribute("data-page-id"))
+
+    def _go_to_page(self, driver, page_num):
+        """page_num 페이지로 이동합니다.
+
+        페이지 목록에 page_num 번호가 보이지 않으면 보이는 번호 중 가장 가까운 페이지로 먼저 이동하고,
+        목록이 바뀔 때마다 이를 반복해 작업자가 서로 떨어진 페이지로 건너뛰어도 도달하게 합니다.
+        """
+        for _ in range(MAX_PAGER_HOPS):
+            active = driver.find_elements(By.CSS_SELECTOR, ".pager-item.active a[data-page-id]")
+            current = active[0].get_attribute("data-page-id") if active else None
+            if current == str(page_num):
+                return
+            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, PAGER_SELECTOR)))
+            visible = {}
+            for element in driver.find_elements(By.CSS_SELECTOR, PAGER_SELECTOR):
+                page_id = element.get_attribute("data-page-id")
+                if page_id and page_id.isdigit():
+                    visible.setdefault(int(page_id), element)
+            if not visible:
+                raise RuntimeError("페이지 목록을 찾지 못했습니다.")
+            target = min(visible, key=lambda page: abs(page - page_num))
+            if str(target) == current:
+                raise RuntimeError(f"페이지 목록에서 {page_num} 페이지로 갈 수 없습니다.")
+            driver.execute_script("arguments[0].click();", visible[target])
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, f".pager-item.active a[data-page-id='{target}']"))
+            )
+        raise RuntimeError(f"{MAX_PAGER_HOPS}번 이동해도 {page_num} 페이지에 도달하지 못했습니다.")
+
+    def fetch_page(self, page_num, known_ids=()):
+        """page_num 페이지의 [(카드 ID, 카드 이름), ...]을 페이지 순서대로 반환합니다.
+
+        known_ids에 있는 카드는 지연 로딩을 기다리지 않으므로 이름이 빈 문자열일 수 있습니다.
+        """
+        driver = self._ensure_open()
+        self._go_to_page(driver, page_num)
+        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR)))
+        cards = driver.execute_script(_READ_CARDS_SCRIPT)
+        if not is_complete(cards, known_ids):
+            driver.execute_script(_LOAD_MISSING_SCRIPT, list(known_ids))
+            time.sleep(0.5)
+            cards = driver.execute_script(_READ_CARDS_SCRIPT)
+        return cards
 
-        print("4. 카드 리스트 페이지 로딩 및 전체 페이지 수 확인...")
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "a.pager-item-inner[data-page-id]")))
-        page_elements = driver.find_elements(By.CSS_SELECTOR, "a.pager-item-inner[data-page-id]")
-        total_pages = int(page_elements[-1].get_attribute("data-page-id"))
-        print(f"   -> 로딩 완료. 총 {total_pages} 페이지 확인.")
-
-        print("5. 모든 페이지를 순회하며 데이터 수집...")
-        card_database = {}
-        
-        for page_num in range(1, total_pages + 1):
-            print(f"   -> {page_num} 페이지 분석 중...")
-            if page_num > 1:
-                try:
-                    page_button = WebDriverWait(driver, 15).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, f"a.pager-item-inner[data-page-id='{page_num}']"))
-                    )
-                    driver.execute_script("arguments[0].click();", page_button)
-                    WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, f".pager-item.active a[data-page-id='{page_num}']"))
-                    )
-                except Exception as e:
-                    print(f"   -> {page_num} 페이지로 이동 중 오류 발생: {e}. 재시도...")
-                    driver.refresh()
-                    time.sleep(3)
-                    continue
-
-            if not scrape_page(driver, card_database):
-                print(f"   -> {page_num} 페이지에서 카드 정보를 찾을 수 없어 중단합니다.")
-                break
-        
-        if not card_database:
-            print("\n오류: 카드 데이터를 수집하지 못했습니다.")
-            return
-
-        with open("card_database.json", "w", encoding="utf-8") as f:
-            json.dump(card_database, f, ensure_ascii=False, indent=4)
-            
-        print(f"\n성공: 데이터베이스 생성 완료. 총 {len(card_database)}개의 카드를 'card_database.json'에 저장했습니다.")
+    def reset(self):
+        """오류가 난 세션을 버립니다. 다음 요청에서 새로 엽니다."""
+        self.close()
 
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+class HttpFetcher:
+    """정적 HTML로 카드 일람 페이지를 받는 수집기. 커넥션 풀은 http_scraper와 공유합니다."""
+
+    name = "http"
+
+    def total_pages(self):
+        soup = http_scraper.fetch_soup(CARDLIST_PAGE_URL.format(page=1))
+        pages = [int(a["data-page-id"]) for a in soup.select(PAGER_SELECTOR) if a["data-page-id"].isdigit()]
+        if not pages:
+            raise http_scraper.HttpFetchError("정적 HTML에 페이지 목록이 없습니다.")
+        return max(pages)
+
+    def fetch_page(self, page_num, known_ids=()):
+        soup = http_scraper.fetch_soup(CARDLIST_PAGE_URL.format(page=page_num))
+        cards = []
+        for card_element in soup.select(CARD_SELECTOR):
+            img = card_element.select_one(CARD_IMG_SELECTOR)
+            cards.append([card_element["data-card_id"], img["alt"].strip() if img is not None else ""])
+        return cards
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def is_complete(cards, known_ids=()):
+    """known_ids에 없는 카드의 이름이 모두 읽혔으면 True."""
+    return all(name or card_id in known_ids for card_id, name in cards)
+
+
+def choose_fetcher_factory(mode=FETCH_MODE):
+    """(수집기 생성 함수, 전체 페이지 수)를 반환합니다. auto 모드는 HTTP로 1페이지를 확인해 보고 결정합니다.
+
+    CARDLIST_PAGE_URL의 페이지 번호가 실제로 반영되는지도 2페이지를 받아 확인합니다.
+    번호를 무시하고 같은 목록을 돌려주는 사이트라면 모든 페이지가 1페이지로 채워지기 때문입니다.
+    """
+    if mode != "selenium":
+        fetcher = HttpFetcher()
+        try:
+            total_pages = fetcher.total_pages()
+            first_page = fetcher.fetch_page(1)
+            if not any(name for _, name in first_page):
+                raise http_scraper.HttpFetchError("정적 HTML에 카드 정보가 없습니다.")
+            if total_pages > 1:
+                second_page = fetcher.fetch_page(2)
+                if not second_page or {card_id for card_id, _ in second_page} <= {card_id for card_id, _ in first_page}:
+                    raise http_scraper.HttpFetchError(f"'{CARDLIST_PAGE_URL}' 주소의 페이지 번호가 반영되지 않습니다.")
+            return HttpFetcher, total_pages
+        except http_scraper.HttpFetchError as e:
+            if mode == "http":
+                raise
+            print(f"   -> HTTP 경로 실패, Chrome으로 전환합니다: {e}")
+
+    fetcher = BrowserFetcher()
+    try:
+        return BrowserFetcher, fetcher.total_pages()
     finally:
-        if driver:
-            print("\n--- 드라이버 종료 ---")
-            driver.quit()
+        fetcher.close()
+
+
+# --- 체크포인트 ---
+
+class PageCheckpoint:
+    """완료된 페이지의 카드 목록을 페이지별 파일로 보관합니다.
+
+    전체 페이지 수가 바뀌면 페이지 경계가 밀렸을 수 있으므로 기존 체크포인트는 버립니다.
+    """
+
+    def __init__(self, root=CHECKPOINT_DIR):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _write(self, name, value):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self._path(name))
+
+    def _read(self, name):
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def start(self, total_pages):
+        meta = self._read("meta.json")
+        if meta is not None and meta.get("total_pages") != total_pages:
+            print(f"   -> 전체 페이지 수가 {meta.get('total_pages')} → {total_pages}로 바뀌어 체크포인트를 초기화합니다.")
+            self.clear()
+        self._write("meta.json", {"total_pages": total_pages})
+
+    def load(self, page_num):
+        return self._read(f"page_{page_num:04d}.json")
+
+    def save(self, page_num, cards):
+        self._write(f"page_{page_num:04d}.json", cards)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# --- 수집 및 병합 ---
+
+def merge_pages(pages, existing=None):
+    """페이지 번호 순서대로 카드를 합칩니다.
+
+    이름이 같은 카드는 먼저 나온 쪽을 유지하고, existing(기존 데이터베이스)에 이미 있는
+    이름이나 카드 ID는 건드리지 않습니다. 작업자가 끝난 순서와 관계없이 결과가 같습니다.
+    """
+    database = dict(existing or {})
+    known_ids = set(database.values())
+    for page_num in sorted(pages):
+        for card_id, card_name in pages[page_num]:
+            if not card_id or not card_name or card_name in database or card_id in known_ids:
+                continue
+            database[card_name] = card_id
+            known_ids.add(card_id)
+    return database
+
+
+def collect_pages(fetcher_factory, page_numbers, checkpoint, workers=WORKERS, known_ids=frozenset()):
+    """page_numbers를 작업자들에게 나눠 수집합니다. {페이지 번호: 카드 목록}과 실패한 페이지 목록을 반환합니다.
+
+    known_ids(기존 데이터베이스의 카드 ID)에 있는 카드는 이름을 읽지 않아도 완료로 봅니다.
+    """
+    local = threading.local()
+    fetchers = []
+    fetchers_lock = threading.Lock()
+
+    def fetch(page_num):
+        fetcher = getattr(local, "fetcher", None)
+        if fetcher is None:
+            fetcher = local.fetcher = fetcher_factory()
+            with fetchers_lock:
+                fetchers.append(fetcher)
+        for attempt in range(1, PAGE_RETRIES + 1):
+            try:
+                cards = fetcher.fetch_page(page_num, known_ids)
+                if cards and is_complete(cards, known_ids):
+                    checkpoint.save(page_num, cards)
+                    return cards
+                print(f"   -> {page_num} 페이지에서 카드 정보를 찾지 못했습니다. ({attempt}/{PAGE_RETRIES})")
+            except Exception as e:
+                print(f"   -> {page_num} 페이지 수집 중 오류 ({attempt}/{PAGE_RETRIES}): {e}")
+            fetcher.reset()
+        return None
+
+    pages, failed = {}, []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(fetch, page_num): page_num for page_num in page_numbers}
+            for future in as_completed(futures):
+                page_num = futures[future]
+                cards = future.result()
+                if cards is None:
+                    failed.append(page_num)
+                else:
+                    pages[page_num] = cards
+                    print(f"   -> {page_num} 페이지 완료 ({len(cards)}장)")
+    finally:
+        for fetcher in fetchers:
+            fetcher.close()
+    return pages, sorted(failed)
+
+
+def load_database(path=DATABASE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_database(database, path=DATABASE_PATH):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(database, f, ensure_ascii=False, indent=4)
+    # mkstemp는 0600으로 만들므로, 웹 서버 등 다른 사용자도 읽을 수 있게 일반 파일 권한으로 맞춥니다.
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def create_database(incremental=False, fresh=False, workers=WORKERS, mode=FETCH_MODE):
+    print("--- 카드 데이터베이스 구축 시작 ---")
+    checkpoint = PageCheckpoint()
+    if fresh:
+        checkpoint.clear()
+
+    print("1. 수집 방식 및 전체 페이지 수 확인...")
+    fetcher_factory, total_pages = choose_fetcher_factory(mode)
+    print(f"   -> {fetcher_factory.name} 수집기, 총 {total_pages} 페이지 확인.")
+    checkpoint.start(total_pages)
+
+    # --incremental이면 기존 카드는 ID만 확인하고, 이름은 새 카드 ID에 대해서만 읽습니다.
+    existing = load_database() if incremental else None
+    known_ids = frozenset((existing or {}).values())
+
+    pages = {}
+    for page_num in range(1, total_pages + 1):
+        cards = checkpoint.load(page_num)
+        if cards and is_complete(cards, known_ids):
+            pages[page_num] = cards
+    remaining = [page_num for page_num in range(1, total_pages + 1) if page_num not in pages]
+    if pages:
+        print(f"   -> 체크포인트에서 {len(pages)}개 페이지를 불러왔습니다.")
+
+    print(f"2. 남은 {len(remaining)}개 페이지를 작업자 {workers}개로 수집...")
+    collected, failed = collect_pages(fetcher_factory, remaining, checkpoint, workers, known_ids)
+    pages.update(collected)
+    if failed:
+        print(f"\n오류: {failed} 페이지를 수집하지 못했습니다. 다시 실행하면 남은 페이지부터 이어서 진행합니다.")
+        return None
+
+    card_database = merge_pages(pages, existing)
+    if not card_database:
+        print("\n오류: 카드 데이터를 수집하지 못했습니다.")
+        return None
+
+    save_database(card_database)
+    card_index.compile_database(card_database, card_index.INDEX_PATH)
+    checkpoint.clear()
+    added = len(card_database) - len(existing or {})
+    print(f"\n성공: 총 {len(card_database)}개의 카드를 '{DATABASE_PATH}'에 저장했습니다. (새로 추가 {added}개)")
+    return card_database
+
 
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="shadowverse-wb 카드 일람으로 card_database.json을 만듭니다.")
+    parser.add_argument("--incremental", action="store_true", help="기존 데이터베이스는 유지하고 새 카드 ID만 추가합니다.")
+    parser.add_argument("--fresh", action="store_true", help="체크포인트를 지우고 처음부터 수집합니다.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="동시에 페이지를 수집할 작업자 수")
+    parser.add_argument("--mode", choices=("auto", "http", "selenium"), default=FETCH_MODE)
+    args = parser.parse_args()
+    create_database(incremental=args.incremental, fresh=args.fresh, workers=args.workers, mode=args.mode)
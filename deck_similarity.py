@@ -0,0 +1,226 @@
+# deck_similarity.py - 표본 덱 리스트 단위의 유사 덱 검색과 아키타입 세부 유형 군집화
+#
+# 덱 테이블의 각 열(표본)은 40장짜리 덱 리스트 하나입니다. 여기서는 열을 평균으로 합치지 않고
+# (리스트 수 × 카드 수) int8 매수 행렬로 보관해, 거리 계산을 행렬 연산 한 번으로 처리합니다.
+import os
+from datetime import datetime
+
+import numpy as np
+
+import logic
+import snapshot_store
+
+# --- 설정 (환경 변수로 조정 가능) ---
+DEFAULT_CLUSTERS = int(os.environ.get("DECK_CLUSTERS", "3"))
+KMEANS_MAX_ITER = 50
+# 거리 계산에 쓰는 임시 행렬이 너무 커지지 않도록 한 번에 처리할 리스트 수
+CHUNK_SIZE = 8192
+DISTINCTIVE_CARDS = 5
+
+
+class DeckListIndex:
+    """덱 리스트 여러 개를 카드 이름 열 기준의 int8 매수 행렬로 보관하는 인덱스.
+
+    counts[i, j]는 i번째 리스트에 들어간 card_names[j]의 매수이고, weights[i]는
+    logic.calculate_weights와 같은 방식으로 매긴 표본 가중치, meta[i]는 출처 정보입니다.
+    """
+
+    def __init__(self, card_names, counts, weights=None, meta=None):
+        self.card_names = list(card_names)
+        counts = np.asarray(counts, dtype=np.int8)
+        self.counts = counts.reshape(len(counts), len(self.card_names))
+        self.weights = np.ones(len(self.counts)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.meta = list(meta) if meta is not None else [{} for _ in range(len(self.counts))]
+        self._column = {name: j for j, name in enumerate(self.card_names)}
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def nbytes(self):
+        """캐시 메모리 예산 계산용 근사 크기. 출처 정보는 리스트당 200바이트로 어림합니다."""
+        return self.counts.nbytes + self.weights.nbytes + 200 * len(self.meta)
+
+    @classmethod
+    def from_tables(cls, tables, today=None):
+        """(출처 정보, DeckTable) 쌍들의 표본 열을 하나의 인덱스로 합칩니다. 비어 있는 표본은 건너뜁니다."""
+        today = today or datetime.now()
+        column = {}
+        blocks, weights, meta = [], [], []
+        for source, table in tables:
+            if table is None:
+                continue
+            for name in table.card_names:
+                column.setdefault(name, len(column))
+            lists = table.counts.T
+            keep = lists.sum(axis=1) > 0
+            if not keep.any():
+                continue
+            block_columns = np.fromiter((column[name] for name in table.card_names), dtype=np.intp)
+            blocks.append((block_columns, lists[keep]))
+            weights.append(np.asarray(logic.calculate_weights(table, today))[keep])
+            for sample in np.flatnonzero(keep).tolist():
+                meta.append({
+                    **source,
+                    "sample": sample,
+                    "date": table.date_values[sample] if sample < len(table.date_values) else None,
+                    "rating": table.rating_values[sample] if sample < len(table.rating_values) else None,
+                })
+
+        counts = np.zeros((len(meta), len(column)), dtype=np.int8)
+        row = 0
+        for block_columns, lists in blocks:
+            counts[row:row + len(lists)][:, block_columns] = lists
+            row += len(lists)
+        weights = np.concatenate(weights) if weights else np.zeros(0)
+        return cls(list(column), counts, weights, meta)
+
+    @classmethod
+    def from_snapshots(cls, deck_name, post_urls=None, latest_only=True, today=None):
+        """스냅샷 저장소에 쌓인 deck_name 테이블들로 인덱스를 만듭니다."""
+        if snapshot_store.store is None:
+            return cls([], np.zeros((0, 0), dtype=np.int8))
+        snapshots = snapshot_store.store.iter_snapshots(post_urls=post_urls, deck_name=deck_name, latest_only=latest_only)
+        return cls.from_tables(
+            (({"post_url": s.post_url, "fetched_at": s.fetched_at}, s.table) for s in snapshots), today
+        )
+
+    def vectorize(self, deck):
+        """[카드 이름, ...] 또는 {카드 이름: 매수}를 이 인덱스의 열 순서 매수 벡터로 바꿉니다. 모르는 카드는 무시됩니다."""
+        if not isinstance(deck, dict):
+            counted = {}
+            for name in deck:
+                counted[name] = counted.get(name, 0) + 1
+            deck = counted
+        vector = np.zeros(len(self.card_names), dtype=np.int8)
+        for name, count in deck.items():
+            j = self._column.get(name)
+            if j is not None:
+                vector[j] = count
+        return vector
+
+    def deck_of(self, i):
+        """i번째 리스트를 {카드 이름: 매수}로 돌려줍니다."""
+        row = self.counts[i]
+        return {self.card_names[j]: int(row[j]) for j in np.flatnonzero(row)}
+
+    def overlap(self, vector):
+        """모든 리스트와 vector가 공유하는 카드 장수 Σmin(a, b)를 계산합니다."""
+        result = np.empty(len(self.counts), dtype=np.int32)
+        for start in range(0, len(self.counts), CHUNK_SIZE):
+            chunk = self.counts[start:start + CHUNK_SIZE]
+            result[start:start + len(chunk)] = np.minimum(chunk, vector).sum(axis=1, dtype=np.int32)
+        return result
+
+    def nearest(self, deck, n=10):
+        """deck과 가장 가까운 리스트 n개를 반환합니다.
+
+        거리는 한쪽 덱을 다른 쪽으로 바꾸는 데 필요한 교체 장수((|a| + |b|) / 2 - 공유 장수)입니다.
+        """
+        if not len(self):
+            return []
+        vector = self.vectorize(deck)
+        sizes = self.counts.sum(axis=1, dtype=np.int32)
+        distances = (sizes + int(vector.sum())) / 2 - self.overlap(vector)
+        n = min(n, len(distances))
+        nearest = np.argpartition(distances, n - 1)[:n]
+        nearest = nearest[np.lexsort((nearest, distances[nearest]))]
+        return [
+            {"distance": float(distances[i]), "deck": self.deck_of(i), **self.meta[i]}
+            for i in nearest.tolist()
+        ]
+
+    def cluster(self, k=DEFAULT_CLUSTERS, seed=0):
+        """가중 k-평균으로 리스트를 세부 유형 k개로 나눕니다. 각 리스트의 군집 번호 배열과 중심을 반환합니다."""
+        points = self.counts.astype(np.float32)
+        weights = self.weights
+        k = max(1, min(k, len(points)))
+        centers = _kmeans_plus_plus(points, weights, k, np.random.default_rng(seed))
+        labels = None
+        for _ in range(KMEANS_MAX_ITER):
+            distances = _squared_distances(points, centers)
+            new_labels = distances.argmin(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for c in range(k):
+                members = labels == c
+                if members.any() and weights[members].sum() > 0:
+                    centers[c] = np.average(points[members], axis=0, weights=weights[members])
+                else:
+                    # 빈 군집은 현재 중심에서 가장 먼 리스트로 다시 시작합니다.
+                    centers[c] = points[distances.min(axis=1).argmax()]
+        return labels, centers
+
+
+def _squared_distances(points, centers):
+    """(리스트 수 × 중심 수) 제곱 유클리드 거리. ‖x‖² - 2x·c + ‖c‖²를 행렬곱으로 계산합니다."""
+    distances = np.empty((len(points), len(centers)), dtype=np.float32)
+    center_norms = (centers * centers).sum(axis=1)
+    for start in range(0, len(points), CHUNK_SIZE):
+        chunk = points[start:start + CHUNK_SIZE]
+        chunk_norms = (chunk * chunk).sum(axis=1)[:, None]
+        distances[start:start + len(chunk)] = np.maximum(chunk_norms - 2 * chunk @ centers.T + center_norms, 0)
+    return distances
+
+
+def _kmeans_plus_plus(points, weights, k, rng):
+    probabilities = weights / weights.sum() if weights.sum() > 0 else None
+    centers = [points[rng.choice(len(points), p=probabilities)]]
+    closest = _squared_distances(points, np.array(centers))[:, 0]
+    for _ in range(1, k):
+        scores = closest * weights
+        if scores.sum() <= 0:
+            centers.append(points[rng.integers(len(points))])
+        else:
+            centers.append(points[rng.choice(len(points), p=scores / scores.sum())])
+        closest = np.minimum(closest, _squared_distances(points, centers[-1][None, :])[:, 0])
+    return np.array(centers, dtype=np.float32)
+
+
+def representative_table(index, members):
+    """군집에 속한 리스트들의 가중 평균/분산으로 CardTable을 만듭니다. 쓰이지 않은 카드는 뺍니다."""
+    counts = index.counts[members].astype(np.float64)
+    weights = index.weights[members]
+    total_weight = weights.sum() or 1
+    average = weights @ counts / total_weight
+    variance = weights @ (counts - average) ** 2 / total_weight
+    used = average > 0
+    names = [name for name, keep in zip(index.card_names, used) if keep]
+    return logic.CardTable(names, average[used], variance[used])
+
+
+def cluster_archetype(index, k=DEFAULT_CLUSTERS, seed=0):
+    """아키타입의 표본을 세부 유형으로 나누고, 유형마다 대표 덱 분석 결과를 만듭니다.
+
+    대표 덱은 군집의 가중 평균 매수를 logic.analyze_card_table(40장 맞춤 포함)에 넣은 결과이며,
+    medoid는 군집 중심에 가장 가까운 실제 리스트입니다. 큰 군집부터 정렬합니다.
+    """
+    if not len(index):
+        return []
+    labels, centers = index.cluster(k, seed)
+    points = index.counts.astype(np.float32)
+    total_weight = index.weights.sum() or 1
+    overall = index.weights @ index.counts.astype(np.float64) / total_weight
+
+    clusters = []
+    for c in range(len(centers)):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        distances = _squared_distances(points[members], centers[c][None, :])[:, 0]
+        medoid = int(members[distances.argmin()])
+        cluster_average = centers[c].astype(np.float64)
+        distinctive = np.argsort(overall - cluster_average, kind="stable")[:DISTINCTIVE_CARDS]
+        clusters.append({
+            "size": int(len(members)),
+            "share": float(index.weights[members].sum() / total_weight),
+            "distinctive_cards": [
+                {"name": index.card_names[j], "average": float(cluster_average[j]), "overall_average": float(overall[j])}
+                for j in distinctive.tolist() if cluster_average[j] > overall[j]
+            ],
+            "representative": logic.analyze_card_table(representative_table(index, members)),
+            "medoid": {"deck": index.deck_of(medoid), **index.meta[medoid]},
+        })
+    clusters.sort(key=lambda cluster: cluster["share"], reverse=True)
+    return clusters
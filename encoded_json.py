@@ -0,0 +1,58 @@
+# encoded_json.py - 한 번 직렬화하고 압축해 둔 JSON 응답 본문
+#
+# 분석 결과는 바뀌지 않는 한 같은 바이트열이므로, 요청마다 jsonify로 다시 직렬화하지 않고
+# 본문, gzip/brotli 압축본, 내용 해시 ETag를 함께 만들어 캐시에 둡니다.
+# 같은 본문은 export_static.py가 정적 파일(.json, .json.gz, .json.br)로 쓸 때도 그대로 씁니다.
+import gzip
+import hashlib
+import json
+import os
+
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- 설정 (환경 변수로 조정 가능) ---
+# 이보다 작은 본문은 압축해도 헤더 비용만 늘어나므로 그대로 보냅니다.
+MIN_COMPRESS_SIZE = int(os.environ.get("JSON_MIN_COMPRESS_SIZE", "512"))
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedJSON:
+    """값 하나의 직렬화 결과와 압축본, ETag.
+
+    source는 인코딩한 원래 값입니다. 캐시는 source가 현재 값과 같은 객체인지로
+    이 인코딩이 아직 유효한지 판단합니다.
+    """
+
+    def __init__(self, value):
+        self.source = value
+        with metrics.timed("json_encode"):
+            self.body = dumps(value)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.encodings = {}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            with metrics.timed("json_compress"):
+                self.encodings["gzip"] = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+                if brotli is not None:
+                    self.encodings["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+
+    @property
+    def nbytes(self):
+        """캐시 메모리 예산 계산용 크기. source는 원래 캐시가 이미 세고 있으므로 빼고 계산합니다."""
+        return len(self.body) + sum(len(body) for body in self.encodings.values())
+
+    def negotiate(self, accept_encodings):
+        """Accept-Encoding에 맞는 (Content-Encoding 또는 None, 본문)을 고릅니다. brotli를 우선합니다."""
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings and accept_encodings[encoding] > 0:
+                return encoding, self.encodings[encoding]
+        return None, self.body
@@ -0,0 +1,127 @@
+# export_static.py - 모든 포스트/덱의 분석 결과를 정적 JSON 파일로 내보내는 CLI
+#
+#   python export_static.py out/              # 포스트 목록 전체
+#   python export_static.py out/ --posts 20   # 최신 20개 포스트만
+#   python export_static.py out/ --refresh    # 미리 계산된 결과를 무시하고 다시 스크래핑
+#
+# 출력 구조 (파일 이름은 precomputed.url_key와 같은 규칙을 따릅니다):
+#   out/posts.json                              포스트 목록
+#   out/index.json                              {포스트 URL: {"title", "path", "decks": {덱 이름: 파일 경로}}}
+#   out/<url_key(포스트)>/deck_names.json
+#   out/<url_key(포스트)>/<url_key(덱)>.json
+# 각 JSON 옆에 .gz/.br 압축본을 함께 써 두므로 nginx(gzip_static/brotli_static)나 CDN이 그대로 서빙할 수 있습니다.
+# 내용이 같은 파일은 다시 쓰지 않아 수정 시각이 유지되고, 그 시각으로 만든 ETag도 바뀌지 않습니다.
+import argparse
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cache
+import logic
+import scraper
+from encoded_json import EncodedJSON
+from precomputed import store as precomputed_store, url_key
+
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def _write_if_changed(path, body):
+    """내용이 바뀌었을 때만 임시 파일에 쓴 뒤 교체합니다. 썼으면 True."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == body:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        # mkstemp는 0600으로 만들므로, 정적 파일 서버가 읽을 수 있게 일반 파일 권한으로 맞춥니다.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def write_json(out_dir, relative_path, value):
+    """value를 relative_path에 쓰고 압축본도 함께 씁니다. 새로 쓴 파일 수를 반환합니다."""
+    encoded = EncodedJSON(value)
+    path = os.path.join(out_dir, relative_path)
+    written = _write_if_changed(path, encoded.body)
+    for encoding, suffix in SUFFIXES.items():
+        if encoding in encoded.encodings:
+            written += _write_if_changed(path + suffix, encoded.encodings[encoding])
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)  # 작아져서 압축하지 않게 된 본문의 예전 압축본이 남지 않게 합니다.
+    return written
+
+
+def load_post_results(url, refresh=False):
+    """포스트의 {덱 이름: 분석 결과}. 프리페치가 저장해 둔 결과가 모두 있으면 쓰고, 아니면 한 번에 스크래핑합니다."""
+    if not refresh:
+        deck_names = precomputed_store.load_deck_names(url)
+        if deck_names:
+            results = {name: precomputed_store.load_analysis(url, name) for name in deck_names}
+            if all(results.values()):
+                return results
+    return logic.analyze_post(url)
+
+
+def export_post(out_dir, post, refresh=False):
+    """포스트 하나를 내보내고 (index.json 항목, 새로 쓴 파일 수)를 반환합니다."""
+    results = load_post_results(post["url"], refresh)
+    if not results:
+        raise RuntimeError("분석 결과가 비어 있습니다.")
+    post_dir = url_key(post["url"])
+    written = write_json(out_dir, f"{post_dir}/deck_names.json", list(results))
+    decks = {}
+    for deck_name, analysis_results in results.items():
+        decks[deck_name] = f"{post_dir}/{url_key(deck_name)}.json"
+        written += write_json(out_dir, decks[deck_name], analysis_results)
+    return {"title": post["title"], "path": post_dir, "decks": decks}, written
+
+
+def export_static(out_dir, post_limit=None, refresh=False, workers=scraper.POOL_SIZE):
+    """포스트 목록의 모든 포스트/덱을 out_dir에 내보냅니다. 실패한 포스트는 건너뛰고 나머지를 계속합니다."""
+    posts = cache.get_post_list()
+    if not posts:
+        raise RuntimeError("포스트 목록을 가져오지 못했습니다.")
+    posts = posts[:post_limit] if post_limit else posts
+
+    index, written, failed = {}, 0, 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(export_post, out_dir, post, refresh): post for post in posts}
+        for future in as_completed(futures):
+            post = futures[future]
+            try:
+                index[post["url"]], post_written = future.result()
+                written += post_written
+            except Exception as e:
+                failed += 1
+                print(f"내보내기 실패 ({post['title']}): {e}")
+
+    # 포스트 목록과 색인은 내보낸 포스트만, 원래 목록 순서대로 씁니다.
+    exported = [post for post in posts if post["url"] in index]
+    written += write_json(out_dir, "posts.json", exported)
+    written += write_json(out_dir, "index.json", {post["url"]: index[post["url"]] for post in exported})
+    print(f"내보내기: 포스트 {len(exported)}개 (실패 {failed}개), 새로 쓴 파일 {written}개 -> {out_dir}")
+    return len(exported)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모든 포스트/덱의 분석 결과를 정적 JSON 파일로 내보냅니다.")
+    parser.add_argument("out_dir", help="출력 디렉터리")
+    parser.add_argument("--posts", type=int, default=None, help="최신 N개 포스트만 내보냅니다.")
+    parser.add_argument("--refresh", action="store_true", help="미리 계산된 결과를 무시하고 다시 스크래핑합니다.")
+    parser.add_argument("--workers", type=int, default=scraper.POOL_SIZE, help="동시에 처리할 포스트 수")
+    args = parser.parse_args()
+
+    try:
+        export_static(args.out_dir, args.posts, args.refresh, args.workers)
+    finally:
+        scraper.shutdown_driver()
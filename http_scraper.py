@@ -0,0 +1,156 @@
+# http_scraper.py - 브라우저 없이 HTTP로 svlabo 페이지를 가져오는 경로
+import os
+import threading
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+import cancellation
+import metrics
+import scraper
+
+# --- 설정 ---
+HTTP_TIMEOUT = float(os.environ.get("SCRAPER_HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.environ.get("SCRAPER_HTTP_POOL_SIZE", "10"))
+USER_AGENT = "Mozilla/5.0 (compatible; SV-MetaAnalyzer)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class HttpFetchError(Exception):
+    """HTTP 경로만으로는 원하는 데이터를 얻을 수 없을 때 발생합니다. 호출 측은 Selenium으로 폴백합니다."""
+
+
+def get_session():
+    """커넥션 풀을 공유하는 requests 세션을 반환합니다."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "ja-JP,ja"})
+            _session = session
+    return _session
+
+
+def fetch_html(url, missing_ok=False):
+    """url의 HTML을 바이트로 반환합니다. 인코딩 판별은 BeautifulSoup에 맡깁니다.
+
+    missing_ok가 참이면 404일 때 예외 대신 None을 반환합니다.
+    """
+    try:
+        with metrics.timed("http_fetch"):
+            response = get_session().get(url, timeout=cancellation.timeout(HTTP_TIMEOUT))
+        if missing_ok and response.status_code == 404:
+            return None
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise HttpFetchError(f"{url} 요청 실패: {e}") from e
+    return response.content
+
+
+def fetch_soup(url):
+    html = fetch_html(url)
+    with metrics.timed("soup_parse"):
+        return BeautifulSoup(html, 'html.parser')
+
+
+def _has_deck_table(soup):
+    return soup.select_one(scraper.TABLE_HEADER_ID) is not None and soup.select_one(scraper.DECKLIST_BODY_ID) is not None
+
+
+def _deck_options(soup):
+    select = soup.find("select", id=scraper.DECK_SELECT_ID)
+    if select is None:
+        raise HttpFetchError("정적 HTML에 덱 선택 목록이 없습니다.")
+    options = select.find_all("option")
+    if not options:
+        raise HttpFetchError("덱 선택 목록이 비어 있습니다.")
+    return options
+
+
+def _is_default_option(option, options):
+    if option.has_attr("selected"):
+        return True
+    return option is options[0] and not any(o.has_attr("selected") for o in options)
+
+
+def get_post_page(page_url):
+    """scraper.get_post_page와 같은 (포스트 목록, 다음 페이지 URL)을 정적 HTML에서 가져옵니다."""
+    html = fetch_html(page_url, missing_ok=True)
+    if html is None:
+        return [], None
+    with metrics.timed("soup_parse"):
+        soup = BeautifulSoup(html, 'html.parser')
+    posts = scraper.post_links(((link.get_text(strip=True), link["href"]) for link in soup.find_all("a", href=True)), page_url)
+    next_link = soup.select_one("a.pager_next_link[href]")
+    next_url = urljoin(page_url, next_link["href"]) if next_link is not None else None
+    if not posts:
+        # 페이지는 있는데 포스트가 없다면 목록이 스크립트로 그려지는 경우이므로 Selenium으로 넘깁니다.
+        # 목록의 끝은 404로만 판단합니다.
+        raise HttpFetchError("정적 HTML에서 포스트를 찾지 못했습니다.")
+    return posts, next_url
+
+
+def get_deck_names(url):
+    soup = fetch_soup(url)
+    return [option.get_text(strip=True) for option in _deck_options(soup)]
+
+
+def deck_table_from_page(page_url, soup, deck_name):
+    """이미 받아 온 포스트 페이지에서 deck_name의 테이블이 담긴 soup을 찾습니다.
+
+    기본 선택된 덱은 페이지 자체에 테이블이 렌더링되어 있고,
+    option의 value가 주소 형태라면 해당 주소를 받아 테이블을 찾습니다.
+    """
+    options = _deck_options(soup)
+    option = next((o for o in options if o.get_text(strip=True) == deck_name), None)
+    if option is None:
+        raise HttpFetchError(f"'{deck_name}' 덱을 선택 목록에서 찾을 수 없습니다.")
+
+    if _is_default_option(option, options) and _has_deck_table(soup):
+        return soup
+
+    value = option.get("value", "")
+    if "/" in value or "?" in value:
+        deck_soup = fetch_soup(urljoin(page_url, value))
+        if _has_deck_table(deck_soup):
+            return deck_soup
+
+    raise HttpFetchError(f"'{deck_name}' 덱 테이블은 브라우저에서만 불러올 수 있습니다.")
+
+
+def scrape_card_data(url, deck_name):
+    """scraper.scrape_card_data와 같은 BeautifulSoup 객체를 HTTP만으로 만듭니다."""
+    soup = fetch_soup(url)
+    cancellation.report("page_loaded", url=url)
+    deck_soup = deck_table_from_page(url, soup, deck_name)
+    cancellation.report("deck_selected", deck_name=deck_name)
+    cancellation.report("table_loaded")
+    return deck_soup
+
+
+def scrape_card_html(url, deck_name):
+    """scrape_card_data의 덱 테이블(헤더와 본문)만 HTML 문자열로 반환합니다."""
+    deck_soup = scrape_card_data(url, deck_name)
+    return scraper.table_html(
+        deck_soup.select_one(scraper.TABLE_HEADER_ID), deck_soup.select_one(scraper.DECKLIST_BODY_ID)
+    )
+
+
+def scrape_all_decks(url):
+    """포스트 페이지를 한 번 받아 모든 덱의 테이블을 찾습니다. 하나라도 브라우저가 필요하면 실패합니다."""
+    soup = fetch_soup(url)
+    tables = {}
+    for option in _deck_options(soup):
+        deck_name = option.get_text(strip=True)
+        deck_soup = deck_table_from_page(url, soup, deck_name)
+        tables[deck_name] = scraper.table_html(
+            deck_soup.select_one(scraper.TABLE_HEADER_ID), deck_soup.select_one(scraper.DECKLIST_BODY_ID)
+        )
+    return tables
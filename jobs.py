@@ -0,0 +1,230 @@
+# jobs.py - 오래 걸리는 스크래핑/분석을 요청 스레드 밖에서 실행하는 작업 관리자
+#
+# 라우트는 작업을 제출하고 곧바로 202와 작업 ID를 돌려주며, 클라이언트는 /jobs/<id>를 폴링하거나
+# Server-Sent Events로 진행 단계를 받습니다. 작업마다 마감 시각과 취소 이벤트가 있고,
+# cancellation.scope를 통해 스크래핑 대기까지 전달됩니다.
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cancellation
+import metrics
+import scraper
+
+# --- 설정 (환경 변수로 조정 가능) ---
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", str(max(2, scraper.POOL_SIZE * 2))))
+JOB_DEADLINE = float(os.environ.get("JOB_DEADLINE", "120"))
+# 끝난 작업의 결과를 조회할 수 있도록 남겨 두는 시간(초)
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "600"))
+# SSE 연결이 끊겼는지 알아내려면 주기적으로 무언가를 써야 하므로, 이 간격(초)마다 주석 줄을 보냅니다.
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", "5"))
+
+job_seconds = metrics.Histogram("svmeta_job_seconds", "제출부터 종료까지 걸린 작업 시간(초, 상태별)", ("status",))
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED, TIMEOUT = "pending", "running", "done", "failed", "cancelled", "timeout"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+
+class Job:
+    """제출된 작업 하나의 상태. 같은 key의 작업이 진행 중이면 새로 만들지 않고 이 작업을 공유합니다."""
+
+    def __init__(self, key, deadline, keep_alive=True):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.deadline = time.monotonic() + deadline
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.future = None
+        # keep_alive가 거짓이면 마지막 스트림 구독자가 떠날 때 작업을 취소합니다.
+        self.keep_alive = keep_alive
+        self.subscribers = 0
+        self.events = []  # [(단계, 데이터), ...] 늦게 구독한 쪽도 처음부터 다시 받습니다.
+        self._changed = threading.Condition()
+        self._listeners = []
+
+    def emit(self, stage, data):
+        """진행 이벤트를 기록하고 기다리는 구독자들을 깨웁니다. 어느 스레드에서 불러도 됩니다."""
+        with self._changed:
+            self.events.append((stage, data))
+            listeners = list(self._listeners)
+            self._changed.notify_all()
+        for listener in listeners:
+            listener()
+
+    def add_listener(self, callback):
+        """이벤트가 생길 때마다 인자 없이 호출할 함수를 등록합니다(ASGI 쪽에서 이벤트 루프를 깨울 때 사용)."""
+        with self._changed:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._changed:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def wait_events(self, start, timeout):
+        """start번째 이후의 이벤트가 생길 때까지 최대 timeout초 기다려 새 이벤트 목록을 반환합니다."""
+        with self._changed:
+            if len(self.events) <= start:
+                self._changed.wait(timeout)
+            return self.events[start:]
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_result=True):
+        job = {"job_id": self.id, "status": self.status, "created_at": self.created_at}
+        if self.finished_at is not None:
+            job["finished_at"] = self.finished_at
+        if self.error is not None:
+            job["error"] = self.error
+        if include_result and self.status == DONE:
+            job["result"] = self.result
+        return job
+
+
+class JobManager:
+    """고정 크기 스레드 풀로 작업을 실행합니다. 대기 중인 클라이언트 수와 실행 스레드 수는 무관합니다."""
+
+    def __init__(self, workers=JOB_WORKERS, result_ttl=JOB_RESULT_TTL):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+        self.result_ttl = result_ttl
+
+    def _prune(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    def submit(self, key, func, deadline=JOB_DEADLINE, keep_alive=True):
+        """func를 작업으로 실행합니다. 같은 key의 작업이 아직 끝나지 않았으면 그 작업을 반환합니다.
+
+        keep_alive=False는 스트림 구독자가 모두 떠나면 취소해도 되는 작업이라는 뜻입니다.
+        폴링 클라이언트가 한 번이라도 같은 작업을 요청하면 끝까지 실행합니다.
+        """
+        with self._lock:
+            self._prune(time.time())
+            existing = self._by_key.get(key)
+            if existing is not None and not existing.finished:
+                existing.keep_alive = existing.keep_alive or keep_alive
+                return existing
+            job = Job(key, deadline, keep_alive)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            job.future = self._executor.submit(self._run, job, func)
+        return job
+
+    def _finish(self, job, status, result=None, error=None):
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.status = status
+        job.done.set()
+        job_seconds.observe(job.finished_at - job.created_at, status=status)
+        if status == DONE:
+            job.emit("result", {"result": result})
+        else:
+            job.emit("error", {"status": status, "error": error})
+
+    def _run(self, job, func):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED, error="작업이 취소되었습니다.")
+            return job
+        job.status = RUNNING
+        try:
+            with cancellation.scope(job.cancel_event, job.deadline, job.emit):
+                cancellation.check()
+                result = func()
+            self._finish(job, DONE, result=result)
+        except cancellation.JobCancelled as e:
+            self._finish(job, CANCELLED if job.cancel_event.is_set() else TIMEOUT, error=str(e))
+        except Exception as e:
+            print(f"작업 {job.id} 실패: {e}")
+            self._finish(job, FAILED, error="작업 처리 중 오류가 발생했습니다.")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """작업에 취소를 요청합니다. 실행 중인 작업은 다음 대기 지점에서 멈춥니다."""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+        return job
+
+    def subscribe(self, job):
+        with self._lock:
+            job.subscribers += 1
+
+    def unsubscribe(self, job):
+        """스트림 구독을 끝냅니다. 아무도 결과를 기다리지 않는 작업이면 취소해 브라우저 세션을 돌려받습니다."""
+        with self._lock:
+            job.subscribers -= 1
+            abandoned = job.subscribers <= 0 and not job.keep_alive and not job.finished
+        if abandoned:
+            job.cancel_event.set()
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+
+def format_sse(stage, data, event_id=None):
+    """이벤트 하나를 text/event-stream 형식의 문자열로 만듭니다."""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {stage}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(job, manager_=None, heartbeat=SSE_HEARTBEAT):
+    """job의 진행 이벤트를 SSE 문자열로 차례로 내보내는 제너레이터. 마지막 이벤트는 result 또는 error입니다.
+
+    클라이언트가 연결을 끊으면 WSGI 서버가 제너레이터를 닫으므로 finally에서 구독을 해제합니다.
+    """
+    manager_ = manager_ or manager
+    manager_.subscribe(job)
+    try:
+        yield format_sse("job", job.to_dict(include_result=False))
+        sent = 0
+        while True:
+            events = job.wait_events(sent, heartbeat)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for stage, data in events:
+                yield format_sse(stage, data, sent)
+                sent += 1
+                if stage in ("result", "error"):
+                    return
+    finally:
+        manager_.unsubscribe(job)
+
+
+manager = JobManager()
+
+
+def _collect_metrics():
+    counts = manager.stats()
+    return [("svmeta_jobs", "보관 중인 작업 수 (상태별)", ("status",), {(status,): count for status, count in counts.items()})]
+
+
+metrics.register_collector(_collect_metrics)
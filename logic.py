@@ -1,18 +1,39 @@
 import math
 import json
+import os
 from datetime import datetime
 import numpy as np
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 
 # logic.py - 데이터 처리 및 비즈니스 로직
+import bootstrap
+import cancellation
+import card_index
+import metrics
+import post_index
 import scraper
+import snapshot_store
+from table_parser import DeckTable, parse_deck_table
 
 # --- Constants ---
 DECK_SIZE = 40
 
-# --- 전역 변수 대신 사용할 데이터 컨테이너 ---
-card_database = {}
-card_id_by_normalized_name = {}
+# --- 통합 분석 설정 (환경 변수로 조정 가능) ---
+AGGREGATE_POST_LIMIT = int(os.environ.get("AGGREGATE_POST_LIMIT", "10"))
+AGGREGATE_CONCURRENCY = int(os.environ.get("AGGREGATE_CONCURRENCY", "4"))
+
+# --- 표본 가중치 설정 (환경 변수로 조정 가능) ---
+# 날짜 가중치는 half_life_days일 전에 절반, 그 두 배가 지나면 MIN_DATE_WEIGHT가 되는 선형 감소입니다.
+HALF_LIFE_DAYS = float(os.environ.get("WEIGHT_HALF_LIFE_DAYS", "3"))
+MIN_DATE_WEIGHT = 0.1
+# 레이팅 가중치는 RATING_PIVOT을 넘는 100점마다 RATING_SLOPE만큼 커집니다.
+RATING_PIVOT = float(os.environ.get("WEIGHT_RATING_PIVOT", "1600"))
+RATING_SLOPE = float(os.environ.get("WEIGHT_RATING_SLOPE", "0.1"))
+
+# 스트리밍 분석에서 카드별 통계를 한 이벤트에 몇 행씩 보낼지
+PROGRESS_ROWS = 10
 
 # --- Deck Code Utilities ---
 custom_char_to_binary_map = {str(i): i for i in range(10)}
@@ -34,24 +55,30 @@ def int_to_custom_base64(value_24bit):
         chars.append(reverse_custom_map[six_bit_value])
     return "".join(chars)
 
-def normalize_card_name(name):
-    return name.replace(" ", "").replace("　", "")
+def custom_base64_to_int(code):
+    if len(code) != 4 or any(char not in custom_char_to_binary_map for char in code):
+        raise ValueError(f"'{code}'는 올바른 카드 코드가 아닙니다.")
+    value = 0
+    for char in code:
+        value = (value << 6) | custom_char_to_binary_map[char]
+    return value
+
+DECK_SHARE_URL = "https://shadowverse-wb.com/web/Deck/share?hash={hash}&lang=ko"
+DECK_CODE_VERSION = "2"
+
+def deck_share_url(hashes, class_id):
+    """카드 코드 목록과 클래스 ID로 덱 공유 URL을 만듭니다."""
+    return DECK_SHARE_URL.format(hash=".".join([DECK_CODE_VERSION, str(class_id)] + list(hashes)))
 
 def load_card_database():
-    """카드 데이터베이스를 로드하고 전역 변수를 채웁니다."""
-    global card_database, card_id_by_normalized_name
+    """카드 인덱스를 엽니다. card_database.json이 인덱스 파일보다 새로우면 먼저 컴파일합니다."""
     try:
-        with open("card_database.json", "r", encoding="utf-8") as f:
-            card_database = json.load(f)
-        card_id_by_normalized_name = {
-            normalize_card_name(name): card_id
-            for name, card_id in card_database.items()
-        }
-        print(f"성공: {len(card_database)}개의 카드 정보를 로드하고 정규화했습니다.")
+        index = card_index.load()
+        print(f"성공: {len(index)}개의 카드 정보를 로드했습니다.")
     except FileNotFoundError:
         print("경고: card_database.json 파일을 찾을 수 없습니다.")
-    except json.JSONDecodeError:
-        print("경고: card_database.json 파일 파싱에 실패했습니다.")
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"경고: 카드 데이터베이스를 읽지 못했습니다: {e}")
 
 # --- Data Analysis ---
 class Card:
@@ -69,199 +96,791 @@ class Card:
     def to_dict(self):
         return {
             "name": self.name,
-            "average": f"{self.weighted_average:.2f}",
-            "variance": f"{self.variance:.2f}",
-            "std_dev": f"{self.std_dev:.2f}",
-            "rounded_average": f"{self.rounded_average}",
-            "delta": f"{self.delta:.2f}",
-            "adjusted_count": f"{self.adjusted_count}",
-            "removability_score": f"{self.removability_score:.4f}" if self.removability_score != np.inf else "INF",
-            "addability_score": f"{self.addability_score:.4f}" if self.addability_score != np.inf else "INF"
+            "average": self.weighted_average,
+            "variance": self.variance,
+            "std_dev": self.std_dev,
+            "rounded_average": self.rounded_average,
+            "delta": self.delta,
+            "adjusted_count": self.adjusted_count,
+            "removability_score": json_score(self.removability_score),
+            "addability_score": json_score(self.addability_score)
         }
 
-def calculate_initial_analysis(soup):
-    table_head = soup.select_one(scraper.TABLE_HEADER_ID)
-    if not table_head:
-        return []
-
-    num_samples = 0
-    rating_values = []
-    header_rows = table_head.find_all("tr")
-
-    if header_rows:
-        rate_header = header_rows[0].find("th", string=lambda t: t and 'レート' in t)
-        if rate_header and rate_header.has_attr('colspan'):
+def json_score(score):
+    """JSON에는 무한대가 없으므로 벌점이 0이라 무한대가 된 점수는 None(null)으로 보냅니다."""
+    return None if score == np.inf else score
+
+class CardTable:
+    """카드별 통계를 NumPy 배열로 보관하는 분석 결과.
+
+    각 배열의 i번째 값이 names[i] 카드의 값이며, Card 객체는 to_cards()를 호출할 때만 만들어집니다.
+    """
+
+    def __init__(self, names, weighted_average, variance):
+        self.names = list(names)
+        self.weighted_average = np.asarray(weighted_average, dtype=np.float64)
+        self.variance = np.asarray(variance, dtype=np.float64)
+        self.std_dev = np.sqrt(self.variance)
+        self.rounded_average = np.round(self.weighted_average).astype(np.int64)
+        self.delta = self.weighted_average - self.rounded_average
+        self.adjusted_count = self.rounded_average.copy()
+        self.removability_score = np.zeros(len(self.names))
+        self.addability_score = np.zeros(len(self.names))
+        # 표본 하나하나에서 계산한 경우의 (매수 행렬, 표본 가중치). 신뢰 구간 재추출에 씁니다.
+        self.samples = None
+        self.bootstrap = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def to_cards(self):
+        """현재 배열 값으로 Card 객체 목록을 만듭니다."""
+        cards = []
+        for i, name in enumerate(self.names):
+            card = Card(name, float(self.weighted_average[i]), float(self.variance[i]))
+            card.adjusted_count = int(self.adjusted_count[i])
+            card.removability_score = float(self.removability_score[i])
+            card.addability_score = float(self.addability_score[i])
+            cards.append(card)
+        return cards
+
+    def to_dicts(self):
+        """Card.to_dict()와 같은 형식의 목록을 Card 객체 없이 만듭니다. 재추출 결과가 있으면 함께 담습니다."""
+        columns = zip(
+            self.names, self.weighted_average.tolist(), self.variance.tolist(), self.std_dev.tolist(),
+            self.rounded_average.tolist(), self.delta.tolist(), self.adjusted_count.tolist(),
+            self.removability_score.tolist(), self.addability_score.tolist(),
+        )
+        rows = [
+            {
+                "name": name,
+                "average": average,
+                "variance": variance,
+                "std_dev": std_dev,
+                "rounded_average": rounded,
+                "delta": delta,
+                "adjusted_count": adjusted,
+                "removability_score": json_score(removability),
+                "addability_score": json_score(addability)
+            }
+            for name, average, variance, std_dev, rounded, delta, adjusted, removability, addability in columns
+        ]
+        if self.bootstrap is not None:
+            result = self.bootstrap
+            columns = zip(
+                rows, zip(*(bound.tolist() for bound in result.average_ci)), zip(*(bound.tolist() for bound in result.count_ci)),
+                result.modal_count.tolist(), result.count_stability.tolist(),
+            )
+            for row, average_ci, count_ci, modal_count, stability in columns:
+                row["average_ci"] = list(average_ci)
+                row["count_ci"] = list(count_ci)
+                row["modal_count"] = modal_count
+                row["count_stability"] = stability
+        return rows
+
+def sample_days_ago(date_str, today):
+    """'使用日' 셀의 "월/일" 문자열이 today로부터 며칠 전인지 계산합니다. 형식이 맞지 않으면 ValueError."""
+    date_obj = datetime.strptime(date_str, "%m/%d").replace(year=today.year)
+    if date_obj > today: date_obj = date_obj.replace(year=today.year - 1)
+    return (today - date_obj).days
+
+def sample_features(table, today=None):
+    """표본별 (며칠 전, 레이팅) 배열. 날짜나 레이팅을 읽을 수 없는 표본은 nan입니다."""
+    days_ago = np.full(table.num_samples, np.nan)
+    ratings = np.full(table.num_samples, np.nan)
+    if table.date_values:
+        today = today or datetime.now()
+        for i, date_str in enumerate(table.date_values[:table.num_samples]):
             try:
-                num_samples = int(rate_header['colspan'])
-                if len(header_rows) > 1:
-                    rating_headers = header_rows[1].find_all("th")
-                    rating_values = [th.text.strip() for th in rating_headers[:-4]]
-            except (ValueError, IndexError):
-                num_samples = 0
-
-        if num_samples == 0:
-            streak_header = header_rows[0].find("th", string=lambda t: t and '連勝数' in t)
-            if streak_header and streak_header.has_attr('colspan'):
-                try:
-                    num_samples = int(streak_header['colspan'])
-                except (ValueError, IndexError):
-                    num_samples = 0
-
-        if num_samples == 0:
-            generic_header = header_rows[0].find("th", string=lambda t: t and '採用枚数' in t)
-            if generic_header and generic_header.has_attr('colspan'):
-                try:
-                    num_samples = int(generic_header['colspan'])
-                except (ValueError, IndexError):
-                    return []
-
-    if num_samples == 0: return []
-
-    table_body = soup.select_one(scraper.DECKLIST_BODY_ID)
-    if not table_body: return []
-    all_rows = table_body.find_all("tr")
-    date_values = []
-    card_rows = []
-    for row in all_rows:
-        first_cell = row.find(['th', 'td'])
-        if not first_cell: continue
-        
-        if '使用日' in first_cell.text:
-            date_values = [cell.text.strip() for cell in row.find_all('td')[:num_samples]]
-        elif row.find("div", class_="name_backimg2"):
-            card_rows.append(row)
-
-    if not card_rows: return []
-
-    final_weights = [1.0] * num_samples
-    if date_values:
-        today = datetime.now()
-        half_life_days = 3.0
-        for i, date_str in enumerate(date_values):
+                days_ago[i] = sample_days_ago(date_str, today)
+            except ValueError:
+                continue
+    for i, rating_str in enumerate(table.rating_values[:table.num_samples]):
+        try:
+            ratings[i] = int(rating_str)
+        except ValueError:
+            continue
+    return days_ago, ratings
+
+@metrics.timed("weighting")
+def calculate_weights(table, today=None, half_life_days=HALF_LIFE_DAYS, rating_pivot=RATING_PIVOT,
+                      rating_slope=RATING_SLOPE):
+    """날짜(최근일수록)와 레이팅(높을수록)을 조합한 표본별 가중치를 계산합니다."""
+    final_weights = [1.0] * table.num_samples
+    if table.date_values:
+        today = today or datetime.now()
+        for i, date_str in enumerate(table.date_values):
             if i < len(final_weights):
                 try:
-                    date_obj = datetime.strptime(date_str, "%m/%d").replace(year=today.year)
-                    if date_obj > today: date_obj = date_obj.replace(year=today.year - 1)
-                    days_ago = (today - date_obj).days
-                    final_weights[i] *= max(0.1, 1.0 - (days_ago / (half_life_days * 2)))
+                    days_ago = sample_days_ago(date_str, today)
+                    final_weights[i] *= max(MIN_DATE_WEIGHT, 1.0 - (days_ago / (half_life_days * 2)))
                 except ValueError:
                     continue
-    if rating_values:
-        for i, rating_str in enumerate(rating_values):
+    if table.rating_values:
+        for i, rating_str in enumerate(table.rating_values):
             if i < len(final_weights):
                 try:
                     rating = int(rating_str)
-                    final_weights[i] *= (1.0 + max(0, (rating - 1600) / 100.0 * 0.1))
+                    final_weights[i] *= (1.0 + max(0, (rating - rating_pivot) / 100.0 * rating_slope))
                 except ValueError:
                     continue
-
-    total_weight = sum(final_weights)
-    if total_weight == 0: total_weight = 1
-
-    cards = []
-    for row in card_rows:
-        cells_in_row = row.find_all("td")
-        card_name_text = row.find("div", class_="name_backimg2").text.strip()
-        
-        numbers_str_list = [cell.text for cell in cells_in_row[1:1+num_samples]]
-        try:
-            numbers_int_list = [int(s) for s in numbers_str_list]
-        except ValueError:
-            continue
-
-        if len(numbers_int_list) != len(final_weights): continue
-
-        numerator = sum(count * weight for count, weight in zip(numbers_int_list, final_weights))
-        
-        weighted_average = numerator / total_weight
-        weighted_variance = sum(w * ((x - weighted_average) ** 2) for x, w in zip(numbers_int_list, final_weights)) / total_weight
-        
-        cards.append(Card(card_name_text, weighted_average, weighted_variance))
+    return final_weights
+
+@metrics.timed("card_stats")
+def _weighted_moments(counts, weights):
+    """(카드 수 × 표본 수) 매수 행렬의 (가중치 합, 카드별 가중 평균, 평균과의 편차 제곱의 가중 합).
+
+    표본(열) 순서대로 누적하면 카드별 순차 합과 부동소수점 결과가 같아져,
+    반올림 경계(x.5)에 놓인 카드의 추천 매수가 이전 계산과 달라지지 않습니다.
+    """
+    total_weight = sum(weights)
+    numerator = np.zeros(len(counts))
+    for j, weight in enumerate(weights):
+        numerator += counts[:, j] * weight
+    weighted_average = numerator / (total_weight or 1)
+
+    squared_deviations = (counts - weighted_average[:, None]) ** 2
+    weighted_squares = np.zeros(len(counts))
+    for j, weight in enumerate(weights):
+        weighted_squares += weight * squared_deviations[:, j]
+    return total_weight, weighted_average, weighted_squares
+
+def calculate_card_stats(table, today=None, **weight_params):
+    """DeckTable의 카드별 가중 평균과 가중 분산을 모든 카드에 대해 한꺼번에 계산해 CardTable을 만듭니다.
+
+    weight_params(half_life_days, rating_pivot, rating_slope)는 calculate_weights로 전달됩니다.
+    """
+    final_weights = calculate_weights(table, today, **weight_params)
+    total_weight, weighted_average, weighted_squares = _weighted_moments(table.counts.astype(np.float64), final_weights)
+    weighted_variance = weighted_squares / (total_weight or 1)
+    cards = CardTable(table.card_names, weighted_average, weighted_variance)
+    cards.samples = (table.counts, final_weights)
     return cards
 
-def adjust_deck_count(cards):
-    v_avg = np.array([card.weighted_average for card in cards])
-    v_std_dev = np.array([card.std_dev for card in cards])
-    v_current = np.array([card.rounded_average for card in cards])
-
-    cards_to_adjust = sum(v_current) - DECK_SIZE
+def calculate_initial_analysis(soup, today=None):
+    """덱 테이블 soup(또는 HTML)에서 카드별 통계를 계산해 Card 객체 목록을 반환합니다. 테이블이 없으면 빈 목록."""
+    table = parse_deck_table(soup)
+    if table is None:
+        return []
+    return calculate_card_stats(table, today).to_cards()
+
+def _card_arrays(cards):
+    """CardTable 또는 Card 목록에서 (평균, 표준편차, 반올림 평균, 현재 매수) 배열을 꺼냅니다."""
+    if isinstance(cards, CardTable):
+        return cards.weighted_average, cards.std_dev, cards.rounded_average, cards.adjusted_count
+    return (
+        np.array([card.weighted_average for card in cards]),
+        np.array([card.std_dev for card in cards]),
+        np.array([card.rounded_average for card in cards]),
+        np.array([card.adjusted_count for card in cards]),
+    )
+
+def _penalty_terms(v_counts, v_avg, v_scale):
+    """카드별 카이제곱 벌점 항. 전체 벌점은 이 항들의 합입니다."""
+    return ((v_counts - v_avg) / v_scale) ** 2
+
+adjust_steps = metrics.Counter("svmeta_adjust_steps_total", "40장 조정에서 한 장씩 옮긴 횟수")
+
+def greedy_deck_count(v_avg, v_std_dev, v_start):
+    """v_start에서 시작해 매 단계 벌점이 가장 작게 늘어나는 카드를 한 장씩 조정해 40장을 맞춥니다.
+
+    카드 하나를 바꾸면 전체 벌점은 그 카드의 항만큼만 변하므로, 모든 후보의 벌점 변화량을
+    한 번의 벡터 연산으로 구합니다. 최솟값과 부동소수점 오차 범위 안에 있는 후보만
+    이전 방식대로 전체 벌점을 다시 계산해 비교하므로, 선택 결과는 전체 재계산 방식과 같습니다.
+    """
     epsilon = 1e-6
+    v_scale = v_std_dev + epsilon
+    v_current = np.array(v_start, copy=True)
+    current_terms = _penalty_terms(v_current, v_avg, v_scale)
+    cards_to_adjust = int(v_current.sum()) - DECK_SIZE
+    steps = 0
 
     while cards_to_adjust != 0:
-        best_card_index = -1
-        min_penalty = np.inf
         adjustment = -1 if cards_to_adjust > 0 else 1
+        movable = v_current > 0 if adjustment == -1 else v_current < 3
+        if not movable.any():
+            break
+
+        new_terms = _penalty_terms(v_current + adjustment, v_avg, v_scale)
+        penalty_deltas = np.where(movable, new_terms - current_terms, np.inf)
+        min_delta = penalty_deltas.min()
+        tolerance = 1e-10 * (current_terms.sum() + abs(min_delta) + 1.0)
+        near_ties = np.flatnonzero(penalty_deltas <= min_delta + tolerance)
 
-        for i, card in enumerate(cards):
-            if (adjustment == -1 and v_current[i] > 0) or (adjustment == 1 and v_current[i] < 3):
+        best_card_index = near_ties[0]
+        if len(near_ties) > 1:
+            min_penalty = np.inf
+            for i in near_ties:
                 v_temp = v_current.copy()
                 v_temp[i] += adjustment
-                v_temp_delta = v_temp - v_avg
-                penalty = np.sum(((v_temp_delta / (v_std_dev + epsilon)) ** 2))
-
+                penalty = np.sum(_penalty_terms(v_temp, v_avg, v_scale))
                 if penalty < min_penalty:
                     min_penalty = penalty
                     best_card_index = i
 
-        if best_card_index != -1:
-            v_current[best_card_index] += adjustment
-            cards[best_card_index].adjusted_count += adjustment
-            cards_to_adjust += adjustment
-        else:
-            break
+        v_current[best_card_index] += adjustment
+        current_terms[best_card_index] = new_terms[best_card_index]
+        cards_to_adjust += adjustment
+        steps += 1
+
+    adjust_steps.inc(steps)
+    return v_current
+
+def greedy_deck_count_batch(averages, std_devs):
+    """(평균, 표준편차) 행마다 반올림 평균에서 출발해 greedy_deck_count와 같은 규칙으로 40장을 맞춥니다.
 
+    가중치 격자점이나 재표본처럼 여러 행을 함께 한 장씩 옮기며, 40장에 도달했거나 더 옮길 카드가 없는 행은 멈춥니다.
+    부동소수점 오차 범위 안에 동점 후보가 여럿인 행은 greedy_deck_count처럼 그 행의 전체 벌점을 다시 계산해
+    고르므로, 각 행의 결과는 같은 평균과 표준편차로 greedy_deck_count를 부른 결과와 같습니다.
+    """
+    epsilon = 1e-6
+    scale = std_devs + epsilon
+    counts = np.round(averages).astype(np.int64)
+    terms = _penalty_terms(counts, averages, scale)
+    remaining = counts.sum(axis=1) - DECK_SIZE
+    while True:
+        active = np.flatnonzero(remaining != 0)
+        if not len(active):
+            break
+        adjustment = np.where(remaining[active] > 0, -1, 1)[:, None]
+        current = counts[active]
+        movable = np.where(adjustment < 0, current > 0, current < 3)
+        current_terms = terms[active]
+        new_terms = _penalty_terms(current + adjustment, averages[active], scale[active])
+        deltas = np.where(movable, new_terms - current_terms, np.inf)
+        min_deltas = deltas.min(axis=1, keepdims=True)
+        tolerance = 1e-10 * (current_terms.sum(axis=1, keepdims=True) + np.abs(min_deltas) + 1.0)
+        near_ties = deltas <= min_deltas + tolerance
+        best = near_ties.argmax(axis=1)
+        stuck = ~movable[np.arange(len(active)), best]
+        remaining[active[stuck]] = 0
+        tied = np.flatnonzero(~stuck & (near_ties.sum(axis=1) > 1))
+        if len(tied):
+            # 후보마다 그 카드 항만 바꾼 벌점 항 행을 만들어 합을 구합니다. 나머지 항은 전체 재계산 값과 같으므로
+            # 합도 greedy_deck_count의 재계산 벌점과 같고, argmin은 그처럼 가장 앞쪽의 최솟값을 고릅니다.
+            rows, candidates = np.nonzero(near_ties[tied])
+            rows = tied[rows]
+            candidate_terms = current_terms[rows]
+            candidate_terms[np.arange(len(rows)), candidates] = new_terms[rows, candidates]
+            penalties = np.full(near_ties.shape, np.inf)
+            penalties[rows, candidates] = candidate_terms.sum(axis=1)
+            best[tied] = penalties[tied].argmin(axis=1)
+
+        moved, best, adjustment = active[~stuck], best[~stuck], adjustment[~stuck, 0]
+        counts[moved, best] += adjustment
+        terms[moved, best] = new_terms[~stuck][np.arange(len(moved)), best]
+        remaining[moved] += adjustment
+    return counts
+
+def solve_deck_count_exact(v_avg, v_std_dev, max_copies=3):
+    """카드별 0~max_copies장 제한 아래 총 벌점이 최소인 40장 구성을 동적 계획법으로 구합니다.
+
+    카드 수가 적어 40장을 채울 수 없으면 가능한 최대 매수로 맞춥니다.
+    """
+    epsilon = 1e-6
+    v_scale = v_std_dev + epsilon
+    num_cards = len(v_avg)
+    target = min(DECK_SIZE, max_copies * num_cards)
+    copies = np.arange(max_copies + 1)
+    # costs[i, v]: i번째 카드를 v장 넣을 때의 벌점
+    costs = ((copies[None, :] - v_avg[:, None]) / v_scale[:, None]) ** 2
+
+    best = np.full(target + 1, np.inf)
+    best[0] = 0.0
+    choices = np.zeros((num_cards, target + 1), dtype=np.int8)
+    for i in range(num_cards):
+        candidates = np.full((max_copies + 1, target + 1), np.inf)
+        for v in copies:
+            candidates[v, v:] = best[:target + 1 - v] + costs[i, v]
+        choices[i] = np.argmin(candidates, axis=0)
+        best = candidates[choices[i], np.arange(target + 1)]
+
+    v_result = np.zeros(num_cards, dtype=np.int64)
+    remaining = target
+    for i in range(num_cards - 1, -1, -1):
+        v_result[i] = choices[i, remaining]
+        remaining -= v_result[i]
+    return v_result
+
+@metrics.timed("adjust_deck_count")
+def adjust_deck_count(cards, exact=False):
+    """카드별 매수를 조정해 덱을 40장으로 맞춥니다.
+
+    기본값은 반올림 평균에서 출발하는 탐욕적 조정이고, exact=True이면
+    solve_deck_count_exact로 전역 최적 구성을 구합니다.
+    """
+    v_avg, v_std_dev, v_rounded, _ = _card_arrays(cards)
+    if exact:
+        v_current = solve_deck_count_exact(v_avg, v_std_dev)
+    else:
+        v_current = greedy_deck_count(v_avg, v_std_dev, v_rounded)
+
+    adjustments = v_current - v_rounded
+    if isinstance(cards, CardTable):
+        cards.adjusted_count += adjustments
+    else:
+        for card, adjustment in zip(cards, adjustments.tolist()):
+            card.adjusted_count += adjustment
+
+# replacement_scores가 한 번에 만드는 벌점 항 행 수
+REPLACEMENT_BLOCK = 64
+
+def replacement_scores(v_avg, v_std_dev, v_final):
+    """각 카드를 한 장 빼거나 더했을 때의 1/벌점을 모든 카드에 대해 한 번에 계산합니다.
+
+    후보마다 그 카드의 항만 바꾼 벌점 항 행을 만들어 행별로 합하므로, 후보마다 전체 벌점을
+    np.sum으로 다시 계산하던 방식과 비트 단위까지 같은 값이 나옵니다. 행은 뺄 수 있거나 더할 수 있는
+    카드에 대해서만, REPLACEMENT_BLOCK개씩 만들어 메모리를 카드 수에 비례하게 유지합니다.
+    (제거 점수, 추가 점수) 배열을 반환하며, 뺄 수 없거나 더할 수 없는 카드는 nan입니다.
+    """
+    epsilon = 1e-6
+    v_scale = v_std_dev + epsilon
+    current_terms = _penalty_terms(v_final, v_avg, v_scale)
+
+    def scores(adjustment, allowed):
+        result = np.full(len(v_final), np.nan)
+        new_terms = _penalty_terms(v_final + adjustment, v_avg, v_scale)
+        candidates = np.flatnonzero(allowed)
+        for start in range(0, len(candidates), REPLACEMENT_BLOCK):
+            block = candidates[start:start + REPLACEMENT_BLOCK]
+            terms = np.tile(current_terms, (len(block), 1))
+            terms[np.arange(len(block)), block] = new_terms[block]
+            penalties = terms.sum(axis=1)
+            with np.errstate(divide='ignore'):
+                result[block] = np.where(penalties != 0, 1 / penalties, np.inf)
+        return result
+
+    return scores(-1, v_final > 0), scores(1, v_final < 3)
+
+@metrics.timed("replacement_candidates")
 def select_replacement_candidates(cards):
-    v_avg = np.array([card.weighted_average for card in cards])
-    v_std_dev = np.array([card.std_dev for card in cards])
-    v_final = np.array([card.adjusted_count for card in cards])
+    v_avg, v_std_dev, _, v_final = _card_arrays(cards)
+    removability, addability = replacement_scores(v_avg, v_std_dev, v_final)
+    removable = np.flatnonzero(~np.isnan(removability))
+    addable = np.flatnonzero(~np.isnan(addability))
+    _store_scores(
+        cards,
+        dict(zip(removable.tolist(), removability[removable].tolist())),
+        dict(zip(addable.tolist(), addability[addable].tolist())),
+    )
+
+def apply_deck_edits(v_avg, v_std_dev, v_counts, edits):
+    """사용자의 +/- 편집을 차례로 적용하고, 덱이 40장으로 유지되도록 다른 카드 한 장을 반대로 조정합니다.
+
+    edits는 (카드 인덱스, +1 또는 -1) 목록입니다. 짝이 될 카드는 한 장 조정했을 때
+    벌점 증가가 가장 작은 카드이며, 모든 후보의 증가량을 한 번의 벡터 연산으로 구합니다.
+    조정된 매수 배열과 (제거 점수, 추가 점수) 배열을 반환합니다.
+    """
     epsilon = 1e-6
+    v_scale = v_std_dev + epsilon
+    v_counts = np.array(v_counts, dtype=np.int64, copy=True)
 
-    for i, card in enumerate(cards):
-        if card.adjusted_count > 0:
-            v_temp = v_final.copy()
-            v_temp[i] -= 1
-            penalty = np.sum((((v_temp - v_avg) / (v_std_dev + epsilon)) ** 2))
-            card.removability_score = 1 / penalty if penalty != 0 else np.inf
-
-        if card.adjusted_count < 3:
-            v_temp = v_final.copy()
-            v_temp[i] += 1
-            penalty = np.sum((((v_temp - v_avg) / (v_std_dev + epsilon)) ** 2))
-            card.addability_score = 1 / penalty if penalty != 0 else np.inf
-
-def analyze_live_data(url, deck_name):
-    soup = scraper.scrape_card_data(url, deck_name)
-    cards = calculate_initial_analysis(soup)
-    if not cards: return []
-    
-    round_sum = sum(card.rounded_average for card in cards)
+    for target, adjustment in edits:
+        if not 0 <= target < len(v_counts):
+            raise ValueError(f"카드 인덱스 {target}가 범위를 벗어났습니다.")
+        if (adjustment == 1 and v_counts[target] >= 3) or (adjustment == -1 and v_counts[target] <= 0):
+            continue
+        # 대상 카드와 반대 방향으로 한 장을 조정할 수 있는 카드들
+        counter = -adjustment
+        movable = v_counts > 0 if counter == -1 else v_counts < 3
+        movable[target] = False
+        if not movable.any():
+            continue
+        penalty_deltas = _penalty_terms(v_counts + counter, v_avg, v_scale) - _penalty_terms(v_counts, v_avg, v_scale)
+        partner = int(np.argmin(np.where(movable, penalty_deltas, np.inf)))
+        v_counts[target] += adjustment
+        v_counts[partner] += counter
+
+    removability, addability = replacement_scores(v_avg, v_std_dev, v_counts)
+    return v_counts, removability, addability
+
+EDIT_ACTIONS = {"increase": 1, "decrease": -1}
+
+def rebalance_deck(averages, std_devs, counts, edits):
+    """/adjust_deck 요청 값으로 apply_deck_edits를 실행하고 응답용 dict를 만듭니다.
+
+    edits는 {"index": 카드 인덱스, "action": "increase" 또는 "decrease"} 목록입니다.
+    조정할 수 없는 방향의 점수는 분석 결과(CardTable)와 같이 0, 벌점이 0이라 무한대인 점수는 None입니다.
+    """
+    v_avg = np.asarray(averages, dtype=np.float64)
+    v_std_dev = np.asarray(std_devs, dtype=np.float64)
+    v_counts = np.asarray(counts, dtype=np.int64)
+    if not (len(v_avg) == len(v_std_dev) == len(v_counts)):
+        raise ValueError("average, std_dev, counts의 길이가 같아야 합니다.")
+    try:
+        parsed_edits = [(int(edit["index"]), EDIT_ACTIONS[edit["action"]]) for edit in edits]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("edits 형식이 올바르지 않습니다.")
+
+    new_counts, removability, addability = apply_deck_edits(v_avg, v_std_dev, v_counts, parsed_edits)
+
+    def score_list(scores):
+        return [0 if np.isnan(score) else json_score(score) for score in scores.tolist()]
+
+    changed = np.flatnonzero(new_counts != v_counts)
+    return {
+        "counts": new_counts.tolist(),
+        "changes": [{"index": int(i), "adjusted_count": int(new_counts[i])} for i in changed],
+        "removability_score": score_list(removability),
+        "addability_score": score_list(addability),
+    }
+
+def _store_scores(cards, removability, addability):
+    """{카드 인덱스: 점수} 형태로 계산된 점수를 CardTable 배열이나 Card 속성에 기록합니다."""
+    if isinstance(cards, CardTable):
+        for i, score in removability.items():
+            cards.removability_score[i] = score
+        for i, score in addability.items():
+            cards.addability_score[i] = score
+    else:
+        for i, score in removability.items():
+            cards[i].removability_score = score
+        for i, score in addability.items():
+            cards[i].addability_score = score
+
+def analyze_live_data(url, deck_name, driver=None, source="live"):
+    """덱 분석 결과를 반환합니다.
+
+    source="live"는 svlabo를 스크래핑하고 결과 테이블을 스냅샷 저장소에 남기며,
+    source="snapshot"은 네트워크 없이 저장된 최신 스냅샷을 수집 시점 기준으로 다시 분석합니다.
+    """
+    if source == "snapshot":
+        snapshot = snapshot_store.store.latest(url, deck_name) if snapshot_store.store else None
+        if snapshot is None: return []
+        return analyze_table(snapshot.table, today=snapshot.fetched_datetime)
+
+    table = parse_deck_table(scraper.scrape_card_html(url, deck_name, driver=driver))
+    save_snapshot(url, deck_name, table)
+    if table is None: return []
+    cancellation.report("table_parsed", cards=len(table.card_names), samples=table.num_samples)
+    cards = calculate_card_stats(table)
+    _report_card_stats(cards)
+    return analyze_card_table(cards)
+
+def load_deck_table(url, deck_name, driver=None):
+    """(DeckTable, 가중치 기준 시각)을 반환합니다. 테이블이 없으면 (None, None).
+
+    저장된 스냅샷이 있으면 네트워크 없이 그 테이블과 수집 시각을 쓰고, 없으면 스크래핑해 저장합니다.
+    """
+    snapshot = snapshot_store.store.latest(url, deck_name) if snapshot_store.store else None
+    if snapshot is not None:
+        return snapshot.table, snapshot.fetched_datetime
+    table = parse_deck_table(scraper.scrape_card_html(url, deck_name, driver=driver))
+    save_snapshot(url, deck_name, table)
+    return (table, datetime.now()) if table is not None else (None, None)
+
+def _report_card_stats(cards):
+    """40장 조정 전의 카드별 통계를 PROGRESS_ROWS행씩 진행 이벤트로 보냅니다."""
+    if not cancellation.reporting():
+        return
+    for start in range(0, len(cards), PROGRESS_ROWS):
+        end = min(start + PROGRESS_ROWS, len(cards))
+        cancellation.report("card_stats", start=start, total=len(cards), rows=[
+            {"name": name, "average": average, "std_dev": std_dev, "rounded_average": rounded}
+            for name, average, std_dev, rounded in zip(
+                cards.names[start:end], cards.weighted_average[start:end].tolist(),
+                cards.std_dev[start:end].tolist(), cards.rounded_average[start:end].tolist(),
+            )
+        ])
+
+def analyze_post(url, driver=None):
+    """포스트의 모든 덱 타입을 한 번의 페이지 로드로 분석해 {덱 이름: 분석 결과}를 반환합니다."""
+    tables = scraper.scrape_all_decks(url, driver=driver)
+    results = {}
+    for deck_name, soup in tables.items():
+        table = parse_deck_table(soup)
+        save_snapshot(url, deck_name, table)
+        analysis_results = analyze_table(table)
+        if analysis_results:
+            results[deck_name] = analysis_results
+    return results
+
+def replay_snapshots(post_urls=None, deck_name=None):
+    """저장된 스냅샷을 네트워크 없이 일괄 재분석합니다. (포스트 URL, 덱 이름, 수집 시각, 분석 결과)를 차례로 돌려줍니다."""
+    if snapshot_store.store is None:
+        return
+    for snapshot in snapshot_store.store.iter_snapshots(post_urls=post_urls, deck_name=deck_name):
+        yield snapshot.post_url, snapshot.deck_name, snapshot.fetched_at, analyze_table(snapshot.table, today=snapshot.fetched_datetime)
+
+def save_snapshot(url, deck_name, table):
+    """스냅샷 저장소가 켜져 있으면 테이블을 저장합니다. 저장 실패는 분석을 막지 않습니다."""
+    if table is None or snapshot_store.store is None:
+        return
+    try:
+        snapshot_store.store.save(url, deck_name, table)
+    except Exception as e:
+        print(f"스냅샷 저장 실패 ({deck_name}): {e}")
+
+def analyze_soup(soup):
+    """스크래핑된 덱 테이블(HTML 문자열 또는 BeautifulSoup) 하나를 분석해 카드별 결과 목록을 만듭니다."""
+    return analyze_table(parse_deck_table(soup))
+
+def analyze_table(table, today=None, **weight_params):
+    """DeckTable 하나를 분석해 카드별 결과 목록을 만듭니다."""
+    if table is None: return []
+    return analyze_card_table(calculate_card_stats(table, today, **weight_params))
+
+def analyze_card_table(cards):
+    """카드별 통계가 채워진 CardTable의 매수를 40장에 맞추고 결과 목록을 만듭니다."""
+    if not len(cards): return []
+
+    round_sum = int(cards.rounded_average.sum())
     adjust_deck_count(cards)
     select_replacement_candidates(cards)
-
-    analysis_results = [card.to_dict() for card in cards]
-    analysis_results.append({
-        "name": "총 합", "average": f"{DECK_SIZE}", "variance": "N/A", "std_dev": "N/A",
-        "rounded_average": f"{round_sum}", "delta": f"{DECK_SIZE}", "adjusted_count": f"{DECK_SIZE}",
-        "removability_score": "N/A", "addability_score": "N/A"
-    })
+    if cards.samples is not None and bootstrap.REPLICATES > 0:
+        cancellation.report("bootstrap", replicates=bootstrap.REPLICATES)
+        cards.bootstrap = bootstrap.resample(*cards.samples, cards.adjusted_count)
+
+    analysis_results = cards.to_dicts()
+    total_row = {
+        "name": "총 합", "average": DECK_SIZE, "variance": None, "std_dev": None,
+        "rounded_average": round_sum, "delta": DECK_SIZE, "adjusted_count": DECK_SIZE,
+        "removability_score": None, "addability_score": None
+    }
+    if cards.bootstrap is not None:
+        total_row.update(average_ci=None, count_ci=None, modal_count=None, count_stability=None,
+                         bootstrap_replicates=cards.bootstrap.replicates,
+                         bootstrap_partial=cards.bootstrap.partial)
+    analysis_results.append(total_row)
     return analysis_results
 
-def generate_deck_hashes(card_names_list):
+def is_partial(analysis_results):
+    """재추출이 시간 예산 때문에 중간에 멈춘 분석 결과인지. 이런 결과는 캐시하거나 저장하지 않습니다."""
+    return bool(analysis_results) and bool(analysis_results[-1].get("bootstrap_partial"))
+
+# --- 여러 포스트 통합 분석 ---
+class DeckAccumulator:
+    """여러 DeckTable의 표본 열을 카드 이름 기준으로 합쳐 나가는 누적기.
+
+    테이블마다 단일 포스트와 같은 두 단계 식으로 가중 평균과 편차 제곱합을 구한 뒤,
+    그 값들만 카드별로 병합해 두므로 파싱한 테이블은 add() 직후 버려도 됩니다.
+    어떤 포스트에 없는 카드는 그 포스트 표본에서 0장으로 취급됩니다.
+    since_days가 주어지면 '使用日'이 그보다 오래되었거나 날짜를 알 수 없는 표본은 제외합니다.
+    """
+
+    def __init__(self, today=None, since_days=None):
+        self.today = today or datetime.now()
+        self.since_days = since_days
+        self.names = []
+        self._index = {}
+        self._average = np.zeros(0)
+        self._squares = np.zeros(0)
+        self.total_weight = 0.0
+        self.num_samples = 0
+        self.num_tables = 0
+
+    def _sample_mask(self, table):
+        if self.since_days is None:
+            return None
+        mask = np.zeros(table.num_samples, dtype=bool)
+        for i, date_str in enumerate(table.date_values[:table.num_samples]):
+            try:
+                mask[i] = sample_days_ago(date_str, self.today) <= self.since_days
+            except ValueError:
+                continue
+        return mask
+
+    def _rows_for(self, card_names):
+        new_names = [name for name in card_names if name not in self._index]
+        if new_names:
+            for name in new_names:
+                self._index[name] = len(self.names)
+                self.names.append(name)
+            # 새 카드는 지금까지의 표본에서 0장이었으므로 평균과 편차 제곱합 모두 0에서 시작합니다.
+            padding = np.zeros(len(new_names))
+            self._average = np.concatenate([self._average, padding])
+            self._squares = np.concatenate([self._squares, padding])
+        return np.fromiter((self._index[name] for name in card_names), dtype=np.intp, count=len(card_names))
+
+    def add(self, table):
+        """DeckTable 하나의 표본을 누적합니다. 포함된 표본 수를 반환합니다."""
+        if table is None:
+            return 0
+        weights = np.asarray(calculate_weights(table, self.today), dtype=np.float64)
+        counts = table.counts.astype(np.float64)
+        mask = self._sample_mask(table)
+        if mask is not None:
+            weights, counts = weights[mask], counts[:, mask]
+        if not len(weights):
+            return 0
+
+        # 같은 카드가 여러 행에 있으면 한 행으로 합칩니다.
+        names = list(dict.fromkeys(table.card_names))
+        if len(names) != len(table.card_names):
+            position = {name: i for i, name in enumerate(names)}
+            merged = np.zeros((len(names), counts.shape[1]))
+            np.add.at(merged, [position[name] for name in table.card_names], counts)
+            counts = merged
+        table_weight, table_average, table_squares = _weighted_moments(counts, weights)
+
+        # 이 테이블의 표본에서 각 카드의 (평균, 편차 제곱합). 테이블에 없는 카드는 0장이므로 둘 다 0입니다.
+        rows = self._rows_for(names)
+        average = np.zeros(len(self.names))
+        squares = np.zeros(len(self.names))
+        average[rows] = table_average
+        squares[rows] = table_squares
+        if self.total_weight == 0:
+            self._average, self._squares = average, squares
+        else:
+            # 두 표본 묶음의 평균과 편차 제곱합 병합 (Chan et al.)
+            combined_weight = self.total_weight + table_weight
+            delta = average - self._average
+            self._average = self._average + delta * (table_weight / combined_weight)
+            self._squares = self._squares + squares + delta ** 2 * (self.total_weight * table_weight / combined_weight)
+        self.total_weight += float(table_weight)
+        self.num_samples += len(weights)
+        self.num_tables += 1
+        return len(weights)
+
+    def card_table(self):
+        """지금까지 누적한 표본 전체에 대한 CardTable. 표본이 없으면 None."""
+        if not self.num_samples:
+            return None
+        return CardTable(self.names, self._average.copy(), self._squares / (self.total_weight or 1))
+
+def _fetch_table(url, deck_name):
+    """포스트 하나에서 덱 테이블을 스크래핑해 DeckTable만 남깁니다. 실패하면 None."""
+    try:
+        table = parse_deck_table(scraper.scrape_card_html(url, deck_name))
+    except cancellation.JobCancelled:
+        raise
+    except Exception as e:
+        print(f"통합 분석: 포스트를 건너뜁니다 ({url}): {e}")
+        return None
+    save_snapshot(url, deck_name, table)
+    return table
+
+def live_concurrency(concurrency=AGGREGATE_CONCURRENCY):
+    """실제로 쓸 동시 스크래핑 수. Selenium만 쓰는 설정에서는 드라이버 풀 크기를 넘기지 않습니다.
+
+    풀보다 많은 스레드는 세션을 기다리다 시간 초과로 포스트를 건너뛰게 될 뿐입니다.
+    """
+    concurrency = max(1, concurrency)
+    if scraper.FETCH_MODE == "selenium":
+        concurrency = min(concurrency, max(1, scraper.POOL_SIZE))
+    return concurrency
+
+def iter_live_tables(post_urls, deck_name, concurrency=AGGREGATE_CONCURRENCY):
+    """포스트들의 덱 테이블을 병렬로 스크래핑해 포스트 순서대로 (URL, DeckTable 또는 None)을 돌려줍니다.
+
+    동시에 진행 중인 작업은 concurrency의 두 배로 제한해, 포스트가 수백 개여도
+    메모리에는 그만큼의 DeckTable만 올라옵니다.
+    """
+    concurrency = live_concurrency(concurrency)
+    post_urls = iter(post_urls)
+    # 작업 스레드에서도 요청의 마감 시각과 취소 신호를 따르도록 합니다.
+    fetch = cancellation.bind(_fetch_table)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for url in post_urls:
+            pending.append((url, executor.submit(fetch, url, deck_name)))
+            if len(pending) >= concurrency * 2:
+                url, future = pending.popleft()
+                yield url, future.result()
+        while pending:
+            url, future = pending.popleft()
+            yield url, future.result()
+
+def aggregate_post_urls(post_limit=AGGREGATE_POST_LIMIT):
+    """포스트 색인에서 최신 post_limit개의 URL을 가져옵니다. 색인에 부족하면 과거 페이지를 채워 넣습니다."""
+    return [post["url"] for post in post_index.latest_posts(post_limit)]
+
+def analyze_aggregate(deck_name, post_urls=None, post_limit=AGGREGATE_POST_LIMIT, since_days=None,
+                      source="live", concurrency=AGGREGATE_CONCURRENCY, today=None):
+    """여러 포스트의 같은 덱 타입 표본을 합쳐 한 번에 분석합니다.
+
+    post_urls를 주지 않으면 최신 post_limit개 포스트를 사용합니다. source="snapshot"이면
+    스크래핑 없이 스냅샷 저장소의 (포스트별) 최신 테이블을 합칩니다.
+    {"posts": 합친 포스트 수, "num_samples": 표본 수, "skipped": 덱 테이블을 가져오지 못한 포스트 URL 목록,
+    "results": 분석 결과}를 반환합니다.
+    """
+    accumulator = DeckAccumulator(today=today, since_days=since_days)
+    skipped = []
+    if source == "snapshot":
+        if snapshot_store.store is not None:
+            if post_urls is None:
+                post_urls = [post["url"] for post in snapshot_store.store.list_posts()[:post_limit]]
+            for snapshot in snapshot_store.store.iter_snapshots(post_urls=post_urls, deck_name=deck_name):
+                accumulator.add(snapshot.table)
+    else:
+        if post_urls is None:
+            post_urls = aggregate_post_urls(post_limit)
+        for url, table in iter_live_tables(post_urls, deck_name, concurrency):
+            if table is None:
+                skipped.append(url)
+            accumulator.add(table)
+
+    cards = accumulator.card_table()
+    return {
+        "posts": accumulator.num_tables,
+        "num_samples": accumulator.num_samples,
+        "skipped": skipped,
+        "results": analyze_card_table(cards) if cards is not None else [],
+    }
+
+class DeckCodeTable:
+    """카드 인덱스 전체에 대해 미리 계산한 카드 ID <-> 4글자 코드 표.
+
+    덱 수천 개를 한 번에 인코딩/디코딩할 때 카드마다 비트 연산과 인덱스 조회를 반복하지 않도록,
+    표는 카드 인덱스가 바뀔 때만 다시 만듭니다.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        ids = np.asarray(index.card_ids(), dtype=np.int64)
+        ids = ids[ids < (1 << 24)]
+        alphabet = np.array(reverse_custom_map)
+        digits = [alphabet[(ids >> (6 * (3 - i))) & 0x3F] for i in range(4)]
+        codes = np.char.add(np.char.add(digits[0], digits[1]), np.char.add(digits[2], digits[3]))
+        self.code_of_id = dict(zip(ids.tolist(), codes.tolist()))
+        self.id_of_code = {code: card_id for card_id, code in self.code_of_id.items()}
+        self.name_of_id = {card_id: index.name_for_id(card_id) for card_id in ids.tolist()}
+        self._id_of_name = {}
+
+    def id_for_name(self, name):
+        """이름으로 카드 ID를 찾습니다(느슨한 조회 포함). 같은 이름은 한 번만 조회합니다."""
+        if name not in self._id_of_name:
+            if len(self._id_of_name) >= NAME_CACHE_SIZE:
+                self._id_of_name.clear()
+            match = self.index.resolve(name)
+            self._id_of_name[name] = match[1] if match else None
+        return self._id_of_name[name]
+
+    def code_for_id(self, card_id):
+        code = self.code_of_id.get(card_id)
+        return code if code is not None else int_to_custom_base64(card_id)
+
+    def id_for_code(self, code):
+        card_id = self.id_of_code.get(code)
+        return card_id if card_id is not None else custom_base64_to_int(code)
+
+_deck_code_table = None
+NAME_CACHE_SIZE = 20000
+
+def get_deck_code_table():
+    """현재 카드 인덱스에 맞는 DeckCodeTable을 반환합니다. 인덱스가 다시 열리면 표도 새로 만듭니다."""
+    global _deck_code_table
+    index = card_index.get_index()
+    table = _deck_code_table
+    if table is None or table.index is not index:
+        table = _deck_code_table = DeckCodeTable(index)
+    return table
+
+def generate_deck_hashes(card_names_list, code_table=None):
     """주어진 카드 이름 목록에서 덱 코드 해시를 생성합니다."""
+    code_table = code_table or get_deck_code_table()
     card_counts = Counter(card_names_list)
     hashes = []
     card_data_for_sorting = []
 
     for name in dict.fromkeys(card_names_list):
         count = card_counts[name]
-        normalized_name = normalize_card_name(name)
-        base_card_id = card_id_by_normalized_name.get(normalized_name)
-
-        if not base_card_id:
+        # svlabo와 공식 사이트의 표기가 조금 달라도 찾을 수 있도록 느슨한 키 조회까지 사용합니다. (유사도 조회는 하지 않습니다.)
+        base_card_id = code_table.id_for_name(name)
+        if base_card_id is None:
             raise ValueError(f"'{name}' 카드의 ID를 찾을 수 없습니다.")
 
-        base_card_id = int(base_card_id)
-        encoded_str = int_to_custom_base64(base_card_id)
+        encoded_str = code_table.code_for_id(base_card_id)
         card_data_for_sorting.append((base_card_id, count, encoded_str))
     
     card_data_for_sorting.sort(key=lambda x: x[0])
@@ -271,3 +890,52 @@ def generate_deck_hashes(card_names_list):
             hashes.append(encoded_str)
             
     return hashes
+
+def parse_deck_hash(deck_code):
+    """덱 공유 URL 또는 hash 값("2.<클래스>.<코드>....")을 (클래스 ID, 카드 코드 목록)으로 나눕니다."""
+    deck_code = deck_code.strip()
+    if "?" in deck_code or "://" in deck_code:
+        values = parse_qs(urlparse(deck_code).query).get("hash")
+        if not values:
+            raise ValueError("덱 코드 URL에 hash 값이 없습니다.")
+        deck_code = values[0]
+    parts = deck_code.split(".")
+    if len(parts) < 3 or parts[0] != DECK_CODE_VERSION or not parts[1].isdigit():
+        raise ValueError(f"지원하지 않는 덱 코드 형식입니다: {deck_code[:40]}")
+    return int(parts[1]), parts[2:]
+
+def decode_deck_code(deck_code, code_table=None):
+    """덱 공유 URL을 {"class_id", "cards": [{"id", "name", "count"}, ...]}로 풉니다. 모르는 카드의 name은 None."""
+    code_table = code_table or get_deck_code_table()
+    class_id, codes = parse_deck_hash(deck_code)
+    cards = []
+    for code, count in Counter(codes).items():
+        card_id = code_table.id_for_code(code)
+        cards.append({"id": card_id, "name": code_table.name_of_id.get(card_id), "count": count})
+    return {"class_id": class_id, "cards": cards}
+
+def encode_decks(decks):
+    """[{"deck": [카드 이름, ...], "class_id": n}, ...]을 덱 공유 URL 목록으로 바꿉니다. 실패한 덱은 {"error"}."""
+    code_table = get_deck_code_table()
+    results = []
+    for deck in decks:
+        if not isinstance(deck, dict) or not isinstance(deck.get("deck"), list):
+            results.append({"error": "덱 데이터가 필요합니다."})
+            continue
+        try:
+            hashes = generate_deck_hashes(deck["deck"], code_table)
+            results.append({"deck_code": deck_share_url(hashes, deck.get("class_id", 2))})
+        except (TypeError, ValueError) as e:
+            results.append({"error": str(e)})
+    return results
+
+def decode_decks(deck_codes):
+    """덱 공유 URL 목록을 decode_deck_code 결과 목록으로 바꿉니다. 실패한 덱은 {"error"}."""
+    code_table = get_deck_code_table()
+    results = []
+    for deck_code in deck_codes:
+        try:
+            results.append(decode_deck_code(deck_code, code_table))
+        except (AttributeError, ValueError) as e:
+            results.append({"error": str(e)})
+    return results
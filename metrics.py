@@ -0,0 +1,181 @@
+# metrics.py - 단계별 시간 측정과 Prometheus 텍스트 형식의 지표
+#
+# 스크래핑(페이지 이동, 대기, page_source), 파싱, 가중치 계산, 40장 조정, JSON 직렬화 같은
+# 경로를 timed(단계)로 감싸면 svmeta_stage_seconds 히스토그램에 쌓이고, 요청 처리 중이면
+# 그 요청의 단계별 시간에도 더해집니다. /metrics가 render()의 결과를 그대로 내보냅니다.
+#
+# 외부 라이브러리 없이 동작하며, 캐시/작업/드라이버 풀처럼 상태를 가진 모듈은
+# register_collector로 조회 시점의 값을 게이지로 내보냅니다.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- 설정 (환경 변수로 조정 가능) ---
+# 켜면 요청마다 경로, 상태 코드, 전체 시간, 단계별 시간을 JSON 한 줄로 출력합니다.
+LOG_REQUESTS = os.environ.get("METRICS_LOG_REQUESTS", "0") in ("1", "true")
+# 이보다 오래 걸린 요청은 LOG_REQUESTS가 꺼져 있어도 출력합니다. 0이면 사용하지 않습니다.
+SLOW_REQUEST_SECONDS = float(os.environ.get("METRICS_SLOW_REQUEST_SECONDS", "0"))
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+_collectors = []
+_local = threading.local()
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """레이블 조합별로 증가만 하는 값."""
+
+    type = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """레이블 조합별 관측값 분포. 버킷은 누적 개수로 내보냅니다."""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 레이블 값 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def lines(self):
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-2] + [state[-1] - sum(state[:-2])]):
+                cumulative += count
+                le = _format_labels(self.labels + ("le",), key + (_format_value(float(bound)),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(state[-2]))}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+stage_seconds = Histogram("svmeta_stage_seconds", "처리 단계별 소요 시간(초)", ("stage",))
+http_requests = Counter("svmeta_http_requests_total", "HTTP 요청 수", ("endpoint", "method", "status"))
+http_request_seconds = Histogram("svmeta_http_request_seconds", "HTTP 요청 처리 시간(초)", ("endpoint",))
+
+
+def register_collector(collect):
+    """조회 시점에 [(이름, 도움말, 레이블 이름 튜플, {레이블 값 튜플: 값})]을 돌려주는 함수를 등록합니다. 게이지로 내보냅니다."""
+    _collectors.append(collect)
+
+
+@contextmanager
+def timed(stage):
+    """with 블록(또는 데코레이터로 감싼 함수)의 소요 시간을 stage 단계로 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=stage)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + elapsed
+
+
+def begin_request():
+    """현재 스레드에서 요청 하나의 단계별 시간 기록을 시작합니다."""
+    _local.trace = {}
+    _local.started = time.perf_counter()
+
+
+def end_request(endpoint, method, status, path=None):
+    """요청 기록을 끝내고 요청 지표를 갱신합니다. 설정에 따라 요청별 시간 로그를 JSON 한 줄로 출력합니다."""
+    trace = getattr(_local, "trace", None)
+    started = getattr(_local, "started", None)
+    _local.trace = _local.started = None
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    endpoint = endpoint or "unknown"
+    http_requests.inc(endpoint=endpoint, method=method, status=str(status))
+    http_request_seconds.observe(elapsed, endpoint=endpoint)
+    if LOG_REQUESTS or (SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS):
+        print(json.dumps({
+            "event": "request", "endpoint": endpoint, "path": path, "method": method, "status": status,
+            "ms": round(elapsed * 1000, 2),
+            "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in (trace or {}).items()},
+        }, ensure_ascii=False))
+
+
+def render():
+    """모든 지표를 Prometheus 텍스트 형식(0.0.4)으로 만듭니다."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.lines())
+    for collect in _collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            print(f"지표 수집 중 오류: {e}")
+            continue
+        for name, help_text, labels, values in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels(labels, key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,362 @@
+# post_index.py - 한 번 본 포스트를 기억하는 증분 포스트 목록 수집기
+#
+# 포스트 URL과 제목을 SQLite에 보관합니다. 새 포스트 확인(discover)은 첫 페이지부터 읽다가
+# 이미 아는 포스트가 나오면 멈추므로 보통 페이지 하나로 끝납니다. 과거 목록(backfill)은
+# 아카이브 페이지 여러 개를 병렬로 받아 채웁니다. 포스트 드롭다운은 전체 기록을 보여 줍니다.
+#
+#   python post_index.py                          # 새 포스트 확인
+#   python post_index.py --backfill 300           # 아카이브 300페이지를 병렬로 채우기 (중단해도 이어서 진행)
+#   python post_index.py --list
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scraper
+
+# --- 설정 (환경 변수로 조정 가능) ---
+# 빈 문자열로 지정하면 색인을 쓰지 않고 매번 앞 페이지들만 읽습니다.
+POST_INDEX_DB = os.environ.get("POST_INDEX_DB", "posts.sqlite3")
+# 병렬 backfill에 쓰는 아카이브 페이지 주소 형식 ({page}는 2부터)
+SVLABO_PAGE_URL = os.environ.get("SVLABO_PAGE_URL", scraper.SVLABO_URL.rstrip("/") + "/page/{page}/")
+# 새 포스트를 확인한 지 이 시간(초)이 지나지 않았으면 네트워크 없이 저장된 목록을 씁니다.
+DISCOVERY_MAX_AGE = float(os.environ.get("POST_INDEX_DISCOVERY_MAX_AGE", "300"))
+# 아는 포스트를 만나지 못해도 새 포스트 확인을 멈추는 페이지 수. 남은 페이지는 다음 확인 때 이어서 읽습니다.
+DISCOVERY_MAX_PAGES = int(os.environ.get("POST_INDEX_DISCOVERY_MAX_PAGES", "5"))
+BACKFILL_WORKERS = int(os.environ.get("POST_INDEX_BACKFILL_WORKERS", "8"))
+# 목록 한 페이지의 포스트 수. 최신 N개에 필요한 페이지 수를 어림할 때 씁니다.
+POSTS_PER_PAGE = int(os.environ.get("AGGREGATE_POSTS_PER_PAGE", "10"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    first_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_seq ON posts (seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gaps (
+    page_url TEXT NOT NULL,
+    seq INTEGER NOT NULL
+);
+"""
+
+
+class PostIndex:
+    """알려진 포스트의 URL, 제목, 순서를 보관하는 SQLite 색인.
+
+    seq가 클수록 최신 포스트입니다. 새로 발견한 포스트는 가장 큰 seq 위에,
+    backfill로 찾은 과거 포스트는 가장 작은 seq 아래에 목록 순서대로 붙입니다.
+    새 포스트 확인이 기존 포스트에 닿기 전에 멈추면 그 아래 빈 구간을 gaps에 남기고,
+    나중에 찾은 구간의 포스트는 위쪽 seq를 밀어 올려 그 자리에 끼워 넣습니다.
+    연결은 스레드마다 따로 열고, WAL 모드로 웹 워커와 수집 프로세스가 함께 씁니다.
+    """
+
+    def __init__(self, path=POST_INDEX_DB):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def newest_seq(self):
+        """색인에서 가장 최신 포스트의 seq. 비어 있으면 0."""
+        return self._connect().execute("SELECT COALESCE(MAX(seq), 0) FROM posts").fetchone()[0]
+
+    def known(self, urls):
+        """urls 중 색인에 이미 있는 URL의 집합."""
+        urls = list(urls)
+        if not urls:
+            return set()
+        rows = self._connect().execute(
+            f"SELECT url FROM posts WHERE url IN ({', '.join('?' * len(urls))})", urls
+        ).fetchall()
+        return {url for url, in rows}
+
+    def add(self, posts, newest=True):
+        """posts(목록 순서, 최신 먼저)를 색인에 넣습니다. 이미 있는 URL은 건너뜁니다. 새로 넣은 수를 반환합니다."""
+        if not posts:
+            return 0
+        conn = self._connect()
+        with self._write_lock, conn:
+            if newest:
+                top = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM posts").fetchone()[0]
+                seqs = [top + len(posts) - i for i in range(len(posts))]
+            else:
+                bottom = conn.execute("SELECT COALESCE(MIN(seq), 1) FROM posts").fetchone()[0]
+                seqs = [bottom - 1 - i for i in range(len(posts))]
+            now = time.time()
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO posts (url, title, seq, first_seen) VALUES (?, ?, ?, ?)",
+                [(post["url"], post["title"], seq, now) for post, seq in zip(posts, seqs)],
+            )
+        return cursor.rowcount
+
+    def seqs(self, urls):
+        """urls 중 색인에 있는 URL의 {URL: seq}."""
+        urls = list(urls)
+        if not urls:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT url, seq FROM posts WHERE url IN ({', '.join('?' * len(urls))})", urls
+        ).fetchall()
+        return dict(rows)
+
+    def add_gap(self, page_url, seq):
+        """seq인 포스트 바로 아래(더 오래된 쪽)에 아직 읽지 않은 포스트가 있고, page_url부터 이어진다고 기록합니다."""
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute("INSERT INTO gaps (page_url, seq) VALUES (?, ?)", (page_url, seq))
+
+    def gaps(self):
+        """[(구간 번호, 이어서 읽을 페이지 URL, 구간 바로 위 포스트의 seq), ...] 최신 구간 먼저."""
+        return self._connect().execute("SELECT rowid, page_url, seq FROM gaps ORDER BY seq DESC").fetchall()
+
+    def fill_gap(self, gap_id, posts, next_page_url):
+        """구간 gap_id에서 찾은 posts(목록 순서, 최신 먼저)를 구간 위쪽에 끼워 넣습니다. 새로 넣은 수를 반환합니다.
+
+        next_page_url이 None이면 구간을 다 읽은 것이므로 지우고, 아니면 다음에 그 페이지부터 이어서 읽습니다.
+        """
+        conn = self._connect()
+        with self._write_lock, conn:
+            row = conn.execute("SELECT seq FROM gaps WHERE rowid = ?", (gap_id,)).fetchone()
+            if row is None:
+                return 0
+            bottom = row[0]
+            known = self.known(post["url"] for post in posts)
+            posts = [post for post in posts if post["url"] not in known]
+            count = len(posts)
+            if count:
+                # 구간 위쪽(seq >= bottom)을 count만큼 올리고, 빈 자리 [bottom, bottom + count)에 넣습니다.
+                conn.execute("UPDATE posts SET seq = seq + ? WHERE seq >= ?", (count, bottom))
+                conn.execute("UPDATE gaps SET seq = seq + ? WHERE seq > ?", (count, bottom))
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR IGNORE INTO posts (url, title, seq, first_seen) VALUES (?, ?, ?, ?)",
+                    [(post["url"], post["title"], bottom + count - 1 - i, now) for i, post in enumerate(posts)],
+                )
+            if next_page_url is None:
+                conn.execute("DELETE FROM gaps WHERE rowid = ?", (gap_id,))
+            else:
+                conn.execute("UPDATE gaps SET page_url = ? WHERE rowid = ?", (next_page_url, gap_id))
+        return count
+
+    def update_titles(self, posts):
+        """제목이 바뀐 포스트(재편집 등)의 제목을 갱신합니다."""
+        if not posts:
+            return
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.executemany(
+                "UPDATE posts SET title = ? WHERE url = ? AND title != ?",
+                [(post["title"], post["url"], post["title"]) for post in posts],
+            )
+
+    def list_posts(self, limit=None):
+        """최신 순 [{"title", "url"}, ...]."""
+        query = "SELECT title, url FROM posts ORDER BY seq DESC"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit,)
+        return [{"title": title, "url": url} for title, url in self._connect().execute(query, params)]
+
+    def get_meta(self, key, default=None):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def discover(index, max_pages=DISCOVERY_MAX_PAGES):
+    """첫 페이지부터 읽으며 새 포스트를 색인에 넣습니다. 이미 아는 포스트가 있는 페이지에서 멈춥니다.
+
+    max_pages 안에서 아는 포스트에 닿지 못하면 남은 구간을 기록해 두고, 이후 호출에서
+    max_pages씩 이어서 채웁니다. 새로 찾은 포스트 목록(최신 먼저)을 반환합니다.
+    """
+    new_posts = []
+    new_urls = set()
+    page_url = scraper.SVLABO_URL
+    reached_known = False
+    page = 0
+    for page in range(1, max_pages + 1):
+        posts, next_url = scraper.get_post_page(page_url)
+        known = index.known(post["url"] for post in posts)
+        index.update_titles([post for post in posts if post["url"] in known])
+        for post in posts:
+            if post["url"] not in known and post["url"] not in new_urls:
+                new_urls.add(post["url"])
+                new_posts.append(post)
+        reached_known = bool(known)
+        if reached_known or next_url is None:
+            break
+        page_url = next_url
+
+    had_posts = index.count() > 0
+    index.add(new_posts, newest=True)
+    if had_posts and not reached_known and next_url is not None and page == max_pages:
+        print(f"{max_pages}페이지 안에서 기존 포스트를 찾지 못했습니다. 남은 포스트는 다음 확인 때 이어서 채웁니다.")
+        # 읽은 페이지가 모두 중복이라 새 포스트가 없으면, 남은 구간은 색인의 가장 최신 포스트 바로 아래입니다.
+        bottom = index.seqs([new_posts[-1]["url"]])[new_posts[-1]["url"]] if new_posts else index.newest_seq()
+        index.add_gap(next_url, bottom)
+    else:
+        fill_gap(index, max_pages)
+    if index.get_meta("backfill_page") is None:
+        index.set_meta("backfill_page", page + 1)
+    index.set_meta("discovered_at", time.time())
+    return new_posts
+
+
+def fill_gap(index, max_pages=DISCOVERY_MAX_PAGES):
+    """새 포스트 확인이 중간에 멈춰 남은 구간 하나를 최대 max_pages 페이지까지 이어서 채웁니다. 넣은 포스트 수를 반환합니다."""
+    gaps = index.gaps()
+    if not gaps:
+        return 0
+    gap_id, page_url, bottom = gaps[0]
+    found, found_urls = [], set()
+    for _ in range(max_pages):
+        posts, next_url = scraper.get_post_page(page_url)
+        seqs = index.seqs(post["url"] for post in posts)
+        for post in posts:
+            if post["url"] not in seqs and post["url"] not in found_urls:
+                found_urls.add(post["url"])
+                found.append(post)
+        # 구간 아래의 기존 포스트(seq < bottom)가 보이면 구간을 다 읽은 것입니다.
+        # 구간 위의 포스트는 그사이 새 글이 올라와 페이지가 밀린 것이므로 건너뛰고 계속 읽습니다.
+        if next_url is None or any(seq < bottom for seq in seqs.values()):
+            page_url = None
+            break
+        page_url = next_url
+    return index.fill_gap(gap_id, found, page_url)
+
+
+def _fetch_archive_page(page):
+    """아카이브 페이지 하나의 포스트 목록. 가져오지 못했으면 None (빈 목록은 페이지가 없는 목록의 끝)."""
+    try:
+        posts, _ = scraper.get_post_page(SVLABO_PAGE_URL.format(page=page))
+        return posts
+    except Exception as e:
+        print(f"아카이브 {page}페이지를 가져오지 못했습니다: {e}")
+        return None
+
+
+def backfill(index, pages, workers=BACKFILL_WORKERS):
+    """아직 읽지 않은 아카이브 페이지를 최대 pages개까지 병렬로 읽어 과거 포스트를 채웁니다.
+
+    진행 위치는 색인에 저장되므로 중단하거나 나눠서 실행해도 이어서 진행합니다.
+    페이지 번호가 새 포스트 때문에 밀려도 이미 본 포스트가 다시 보일 뿐 빠지는 포스트는 없습니다.
+    (새로 넣은 포스트 수, 목록 끝에 도달했는지)를 반환합니다.
+    """
+    # 새 포스트 확인이 남긴 구간을 먼저 채웁니다. 그 포스트가 아카이브 페이지에 보이면 맨 아래에 잘못 붙기 때문입니다.
+    added = 0
+    while index.gaps():
+        added += fill_gap(index)
+    remaining = pages
+    workers = max(1, workers)
+    while remaining > 0:
+        start = int(index.get_meta("backfill_page", 2))
+        page_numbers = list(range(start, start + min(remaining, workers * 4)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fetch_archive_page, page_numbers))
+
+        # 목록 순서를 지키기 위해, 실패한 페이지가 있으면 그 앞까지만 반영하고 다음에 다시 시도합니다.
+        collected, next_page, reached_end = [], start, False
+        for page, posts in zip(page_numbers, results):
+            if posts is None:
+                break
+            if not posts:
+                reached_end = True
+                break
+            collected.extend(posts)
+            next_page = page + 1
+
+        known = index.known(post["url"] for post in collected)
+        seen = set(known)
+        fresh = []
+        for post in collected:
+            if post["url"] not in seen:
+                seen.add(post["url"])
+                fresh.append(post)
+        added += index.add(fresh, newest=False)
+        index.set_meta("backfill_page", next_page)
+        if reached_end:
+            index.set_meta("backfill_done", 1)
+            return added, True
+        if next_page == start:
+            break  # 첫 페이지부터 실패했으면 나중에 다시 시도합니다.
+        remaining -= next_page - start
+    return added, False
+
+
+def get_posts(index=None, max_age=DISCOVERY_MAX_AGE):
+    """전체 포스트 목록(최신 먼저). 최근에 확인했으면 네트워크 없이 색인만 읽습니다."""
+    index = index or store
+    if index is None:
+        return scraper.get_post_list()
+    if time.time() - float(index.get_meta("discovered_at", 0)) >= max_age:
+        try:
+            discover(index)
+        except Exception as e:
+            if not index.count():
+                raise
+            print(f"새 포스트 확인 실패, 저장된 목록을 사용합니다: {e}")
+    return index.list_posts()
+
+
+def latest_posts(limit, index=None):
+    """최신 limit개 포스트. 색인에 그만큼 없으면 필요한 만큼 backfill합니다."""
+    index = index or store
+    if index is None:
+        return (scraper.get_post_list(num_pages=max(2, -(-limit // POSTS_PER_PAGE))) or [])[:limit]
+    posts = get_posts(index)
+    missing = limit - len(posts)
+    if missing > 0 and not index.get_meta("backfill_done"):
+        backfill(index, -(-missing // POSTS_PER_PAGE))
+        posts = index.list_posts()
+    return posts[:limit]
+
+
+store = PostIndex() if POST_INDEX_DB else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="svlabo 포스트 목록 색인을 갱신합니다.")
+    parser.add_argument("--backfill", type=int, default=0, metavar="PAGES", help="아카이브 페이지를 최대 PAGES개 더 읽습니다.")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="backfill 동시 요청 수")
+    parser.add_argument("--list", action="store_true", help="색인된 포스트를 출력합니다.")
+    args = parser.parse_args()
+    if store is None:
+        parser.error("POST_INDEX_DB가 비어 있어 색인을 쓸 수 없습니다.")
+
+    try:
+        if args.list:
+            for post in store.list_posts():
+                print(f"{post['title']}\t{post['url']}")
+        else:
+            new_posts = discover(store)
+            print(f"새 포스트 {len(new_posts)}개")
+            if args.backfill:
+                added, reached_end = backfill(store, args.backfill, args.workers)
+                print(f"과거 포스트 {added}개 추가{' (목록 끝까지 읽음)' if reached_end else ''}")
+            print(f"색인된 포스트: {store.count()}개")
+    finally:
+        scraper.shutdown_driver()
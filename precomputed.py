@@ -0,0 +1,84 @@
+# precomputed.py - 미리 계산된 포스트 목록/덱 이름/분석 결과를 파일로 공유하는 저장소
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# --- 설정 ---
+PRECOMPUTED_DIR = os.environ.get("PRECOMPUTED_DIR", "precomputed")
+# 포스트 목록은 새 포스트가 계속 올라오므로 이 시간(초)보다 오래된 파일은 무시합니다.
+POST_LIST_MAX_AGE = float(os.environ.get("PRECOMPUTED_POST_LIST_MAX_AGE", "3600"))
+
+
+def url_key(value):
+    """URL이나 덱 이름을 파일 이름으로 쓸 수 있는 짧은 해시로 바꿉니다."""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(value):
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PrecomputedStore:
+    """프리페치 프로세스가 쓰고 웹 워커가 읽는 디렉터리 기반 저장소.
+
+    파일은 임시 파일에 쓴 뒤 os.replace로 교체하므로, 다른 프로세스가 읽는 도중에도
+    반쯤 쓰인 JSON을 보게 되지 않습니다.
+    """
+
+    def __init__(self, root=PRECOMPUTED_DIR):
+        self.root = root
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _read(self, path, max_age=None):
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            # mkstemp는 0600으로 만들므로, 다른 사용자로 도는 웹 서버도 읽을 수 있게 일반 파일 권한으로 맞춥니다.
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load_posts(self):
+        return self._read(self._path("posts.json"), max_age=POST_LIST_MAX_AGE)
+
+    def save_posts(self, posts):
+        self._write(self._path("posts.json"), posts)
+
+    def load_deck_names(self, url):
+        return self._read(self._path(url_key(url), "deck_names.json"))
+
+    def save_deck_names(self, url, deck_names):
+        self._write(self._path(url_key(url), "deck_names.json"), deck_names)
+
+    def load_analysis(self, url, deck_name):
+        return self._read(self._path(url_key(url), f"{url_key(deck_name)}.json"))
+
+    def save_analysis(self, url, deck_name, analysis_results):
+        self._write(self._path(url_key(url), f"{url_key(deck_name)}.json"), analysis_results)
+
+    def load_state(self):
+        return self._read(self._path("state.json")) or {}
+
+    def save_state(self, state):
+        self._write(self._path("state.json"), state)
+
+
+store = PrecomputedStore()
@@ -0,0 +1,140 @@
+# prefetch.py - 최신 포스트를 주기적으로 확인해 미리 분석해 두는 백그라운드 작업
+#
+# 웹 워커와 별도의 프로세스로 실행합니다:
+#   python prefetch.py          # 계속 실행
+#   python prefetch.py --once   # 한 번만 확인 (cron 등에서 사용)
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import scraper
+import logic
+import post_index
+from precomputed import store as default_store, content_hash
+
+# --- 설정 (초 단위, 환경 변수로 조정 가능) ---
+POLL_INTERVAL = float(os.environ.get("PREFETCH_POLL_INTERVAL", "300"))
+REFRESH_INTERVAL = float(os.environ.get("PREFETCH_REFRESH_INTERVAL", "21600"))
+POST_LIMIT = int(os.environ.get("PREFETCH_POST_LIMIT", "5"))
+CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", str(scraper.POOL_SIZE)))
+JITTER = 0.2
+MAX_BACKOFF = 3600
+
+
+def backoff_delay(failures):
+    """연속 실패 횟수에 따른 지수 백오프 대기 시간."""
+    return min(MAX_BACKOFF, POLL_INTERVAL * (2 ** max(0, failures - 1)))
+
+
+def with_jitter(delay):
+    return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class Prefetcher:
+    """포스트 목록을 폴링해 새 포스트나 바뀐 포스트의 모든 덱을 미리 분석해 저장합니다.
+
+    포스트별 상태(state.json)에는 제목, 마지막 분석 결과의 해시, 갱신 시각,
+    연속 실패 횟수를 기록해 프로세스가 재시작되어도 이어서 동작합니다.
+    """
+
+    def __init__(self, store=default_store, post_limit=POST_LIMIT, concurrency=CONCURRENCY):
+        self.store = store
+        self.post_limit = post_limit
+        self.concurrency = max(1, concurrency)
+        self.state = store.load_state()
+
+    def _is_due(self, post, now):
+        entry = self.state.get(post["url"])
+        if entry is None or entry.get("title") != post["title"]:
+            return True
+        if entry.get("retry_at", 0) > now:
+            return False
+        return entry.get("failures", 0) > 0 or now - entry.get("refreshed_at", 0) >= REFRESH_INTERVAL
+
+    def refresh_post(self, post):
+        """포스트 하나의 모든 덱을 분석하고, 결과가 바뀌었을 때만 저장합니다."""
+        results = logic.analyze_post(post["url"])
+        if not results:
+            raise RuntimeError("분석 결과가 비어 있습니다.")
+        # 재추출이 시간 예산 때문에 중간에 멈춘 덱은 저장하지 않고, 요청 시 다시 계산하게 둡니다.
+        complete = {deck_name: analysis_results for deck_name, analysis_results in results.items()
+                    if not logic.is_partial(analysis_results)}
+        fingerprint = content_hash(complete)
+        previous = self.state.get(post["url"], {})
+        if fingerprint != previous.get("fingerprint"):
+            for deck_name, analysis_results in complete.items():
+                self.store.save_analysis(post["url"], deck_name, analysis_results)
+            self.store.save_deck_names(post["url"], list(results))
+        return fingerprint
+
+    def poll_once(self):
+        # 매 주기마다 새 포스트를 확인해 색인에 넣고, 드롭다운용으로 전체 목록을 저장합니다.
+        posts = post_index.get_posts(max_age=0)
+        if not posts:
+            raise RuntimeError("포스트 목록이 비어 있습니다.")
+        self.store.save_posts(posts)
+
+        now = time.time()
+        due_posts = [post for post in posts[:self.post_limit] if self._is_due(post, now)]
+        if not due_posts:
+            return 0
+
+        refreshed = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.refresh_post, post): post for post in due_posts}
+            for future in as_completed(futures):
+                post = futures[future]
+                entry = self.state.setdefault(post["url"], {})
+                entry["title"] = post["title"]
+                try:
+                    entry["fingerprint"] = future.result()
+                    entry["refreshed_at"] = time.time()
+                    entry["failures"] = 0
+                    entry.pop("retry_at", None)
+                    refreshed += 1
+                except Exception as e:
+                    entry["failures"] = entry.get("failures", 0) + 1
+                    entry["retry_at"] = time.time() + with_jitter(backoff_delay(entry["failures"]))
+                    print(f"프리페치 실패 ({post['title']}): {e}")
+        self.store.save_state(self.state)
+        print(f"프리페치: {len(due_posts)}개 중 {refreshed}개 포스트를 갱신했습니다.")
+        return refreshed
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        failures = 0
+        while not stop_event.is_set():
+            try:
+                self.poll_once()
+                failures = 0
+                delay = POLL_INTERVAL
+            except Exception as e:
+                failures += 1
+                delay = backoff_delay(failures)
+                print(f"포스트 목록 폴링 실패 ({failures}회 연속): {e}")
+            stop_event.wait(with_jitter(delay))
+
+
+def start_background_thread(stop_event=None):
+    """웹 프로세스 안에서 프리페치를 돌려야 할 때 사용하는 데몬 스레드를 시작합니다."""
+    thread = threading.Thread(target=Prefetcher().run_forever, args=(stop_event,), name="prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="최신 svlabo 포스트를 미리 분석해 저장합니다.")
+    parser.add_argument("--once", action="store_true", help="한 번만 확인하고 종료합니다.")
+    args = parser.parse_args()
+
+    prefetcher = Prefetcher()
+    try:
+        if args.once:
+            prefetcher.poll_once()
+        else:
+            prefetcher.run_forever()
+    finally:
+        scraper.shutdown_driver()
@@ -1,98 +1,503 @@
 # scraper.py - 데이터 수집 (웹 스크래핑)
 import atexit
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+import os
+import queue
+import threading
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urljoin
+
+import cancellation
+import metrics
+from startup import lazy_module
+
+# requests/BeautifulSoup을 쓰는 HTTP 경로는 처음 스크래핑할 때 불러옵니다.
+http_scraper = lazy_module("http_scraper")
 
 # --- 상수 ---
-SVLABO_URL = "https://svlabo.jp/"
+SVLABO_URL = os.environ.get("SVLABO_URL", "https://svlabo.jp/")
+POST_TITLE_KEYWORD = "デッキリスト比較"
 DECK_SELECT_ID = "deckname_select_elm"
 TABLE_HEADER_ID = "#table_header"
 DECKLIST_BODY_ID = "#decklist_body"
 
-# --- 전역 WebDriver 인스턴스 ---
-driver = None
+# --- 드라이버 풀 설정 (환경 변수로 조정 가능) ---
+POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "2"))
+MAX_PAGES_PER_DRIVER = int(os.environ.get("SCRAPER_MAX_PAGES_PER_DRIVER", "50"))
+CHECKOUT_TIMEOUT = float(os.environ.get("SCRAPER_CHECKOUT_TIMEOUT", "60"))
+PAGE_LOAD_TIMEOUT = float(os.environ.get("SCRAPER_PAGE_LOAD_TIMEOUT", "30"))
 
-def init_driver():
-    """전역 Selenium WebDriver가 초기화되지 않았을 경우 초기화합니다."""
-    global driver
-    if driver is None:
-        print("새로운 Chrome 드라이버를 초기화합니다...")
+# 가져오기 방식: "auto"(HTTP 우선, 실패 시 Selenium), "http", "selenium"
+FETCH_MODE = os.environ.get("SCRAPER_FETCH_MODE", "auto")
+# 설치된 chromedriver 경로. 지정하면 webdriver_manager를 거치지 않으므로 네트워크 접근 없이 드라이버를 띄웁니다.
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
+
+# --- Selenium (처음 브라우저가 필요할 때 _load_selenium()이 채웁니다) ---
+webdriver = Service = Select = By = WebDriverWait = EC = None
+
+
+class _SeleniumNotLoaded(Exception):
+    """Selenium을 불러오기 전의 TimeoutException 자리. except 절에 써도 되도록 예외 클래스로 두며, 발생하지 않습니다."""
+
+
+# 직접 만든 드라이버 팩토리를 쓰면 Selenium을 불러오지 않은 채 DriverSession.get이 불릴 수 있습니다.
+TimeoutException = _SeleniumNotLoaded
+_CancellableWait = None
+_selenium_lock = threading.Lock()
+
+
+def _load_selenium():
+    """Selenium 모듈들을 불러와 이 모듈의 전역 이름에 연결합니다. 웹 프로세스 시작 시간을 줄이려고 늦게 불러옵니다."""
+    global webdriver, Service, Select, By, WebDriverWait, EC, TimeoutException, _CancellableWait
+    if _CancellableWait is not None:
+        return
+    with _selenium_lock:
+        if _CancellableWait is not None:
+            return
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.support.ui import Select, WebDriverWait
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
+        class CancellableWait(WebDriverWait):
+            """대기 조건을 확인할 때마다 작업 취소 여부도 확인하는 WebDriverWait."""
+
+            def until(self, method, message=""):
+                def condition(driver):
+                    cancellation.check()
+                    return method(driver)
+                try:
+                    with metrics.timed("wait"):
+                        return super().until(condition, message)
+                except TimeoutException:
+                    # 마감 시각 때문에 줄어든 대기가 끝난 경우라면 취소로 보고합니다.
+                    cancellation.check()
+                    raise
+
+        _CancellableWait = CancellableWait
+
+
+class DriverSession:
+    """풀에서 관리되는 Chrome 세션 하나. 로드한 페이지 수를 세어 재활용 시점을 판단합니다."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_loaded = 0
+        self.broken = False
+
+    def get(self, url):
+        self.pages_loaded += 1
+        # 작업 마감 시각이 있으면 페이지 로드도 그 안에서 끝나야 합니다.
+        self.driver.set_page_load_timeout(cancellation.timeout(PAGE_LOAD_TIMEOUT))
+        try:
+            with metrics.timed("navigation"):
+                self.driver.get(url)
+        except TimeoutException:
+            cancellation.check()
+            raise
+
+    def is_healthy(self):
+        """브라우저 프로세스가 살아 있고 명령에 응답하는지 확인합니다."""
+        if self.broken:
+            return False
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"드라이버 종료 중 오류: {e}")
+
+    def __getattr__(self, name):
+        # find_element, page_source 등은 실제 WebDriver에 위임합니다.
+        return getattr(self.driver, name)
+
+
+def create_driver():
+    """헤드리스 Chrome 드라이버를 새로 생성합니다."""
+    _load_selenium()
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    if CHROMEDRIVER_PATH:
+        service = Service(CHROMEDRIVER_PATH)
+    else:
+        from webdriver_manager.chrome import ChromeDriverManager
         service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service)
-        # 드라이버가 초기화될 때만 종료 훅을 등록합니다.
-        atexit.register(shutdown_driver)
+    return webdriver.Chrome(service=service, options=options)
+
+
+class DriverPool:
+    """크기가 제한된 WebDriver 세션 풀.
+
+    세션은 필요할 때 생성되며, 체크아웃 시 상태를 확인하고
+    max_pages 만큼 페이지를 로드한 세션은 반납 시 새 세션으로 교체됩니다.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, factory=create_driver):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._closed = False
+
+    def _new_session(self):
+        print("새로운 Chrome 드라이버를 초기화합니다...")
+        with metrics.timed("driver_start"):
+            session = DriverSession(self.factory())
+        driver_starts.inc()
+        with self._lock:
+            self._sessions.add(session)
+        return session
+
+    def _discard(self, session, reason):
+        driver_discards.inc(reason=reason)
+        with self._lock:
+            self._sessions.discard(session)
+        session.quit()
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """사용 가능한 세션을 빌립니다. 풀이 가득 차 있으면 timeout 초까지 기다립니다."""
+        if self._closed:
+            raise RuntimeError("드라이버 풀이 이미 종료되었습니다.")
+        with metrics.timed("driver_checkout"):
+            acquired = self._slots.acquire(timeout=cancellation.timeout(timeout))
+        if not acquired:
+            cancellation.check()
+            raise TimeoutError(f"{timeout}초 내에 사용 가능한 드라이버가 없습니다.")
+        try:
+            while True:
+                try:
+                    session = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_session()
+                if session.is_healthy():
+                    return session
+                print("응답하지 않는 드라이버를 폐기합니다.")
+                self._discard(session, "unhealthy")
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, session):
+        """세션을 반납합니다. 손상되었거나 수명이 다한 세션은 종료합니다."""
+        try:
+            if self._closed:
+                self._discard(session, "closed")
+            elif session.broken:
+                self._discard(session, "broken")
+            elif session.pages_loaded >= self.max_pages:
+                self._discard(session, "recycled")
+            else:
+                self._idle.put(session)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self):
+        session = self.checkout()
+        try:
+            yield session
+        except cancellation.JobCancelled:
+            # 취소는 브라우저 문제가 아니므로, 드라이버가 아직 응답하면 Chrome을 다시 띄우지 않고 재사용합니다.
+            if not session.is_healthy():
+                session.broken = True
+            raise
+        except BaseException:
+            # 탐색 도중 실패한 세션은 상태를 신뢰할 수 없으므로 재사용하지 않습니다.
+            session.broken = True
+            raise
+        finally:
+            self.checkin(session)
+
+    def stats(self):
+        with self._lock:
+            sessions = len(self._sessions)
+        idle = self._idle.qsize()
+        return {"size": self.size, "sessions": sessions, "idle": idle, "in_use": sessions - idle}
+
+    def warm(self, count=1):
+        """미리 count개의 세션을 만들어 첫 요청의 지연을 줄입니다."""
+        sessions = [self.checkout() for _ in range(min(count, self.size))]
+        for session in sessions:
+            self.checkin(session)
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        if sessions:
+            print("드라이버를 종료합니다...")
+        for session in sessions:
+            session.quit()
+
+
+# --- 전역 WebDriver 풀 ---
+pool = None
+_pool_lock = threading.Lock()
+
+driver_starts = metrics.Counter("svmeta_driver_starts_total", "새로 띄운 Chrome 드라이버 수")
+driver_discards = metrics.Counter("svmeta_driver_discards_total", "폐기한 드라이버 수 (사유별)", ("reason",))
+scrape_failures = metrics.Counter("svmeta_scrape_failures_total", "스크래핑 실패 수 (경로별)", ("path",))
+
+
+def _collect_pool_metrics():
+    current = pool
+    if current is None:
+        return []
+    stats = current.stats()
+    return [("svmeta_driver_pool", "드라이버 풀 상태", ("state",), {(key,): value for key, value in stats.items()})]
+
+
+metrics.register_collector(_collect_pool_metrics)
+
+def init_driver(warm=1):
+    """전역 드라이버 풀이 초기화되지 않았을 경우 초기화하고 warm개의 세션을 미리 띄웁니다."""
+    global pool
+    with _pool_lock:
+        if pool is None:
+            pool = DriverPool()
+            # 풀이 생성될 때만 종료 훅을 등록합니다.
+            atexit.register(shutdown_driver)
+    if warm:
+        pool.warm(warm)
+    return pool
 
 def shutdown_driver():
-    """Selenium WebDriver를 종료합니다."""
-    global driver
-    if driver:
-        print("드라이버를 종료합니다...")
-        driver.quit()
-        driver = None
-
-def get_post_list(num_pages=2):
+    """풀에 있는 모든 Selenium WebDriver를 종료합니다."""
+    global pool
+    with _pool_lock:
+        current, pool = pool, None
+    if current:
+        current.shutdown()
+
+_shared = threading.local()
+
+@contextmanager
+def shared_session():
+    """with 블록 동안 이 스레드의 스크래핑 함수들이 처음 빌린 드라이버 세션 하나를 함께 씁니다.
+
+    세션은 Selenium 경로가 처음 필요할 때 빌리므로, HTTP 경로만으로 끝나면 Chrome을 띄우지 않습니다.
+    캐시를 거치는 여러 단계가 driver 인자 없이도 세션을 공유할 수 있게 합니다.
+    """
+    if getattr(_shared, "stack", None) is not None:
+        yield
+        return
+    with ExitStack() as stack:
+        _shared.stack, _shared.session = stack, None
+        try:
+            yield
+        finally:
+            _shared.stack = _shared.session = None
+
+@contextmanager
+def borrow_driver(driver=None):
+    """풀에서 드라이버 세션을 빌려 with 블록 동안 사용합니다.
+
+    이미 빌린 세션(driver)을 넘기거나 shared_session() 안이면 그 세션을 재사용하므로,
+    한 요청 안에서 여러 스크래핑 함수가 세션 하나를 공유할 수 있습니다.
+    """
+    _load_selenium()
+    if driver is not None:
+        yield driver
+        return
+    stack = getattr(_shared, "stack", None)
+    if stack is not None:
+        if _shared.session is None:
+            _shared.session = stack.enter_context(init_driver(warm=0).session())
+        yield _shared.session
+        return
+    with init_driver(warm=0).session() as session:
+        yield session
+
+def _wait(driver, timeout=10):
+    """WebDriverWait(driver, timeout)과 같지만, 작업의 남은 시간으로 timeout을 줄이고 취소되면 즉시 멈춥니다."""
+    _load_selenium()
+    return _CancellableWait(driver, cancellation.timeout(timeout))
+
+def _http_first(http_func, selenium_func, *args, driver=None):
+    """FETCH_MODE에 따라 HTTP 경로를 먼저 시도하고, 실패하면 Selenium 경로로 폴백합니다."""
+    if FETCH_MODE != "selenium":
+        try:
+            return http_func(*args)
+        except http_scraper.HttpFetchError as e:
+            scrape_failures.inc(path="http")
+            if FETCH_MODE == "http":
+                raise
+            print(f"HTTP 경로 실패, Selenium으로 폴백합니다: {e}")
+            cancellation.report("fallback", reason=str(e))
+    try:
+        return selenium_func(*args, driver=driver)
+    except cancellation.JobCancelled:
+        raise
+    except Exception:
+        scrape_failures.inc(path="selenium")
+        raise
+
+def post_links(links, page_url):
+    """[(링크 텍스트, href), ...]에서 덱 리스트 비교 포스트만 골라 [{"title", "url"}]로 만듭니다. 같은 URL은 처음 것만 남깁니다."""
+    posts = []
+    seen_urls = set()
+    for title, href in links:
+        title = (title or "").strip()
+        if POST_TITLE_KEYWORD not in title or not href:
+            continue
+        url = urljoin(page_url, href)
+        if url not in seen_urls:
+            seen_urls.add(url)
+            posts.append({"title": title, "url": url})
+    return posts
+
+def get_post_page(page_url=None, driver=None):
+    """포스트 목록 페이지 하나의 (포스트 목록, 다음 페이지 URL 또는 None)을 반환합니다.
+
+    페이지가 없으면(목록의 끝을 지난 경우) ([], None)입니다.
+    """
+    return _http_first(http_scraper.get_post_page, _selenium_get_post_page, page_url or SVLABO_URL, driver=driver)
+
+def get_post_list(num_pages=2, driver=None):
     """메인 사이트의 여러 페이지에 걸쳐 덱 리스트 비교 포스트 목록을 가져옵니다."""
-    init_driver()
-    driver.get(SVLABO_URL)
-    
     posts = []
-    
-    for page_num in range(num_pages):
-        WebDriverWait(driver, 10).until(
+    seen_urls = set()
+    page_url = SVLABO_URL
+    for _ in range(num_pages):
+        page_posts, page_url = get_post_page(page_url, driver=driver)
+        for post in page_posts:
+            if post["url"] not in seen_urls:
+                seen_urls.add(post["url"])
+                posts.append(post)
+        if page_url is None:
+            break
+    return posts
+
+def get_deck_names(url, driver=None):
+    """주어진 포스트 URL에 대해 사용 가능한 덱 타입 목록을 가져옵니다."""
+    return _http_first(http_scraper.get_deck_names, _selenium_get_deck_names, url, driver=driver)
+
+def scrape_card_data(url, deck_name, driver=None):
+    """포스트 페이지에서 특정 덱 타입을 선택하고, 파싱된 HTML(BeautifulSoup 객체)을 반환합니다."""
+    return _http_first(http_scraper.scrape_card_data, _selenium_scrape_card_soup, url, deck_name, driver=driver)
+
+def scrape_card_html(url, deck_name, driver=None):
+    """scrape_card_data와 같지만 덱 테이블이 담긴 HTML 문자열을 반환합니다. 빠른 파서(table_parser)용입니다."""
+    return _http_first(http_scraper.scrape_card_html, _selenium_scrape_card_data, url, deck_name, driver=driver)
+
+def scrape_all_decks(url, driver=None):
+    """포스트 페이지를 한 번만 로드해 모든 덱 타입의 테이블을 {덱 이름: 테이블 HTML} 형태로 반환합니다."""
+    return _http_first(http_scraper.scrape_all_decks, _selenium_scrape_all_decks, url, driver=driver)
+
+def table_html(header_html, body_html):
+    """테이블 헤더와 본문 HTML만 남긴, logic.parse_deck_table이 읽을 수 있는 HTML 조각을 만듭니다."""
+    return f"<table>{header_html}{body_html}</table>"
+
+# --- Selenium 경로 ---
+# 링크마다 WebDriver 왕복(.text, get_attribute)을 하지 않도록 스크립트 한 번으로 모두 읽어 옵니다.
+_POST_LINKS_SCRIPT = (
+    "const next = document.querySelector('a.pager_next_link[href]');"
+    "return [Array.from(document.querySelectorAll('a[href]'), a => [a.textContent, a.href]),"
+    " next ? next.href : null];"
+)
+
+def _selenium_get_post_page(page_url, driver=None):
+    with borrow_driver(driver) as driver:
+        driver.get(page_url)
+        _wait(driver, 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "a"))
         )
+        with metrics.timed("page_source"):
+            links, next_url = driver.execute_script(_POST_LINKS_SCRIPT)
+    if next_url and not next_url.startswith("http"):
+        next_url = None  # javascript: 링크 등은 따라갈 수 없습니다.
+    return post_links(links, page_url), next_url
+
+def _selenium_get_deck_names(url, driver=None):
+    with borrow_driver(driver) as driver:
+        driver.get(url)
+        deck_select_element = _wait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, DECK_SELECT_ID))
+        )
+        select_obj = Select(deck_select_element)
+        options = [option.text for option in select_obj.options]
+        return options
+
+def _selenium_scrape_card_data(url, deck_name, driver=None):
+    with borrow_driver(driver) as driver:
+        driver.get(url)
+        deck_select_element = _wait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, DECK_SELECT_ID))
+        )
+        cancellation.report("page_loaded", url=url)
+        select_obj = Select(deck_select_element)
+        select_obj.select_by_visible_text(deck_name)
+        cancellation.report("deck_selected", deck_name=deck_name)
         
-        all_links = driver.find_elements(By.TAG_NAME, "a")
-        for link in all_links:
+        _wait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, TABLE_HEADER_ID))
+        )
+        cancellation.report("table_loaded")
+        # 파싱은 logic 쪽의 빠른 파서가 맡으므로 원본 HTML을 그대로 넘깁니다.
+        with metrics.timed("page_source"):
+            return driver.page_source
+
+def _selenium_scrape_card_soup(url, deck_name, driver=None):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(_selenium_scrape_card_data(url, deck_name, driver=driver), 'html.parser')
+
+def _current_table_html(driver):
+    with metrics.timed("page_source"):
+        return driver.execute_script(
+            "const h = document.querySelector(arguments[0]);"
+            "const b = document.querySelector(arguments[1]);"
+            "return [h ? h.outerHTML : null, b ? b.outerHTML : null];",
+            TABLE_HEADER_ID, DECKLIST_BODY_ID
+        )
+
+def _selenium_scrape_all_decks(url, driver=None):
+    with borrow_driver(driver) as driver:
+        driver.get(url)
+        deck_select_element = _wait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, DECK_SELECT_ID))
+        )
+        select_obj = Select(deck_select_element)
+        deck_names = [option.text for option in select_obj.options]
+        selected_name = select_obj.first_selected_option.text
+
+        _wait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, TABLE_HEADER_ID))
+        )
+        header_html, body_html = _current_table_html(driver)
+        tables = {selected_name: (header_html, body_html)}
+
+        for deck_name in deck_names:
+            if deck_name in tables:
+                continue
+            previous_body = body_html
+            # 선택 목록이 다시 그려질 수 있으므로 매번 새로 찾습니다.
+            Select(driver.find_element(By.ID, DECK_SELECT_ID)).select_by_visible_text(deck_name)
             try:
-                title = link.text
-                if "デッキリスト比較" in title:
-                    url = link.get_attribute('href')
-                    if url and url not in [p['url'] for p in posts]:
-                        posts.append({"title": title, "url": url})
+                _wait(driver, 10).until(
+                    lambda d: _current_table_html(d)[1] not in (None, previous_body)
+                )
+            except cancellation.JobCancelled:
+                raise
             except Exception:
+                print(f"'{deck_name}' 덱 테이블이 갱신되지 않아 건너뜁니다.")
                 continue
-        
-        try:
-            next_page_link = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "a.pager_next_link"))
-            )
-            driver.execute_script("arguments[0].click();", next_page_link)
-        except Exception as e:
-            print(f"다음 페이지를 찾을 수 없어 {page_num + 1}페이지에서 중단합니다: {e}")
-            break
-            
-    return posts
+            header_html, body_html = _current_table_html(driver)
+            tables[deck_name] = (header_html, body_html)
 
-def get_deck_names(url):
-    """주어진 포스트 URL에 대해 사용 가능한 덱 타입 목록을 가져옵니다."""
-    init_driver()
-    driver.get(url)
-    deck_select_element = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, DECK_SELECT_ID))
-    )
-    select_obj = Select(deck_select_element)
-    options = [option.text for option in select_obj.options]
-    return options
-
-def scrape_card_data(url, deck_name):
-    """포스트 페이지에서 특정 덱 타입을 선택하고, 파싱된 HTML(BeautifulSoup 객체)을 반환합니다."""
-    init_driver()
-    driver.get(url)
-    deck_select_element = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, DECK_SELECT_ID))
-    )
-    select_obj = Select(deck_select_element)
-    select_obj.select_by_visible_text(deck_name)
-    
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, TABLE_HEADER_ID))
-    )
-    html = driver.page_source
-    return BeautifulSoup(html, 'html.parser')
+    return {
+        deck_name: table_html(*tables[deck_name])
+        for deck_name in deck_names if deck_name in tables
+    }
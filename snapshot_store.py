@@ -0,0 +1,172 @@
+# snapshot_store.py - 스크래핑한 덱 테이블을 SQLite에 보관하고 다시 읽는 저장소
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from table_parser import DeckTable
+
+# --- 설정 ---
+# 빈 문자열로 지정하면 스냅샷 저장을 끕니다.
+SNAPSHOT_DB = os.environ.get("SNAPSHOT_DB", "snapshots.sqlite3")
+# (포스트, 덱)마다 남겨 둘 최근 스냅샷 수. 0이면 모두 남깁니다.
+KEEP_PER_DECK = int(os.environ.get("SNAPSHOT_KEEP_PER_DECK", "20"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    post_url TEXT NOT NULL,
+    deck_name TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    num_cards INTEGER NOT NULL,
+    num_samples INTEGER NOT NULL,
+    card_names TEXT NOT NULL,
+    date_values TEXT NOT NULL,
+    rating_values TEXT NOT NULL,
+    counts BLOB NOT NULL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_key ON snapshots (post_url, deck_name, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_deck ON snapshots (deck_name, fetched_at);
+"""
+
+_COLUMNS = "post_url, deck_name, fetched_at, num_cards, num_samples, card_names, date_values, rating_values, counts"
+
+
+class Snapshot(namedtuple("Snapshot", "post_url deck_name fetched_at table")):
+    """저장된 스냅샷 하나. table은 table_parser.DeckTable입니다."""
+
+    @property
+    def fetched_datetime(self):
+        return datetime.fromtimestamp(self.fetched_at)
+
+
+def _row_to_snapshot(row):
+    post_url, deck_name, fetched_at, num_cards, num_samples, card_names, date_values, rating_values, counts = row
+    matrix = np.frombuffer(counts, dtype=np.int8).reshape(num_cards, num_samples)
+    table = DeckTable(json.loads(card_names), matrix, json.loads(date_values), json.loads(rating_values))
+    return Snapshot(post_url, deck_name, fetched_at, table)
+
+
+class SnapshotStore:
+    """(포스트 URL, 덱 이름, 수집 시각)별 원본 매수 행렬 저장소.
+
+    행렬은 int8 바이트열 그대로 저장하므로 읽을 때 np.frombuffer 한 번으로 복원됩니다.
+    연결은 스레드마다 따로 열고, WAL 모드로 읽기와 쓰기가 서로를 막지 않게 합니다.
+    """
+
+    def __init__(self, path=SNAPSHOT_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # content_hash 열이 생기기 전에 만든 데이터베이스도 그대로 씁니다.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(snapshots)")}
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE snapshots ADD COLUMN content_hash TEXT")
+            self._local.conn = conn
+        return conn
+
+    def save(self, post_url, deck_name, table, fetched_at=None, keep=None):
+        """테이블을 저장하고 행 id를 반환합니다.
+
+        내용이 가장 최근 스냅샷과 같으면 새 행을 만들지 않고 그 행의 수집 시각만 갱신합니다.
+        새 행을 넣은 뒤에는 (포스트, 덱)마다 최근 keep개(기본값 KEEP_PER_DECK)만 남깁니다.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        keep = KEEP_PER_DECK if keep is None else keep
+        counts = np.ascontiguousarray(table.counts, dtype=np.int8)
+        card_names = json.dumps(table.card_names, ensure_ascii=False)
+        date_values = json.dumps(table.date_values, ensure_ascii=False)
+        rating_values = json.dumps(table.rating_values, ensure_ascii=False)
+        digest = hashlib.sha1()
+        for part in (card_names, date_values, rating_values, str(counts.shape)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(counts.tobytes())
+        content_hash = digest.hexdigest()
+
+        conn = self._connect()
+        with conn:
+            latest = conn.execute(
+                "SELECT id, content_hash FROM snapshots WHERE post_url = ? AND deck_name = ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                (post_url, deck_name),
+            ).fetchone()
+            if latest is not None and latest[1] == content_hash:
+                conn.execute("UPDATE snapshots SET fetched_at = MAX(fetched_at, ?) WHERE id = ?", (fetched_at, latest[0]))
+                return latest[0]
+            cursor = conn.execute(
+                f"INSERT INTO snapshots ({_COLUMNS}, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    post_url, deck_name, fetched_at, counts.shape[0], counts.shape[1],
+                    card_names, date_values, rating_values, counts.tobytes(), content_hash,
+                ),
+            )
+            if keep > 0:
+                conn.execute(
+                    "DELETE FROM snapshots WHERE post_url = ? AND deck_name = ? AND id NOT IN ("
+                    "SELECT id FROM snapshots WHERE post_url = ? AND deck_name = ? ORDER BY fetched_at DESC LIMIT ?)",
+                    (post_url, deck_name, post_url, deck_name, keep),
+                )
+        return cursor.lastrowid
+
+    def latest(self, post_url, deck_name):
+        """가장 최근에 수집한 스냅샷을 반환합니다. 없으면 None."""
+        row = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM snapshots WHERE post_url = ? AND deck_name = ? "
+            "ORDER BY fetched_at DESC LIMIT 1",
+            (post_url, deck_name),
+        ).fetchone()
+        return _row_to_snapshot(row) if row else None
+
+    def iter_snapshots(self, post_urls=None, deck_name=None, latest_only=True, batch_size=500):
+        """조건에 맞는 스냅샷을 한 번의 쿼리로 읽어 순서대로 돌려줍니다.
+
+        latest_only가 참이면 (포스트, 덱)마다 가장 최근 스냅샷만 반환합니다.
+        """
+        conditions, params = [], []
+        if post_urls is not None:
+            post_urls = list(post_urls)
+            if not post_urls:
+                return
+            conditions.append(f"post_url IN ({', '.join('?' * len(post_urls))})")
+            params.extend(post_urls)
+        if deck_name is not None:
+            conditions.append("deck_name = ?")
+            params.append(deck_name)
+        if latest_only:
+            conditions.append(
+                "fetched_at = (SELECT MAX(s2.fetched_at) FROM snapshots s2 "
+                "WHERE s2.post_url = snapshots.post_url AND s2.deck_name = snapshots.deck_name)"
+            )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM snapshots {where} ORDER BY post_url, deck_name, fetched_at", params
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _row_to_snapshot(row)
+
+    def list_posts(self):
+        rows = self._connect().execute(
+            "SELECT post_url, MAX(fetched_at) FROM snapshots GROUP BY post_url ORDER BY MAX(fetched_at) DESC"
+        ).fetchall()
+        return [{"url": url, "fetched_at": fetched_at} for url, fetched_at in rows]
+
+
+store = SnapshotStore() if SNAPSHOT_DB else None
@@ -0,0 +1,141 @@
+# startup.py - 웹 프로세스의 빠른 시작: 지연 import, 백그라운드 예열, 시작 시간 측정
+#
+# Cloud Run 콜드 스타트에서 캐시/미리 계산된 결과는 import가 끝나자마자 응답할 수 있어야 합니다.
+# numpy를 쓰는 분석 모듈과 Selenium/requests/BeautifulSoup은 처음 필요할 때 불러오고,
+# 포트가 열린 뒤에는 예열 스레드가 미리 불러 두어 첫 스크래핑 요청의 지연도 줄입니다.
+#
+#   python startup.py            # 새 프로세스에서 `import app` 시간과 첫 응답 시간을 측정
+#   python startup.py --runs 5
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+STARTED_AT = time.perf_counter()
+
+# --- 설정 (환경 변수로 조정 가능) ---
+WARM_UP = os.environ.get("WARM_UP", "1") not in ("0", "false")
+# 첫 요청들이 CPU를 먼저 쓰도록 예열을 이만큼(초) 늦게 시작합니다.
+WARM_UP_DELAY = float(os.environ.get("WARM_UP_DELAY", "1"))
+HEAVY_MODULES = ("numpy", "bs4", "requests", "selenium", "webdriver_manager")
+
+timings = {}  # 단계 이름 -> 프로세스 시작 후 경과 시간(ms)
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제 모듈을 import하는 대리 객체. import 잠금 덕분에 여러 스레드에서 써도 안전합니다."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+def lazy_module(name):
+    """이미 불러온 모듈이면 그대로, 아니면 LazyModule을 반환합니다."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def mark(stage):
+    """프로세스 시작 후 stage까지 걸린 시간을 기록합니다."""
+    timings[stage] = round((time.perf_counter() - STARTED_AT) * 1000, 1)
+    return timings[stage]
+
+
+def loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def stats():
+    return {
+        "timings_ms": dict(timings),
+        "heavy_modules": loaded_heavy_modules(),
+        "warm_up": "disabled" if not WARM_UP else
+                   "done" if "warm_up_done" in timings else
+                   "running" if _warm_up_thread is not None else "pending",
+    }
+
+
+def warm_up(delay=WARM_UP_DELAY):
+    """분석 모듈, 카드 인덱스, 스크래핑 경로를 미리 불러옵니다. 실패해도 요청 처리에는 영향이 없습니다."""
+    time.sleep(delay)
+    try:
+        import logic
+        import scraper
+        logic.load_card_database()
+        mark("warm_up_analysis")
+        if scraper.FETCH_MODE == "selenium":
+            scraper.init_driver(warm=1)
+        else:
+            # HTTP 경로를 먼저 쓰는 모드에서는 Chrome을 폴백이 필요할 때까지 띄우지 않습니다.
+            import http_scraper
+        mark("warm_up_done")
+        print(f"예열 완료: {timings}")
+    except Exception as e:
+        print(f"예열 실패 (첫 요청에서 다시 시도합니다): {e}")
+
+
+def start_warm_up(delay=WARM_UP_DELAY):
+    """예열 데몬 스레드를 한 번만 시작합니다. WARM_UP=0이면 아무것도 하지 않습니다."""
+    global _warm_up_thread
+    if not WARM_UP:
+        return None
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(delay,), name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+_MEASURE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get("/healthz")
+responded = time.perf_counter()
+import startup
+print(json.dumps({
+    "import_ms": round((imported - started) * 1000, 1),
+    "first_response_ms": round((responded - started) * 1000, 1),
+    "status": response.status_code,
+    "heavy_modules": startup.loaded_heavy_modules(),
+}))
+"""
+
+
+def measure(runs=3):
+    """새 파이썬 프로세스에서 `import app`과 첫 응답까지의 시간을 runs번 측정합니다."""
+    env = dict(os.environ, WARM_UP="0")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _MEASURE_SCRIPT], env=env, capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="웹 프로세스의 시작 시간을 측정합니다.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    import_times = sorted(result["import_ms"] for result in results)
+    print(f"import app 중앙값: {import_times[len(import_times) // 2]}ms, "
+          f"불러온 무거운 모듈: {results[-1]['heavy_modules'] or '없음'}")
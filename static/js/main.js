@@ -9,23 +9,126 @@ const tableBody = table.querySelector('tbody');
 const deckTotalSpan = document.getElementById('deck-total');
 
 let currentDeckData = []; // 현재 덱 데이터를 저장하는 전역 변수
-const epsilon = 1e-6; // 0으로 나누기 오류 방지를 위한 작은 값
+let pendingEdits = []; // 서버 응답을 기다리는 동안 쌓인 +/- 편집
+let adjustInFlight = false;
+let analysisRequest = 0; // 가장 최근 분석 요청 번호. 이보다 오래된 응답은 무시합니다.
+let analysisStreams = []; // 열려 있는 분석 SSE 연결 (덱을 바꾼 뒤 끝나기를 기다리는 이전 분석 포함)
+// 덱을 바꿔도 이전 분석은 끝까지 받아 서버 캐시를 채웁니다. 연결 수가 이보다 많아지면 가장 오래된 연결을 닫고,
+// 구독자가 모두 떠난 스크래핑은 서버가 취소합니다.
+const MAX_ANALYSIS_STREAMS = 2;
+const EMPTY_ANALYSIS_ERROR = '데이터 로딩에 실패했거나 데이터가 없습니다.';
+
+const STAGE_LABELS = {
+    page_loaded: '게시글 불러오는 중...',
+    fallback: '브라우저로 다시 불러오는 중...',
+    deck_selected: '덱 선택 중...',
+    table_loaded: '덱 테이블 불러오는 중...',
+    table_parsed: '카드 통계 계산 중...',
+    bootstrap: '추천 매수 신뢰 구간 계산 중...'
+};
 
 // --- API 및 데이터 핸들링 ---
 function fetchAnalysis(postUrl, deckName) {
-    fetch(`/get_deck_analysis?url=${encodeURIComponent(postUrl)}&deck_name=${encodeURIComponent(deckName)}`)
-        .then(response => response.json())
-        .then(data => updateTable(data))
+    const requestId = ++analysisRequest;
+    if (!window.EventSource) {
+        fetchAnalysisByPolling(postUrl, deckName, requestId);
+        return;
+    }
+    // 진행 단계와 카드별 통계를 먼저 받아 보여 주고, result 이벤트로 40장 조정 결과를 받습니다.
+    const source = new EventSource(`/get_deck_analysis/stream?url=${encodeURIComponent(postUrl)}&deck_name=${encodeURIComponent(deckName)}`);
+    analysisStreams.push(source);
+    while (analysisStreams.length > MAX_ANALYSIS_STREAMS) {
+        analysisStreams.shift().close();
+    }
+    const partialRows = [];
+    let finished = false;
+    const finish = () => {
+        finished = true;
+        source.close();
+        analysisStreams = analysisStreams.filter(stream => stream !== source);
+    };
+
+    Object.keys(STAGE_LABELS).forEach(stage => {
+        source.addEventListener(stage, () => {
+            if (requestId === analysisRequest) deckTotalSpan.textContent = STAGE_LABELS[stage];
+        });
+    });
+    source.addEventListener('card_stats', event => {
+        if (requestId !== analysisRequest) return;
+        const { rows } = JSON.parse(event.data);
+        rows.forEach(row => partialRows.push({
+            name: row.name,
+            average: row.average,
+            std_dev: row.std_dev,
+            original_adjusted_count: row.rounded_average,
+            adjusted_count: row.rounded_average,
+            removability_score: null,
+            addability_score: null
+        }));
+        currentDeckData = partialRows;
+        redraw();
+    });
+    source.addEventListener('result', event => {
+        finish();
+        if (requestId !== analysisRequest) return;
+        const { result } = JSON.parse(event.data);
+        // 폴링 경로(/jobs/<id>)와 같이 빈 분석 결과는 실패로 처리합니다.
+        if (!result || !result.length) {
+            console.error('분석 데이터 로딩 오류:', EMPTY_ANALYSIS_ERROR);
+            return;
+        }
+        updateTable(result);
+    });
+    source.addEventListener('error', event => {
+        if (finished) return;
+        finish();
+        // 서버가 보낸 error 이벤트에는 data가 있고, 연결 오류에는 없습니다. 연결 오류면 폴링으로 다시 시도합니다.
+        if (event.data) {
+            console.error('분석 데이터 로딩 오류:', JSON.parse(event.data).error);
+        } else if (requestId === analysisRequest) {
+            fetchAnalysisByPolling(postUrl, deckName, requestId);
+        }
+    });
+}
+
+function fetchAnalysisByPolling(postUrl, deckName, requestId) {
+    // 스크래핑이 필요하면 서버는 202와 작업 주소를 돌려주고, 완료될 때까지 그 주소를 조회합니다.
+    fetch(`/get_deck_analysis?url=${encodeURIComponent(postUrl)}&deck_name=${encodeURIComponent(deckName)}&async=1`)
+        .then(response => response.json().then(data => ({ status: response.status, data })))
+        .then(({ status, data }) => status === 202 ? pollJob(data.status_url, requestId) : data)
+        .then(data => {
+            if (requestId === analysisRequest) updateTable(data);
+        })
         .catch(error => console.error('분석 데이터 로딩 오류:', error));
 }
 
+function pollJob(statusUrl, requestId) {
+    if (requestId !== analysisRequest) {
+        return Promise.reject(new Error('새 분석 요청으로 대체되었습니다.'));
+    }
+    // 서버가 최대 wait초 동안 완료를 기다렸다가 응답하므로 따로 지연을 두지 않습니다.
+    return fetch(`${statusUrl}?wait=20`)
+        .then(response => response.json().then(job => ({ status: response.status, job })))
+        .then(({ status, job }) => {
+            if (status === 202) return pollJob(statusUrl, requestId);
+            if (job.status !== 'done') throw new Error(job.error || job.status);
+            return job.result;
+        });
+}
+
 function updateTable(data) {
+    pendingEdits = [];
     currentDeckData = data.filter(c => c.name !== '총 합').map(card => ({
         ...card,
-        original_adjusted_count: parseInt(card.adjusted_count, 10),
-        adjusted_count: parseInt(card.adjusted_count, 10)
+        average: Number(card.average),
+        std_dev: Number(card.std_dev),
+        original_adjusted_count: Number(card.adjusted_count),
+        adjusted_count: Number(card.adjusted_count)
     }));
-    recalculateScores();
+    redraw();
+}
+
+function redraw() {
     // Call redrawTable from ui.js
     const currentSortHeader = table.querySelector('th.sort-asc, th.sort-desc');
     if (currentSortHeader) {
@@ -36,101 +139,61 @@ function updateTable(data) {
 }
 
 // --- 핵심 로직 ---
-function calculatePenalty(deckCounts) {
-    let penalty = 0;
-    for (let i = 0; i < currentDeckData.length; i++) {
-        const card = currentDeckData[i];
-        if (!card.average) continue;
-        const delta = deckCounts[i] - parseFloat(card.average);
-        const std_dev = parseFloat(card.std_dev);
-        penalty += ((delta / (std_dev + epsilon)) ** 2);
-    }
-    return penalty;
-}
-
-function recalculateScores() {
-    const currentCounts = currentDeckData.map(c => c.adjusted_count);
-    currentDeckData.forEach((card, i) => {
-        if (!card.average) return;
-        if (card.adjusted_count > 0) {
-            const tempCounts = [...currentCounts];
-            tempCounts[i]--;
-            const penalty = calculatePenalty(tempCounts);
-            card.removability_score = penalty > 0 ? 1 / penalty : Infinity;
-        } else {
-            card.removability_score = -1;
-        }
-        if (card.adjusted_count < 3) {
-            const tempCounts = [...currentCounts];
-            tempCounts[i]++;
-            const penalty = calculatePenalty(tempCounts);
-            card.addability_score = penalty > 0 ? 1 / penalty : Infinity;
-        } else {
-            card.addability_score = -1;
-        }
-    });
-}
-
+// 벌점 계산과 짝 카드 선택은 서버(/adjust_deck)가 맡고, 여기서는 결과만 반영합니다.
 function adjustCardCount(cardName, action) {
     const targetCardIndex = currentDeckData.findIndex(c => c.name === cardName);
     if (targetCardIndex === -1) return;
 
-    const baseCounts = currentDeckData.map(c => c.adjusted_count);
-
-    if (action === 'increase') {
-        if (baseCounts[targetCardIndex] >= 3) return;
-        
-        let minPenalty = Infinity;
-        let bestCandidateIndex = -1;
-
-        for (let i = 0; i < baseCounts.length; i++) {
-            if (i === targetCardIndex || baseCounts[i] <= 0) continue;
-            
-            const tempCounts = [...baseCounts];
-            tempCounts[targetCardIndex]++;
-            tempCounts[i]--;
-            const penalty = calculatePenalty(tempCounts);
-
-            if (penalty < minPenalty) {
-                minPenalty = penalty;
-                bestCandidateIndex = i;
-            }
-        }
-
-        if (bestCandidateIndex !== -1) {
-            currentDeckData[targetCardIndex].adjusted_count++;
-            currentDeckData[bestCandidateIndex].adjusted_count--;
-        }
-
-    } else if (action === 'decrease') {
-        if (baseCounts[targetCardIndex] <= 0) return;
-
-        let minPenalty = Infinity;
-        let bestCandidateIndex = -1;
+    pendingEdits.push({ name: cardName, action: action });
+    flushEdits();
+}
 
-        for (let i = 0; i < baseCounts.length; i++) {
-            if (i === targetCardIndex || baseCounts[i] >= 3) continue;
+function flushEdits() {
+    if (adjustInFlight || pendingEdits.length === 0) return;
 
-            const tempCounts = [...baseCounts];
-            tempCounts[targetCardIndex]--;
-            tempCounts[i]++;
-            const penalty = calculatePenalty(tempCounts);
+    // 정렬은 currentDeckData를 제자리에서 재배열하므로, 보내는 시점의 순서를 복사본으로 고정합니다.
+    // 복사본의 원소는 같은 카드 객체이므로 응답의 인덱스를 복사본에 적용하면 정렬과 상관없이 맞는 카드가 갱신됩니다.
+    const deckData = currentDeckData;
+    const deckSnapshot = currentDeckData.slice();
+    const edits = pendingEdits.map(edit => ({
+        index: deckSnapshot.findIndex(c => c.name === edit.name),
+        action: edit.action
+    })).filter(edit => edit.index !== -1);
+    pendingEdits = [];
+    if (edits.length === 0) return;
 
-            if (penalty < minPenalty) {
-                minPenalty = penalty;
-                bestCandidateIndex = i;
-            }
-        }
-        
-        if (bestCandidateIndex !== -1) {
-            currentDeckData[targetCardIndex].adjusted_count--;
-            currentDeckData[bestCandidateIndex].adjusted_count++;
+    adjustInFlight = true;
+    fetch('/adjust_deck', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            average: deckSnapshot.map(c => c.average),
+            std_dev: deckSnapshot.map(c => c.std_dev),
+            counts: deckSnapshot.map(c => c.adjusted_count),
+            edits: edits
+        }),
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            console.error('덱 조정 오류:', result.error);
+            return;
         }
-    }
-    
-    recalculateScores();
-    // Call redrawTable from ui.js
-    ui.redrawTable(tableBody, deckTotalSpan, currentDeckData);
+        if (deckData !== currentDeckData) return; // 그 사이 다른 덱을 불러온 경우
+        result.changes.forEach(change => {
+            deckSnapshot[change.index].adjusted_count = change.adjusted_count;
+        });
+        deckSnapshot.forEach((card, i) => {
+            card.removability_score = result.removability_score[i];
+            card.addability_score = result.addability_score[i];
+        });
+        ui.redrawTable(tableBody, deckTotalSpan, currentDeckData);
+    })
+    .catch(error => console.error('덱 조정 API 호출 오류:', error))
+    .finally(() => {
+        adjustInFlight = false;
+        flushEdits();
+    });
 }
 
 function getClassIdFromName(deckName) {
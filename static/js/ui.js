@@ -1,7 +1,9 @@
 // ui.js - 모든 DOM 조작 및 UI 업데이트 함수
 
 function getScoreSymbol(score) {
-    const numericScore = parseFloat(score);
+    // 서버는 무한대 점수를 null로 보냅니다.
+    if (score === null || score === undefined) return 'N/A';
+    const numericScore = Number(score);
     if (numericScore === Infinity || isNaN(numericScore)) return 'N/A';
     if (numericScore < 0) return 'X';
     if (numericScore > 1) return 'O';
@@ -20,8 +22,17 @@ function populateRow(tableBody, card) {
     }
 
     row.insertCell().textContent = card.name;
-    row.insertCell().textContent = card.average;
-    row.insertCell().textContent = card.original_adjusted_count;
+    const averageCell = row.insertCell();
+    averageCell.textContent = Number(card.average).toFixed(2);
+    // 재추출 신뢰 구간과 안정도가 있으면 마우스를 올렸을 때 보여 줍니다.
+    if (Array.isArray(card.average_ci)) {
+        averageCell.title = `95% 구간: ${card.average_ci.map(v => Number(v).toFixed(2)).join(' ~ ')}`;
+    }
+    const originalCell = row.insertCell();
+    originalCell.textContent = card.original_adjusted_count;
+    if (card.count_stability !== null && card.count_stability !== undefined) {
+        originalCell.title = `재표본에서 같은 매수가 나온 비율: ${Math.round(card.count_stability * 100)}% (가장 많은 매수: ${card.modal_count}장)`;
+    }
 
     const countCell = row.insertCell();
     countCell.innerHTML = `
@@ -45,6 +56,11 @@ export function redrawTable(tableBody, deckTotalSpan, currentDeckData) {
     deckTotalSpan.textContent = `총 ${totalCount} / 40 장`;
 }
 
+// null(무한대) 점수는 가장 큰 값으로 정렬합니다.
+function scoreSortValue(score) {
+    return score === null || score === undefined ? Infinity : score;
+}
+
 export function sortTable(table, tableBody, deckTotalSpan, currentDeckData, header, doToggle = true) {
     const currentSortOrder = header.classList.contains('sort-asc') ? 'desc' : 'asc';
     const sortOrder = doToggle ? currentSortOrder : (header.classList.contains('sort-asc') ? 'asc' : 'desc');
@@ -55,11 +71,11 @@ export function sortTable(table, tableBody, deckTotalSpan, currentDeckData, head
         let valA, valB;
         switch(colIndex) {
             case 0: valA = a.name; valB = b.name; break;
-            case 1: valA = parseFloat(a.average); valB = parseFloat(b.average); break;
+            case 1: valA = a.average; valB = b.average; break;
             case 2: valA = a.original_adjusted_count; valB = b.original_adjusted_count; break;
             case 3: valA = a.adjusted_count; valB = b.adjusted_count; break;
-            case 4: valA = a.removability_score; valB = b.removability_score; break;
-            case 5: valA = a.addability_score; valB = b.addability_score; break;
+            case 4: valA = scoreSortValue(a.removability_score); valB = scoreSortValue(b.removability_score); break;
+            case 5: valA = scoreSortValue(a.addability_score); valB = scoreSortValue(b.addability_score); break;
             default: valA = 0; valB = 0;
         }
 
@@ -0,0 +1,215 @@
+# table_parser.py - svlabo 덱 테이블을 카드 × 표본 매수 행렬로 파싱
+#
+# selectolax나 lxml이 설치되어 있으면 그쪽을 사용하고, 없으면 BeautifulSoup으로 파싱합니다.
+# 백엔드는 셀 텍스트만 뽑아내고, 숫자 변환과 행 검증은 NumPy로 한 번에 처리합니다.
+import sys
+
+import numpy as np
+
+import metrics
+import scraper
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+SAMPLE_HEADER_LABELS = ('レート', '連勝数', '採用枚数')
+DATE_ROW_LABEL = '使用日'
+CARD_NAME_CLASS = "name_backimg2"
+
+
+class DeckTable:
+    """스크래핑된 덱 테이블 하나의 원본 데이터.
+
+    counts는 (카드 수 × 표본 수) 크기의 매수 행렬이고, date_values와 rating_values는
+    표본별 '使用日' 행과 레이팅 행의 문자열입니다. 없으면 빈 리스트입니다.
+    """
+
+    def __init__(self, card_names, counts, date_values=None, rating_values=None):
+        self.card_names = list(card_names)
+        self.counts = np.asarray(counts, dtype=np.int8).reshape(len(self.card_names), -1)
+        self.date_values = list(date_values or [])
+        self.rating_values = list(rating_values or [])
+
+    @property
+    def num_samples(self):
+        return self.counts.shape[1]
+
+
+# --- 파서 백엔드 ---
+# 각 백엔드는 (헤더 행 목록, 본문 행 목록)을 반환합니다.
+#   헤더 행: [(th 텍스트, colspan 문자열 또는 None), ...]
+#   본문 행: (첫 th/td 텍스트 또는 None, 카드 이름 또는 None, [td 텍스트, ...])
+# 테이블 헤더나 본문이 없으면 해당 값은 None입니다.
+
+def _element_id(selector):
+    return selector.lstrip("#")
+
+
+def _extract_selectolax(html):
+    tree = HTMLParser(html)
+    head = tree.css_first(scraper.TABLE_HEADER_ID)
+    body = tree.css_first(scraper.DECKLIST_BODY_ID)
+    header_rows = None
+    if head is not None:
+        header_rows = [
+            [(th.text(), th.attributes.get("colspan")) for th in tr.css("th")]
+            for tr in head.css("tr")
+        ]
+    body_rows = None
+    if body is not None:
+        body_rows = []
+        for tr in body.css("tr"):
+            first_cell = tr.css_first("th, td")
+            name_div = tr.css_first(f"div.{CARD_NAME_CLASS}")
+            body_rows.append((
+                first_cell.text() if first_cell is not None else None,
+                name_div.text().strip() if name_div is not None else None,
+                [td.text() for td in tr.css("td")],
+            ))
+    return header_rows, body_rows
+
+
+_NAME_DIV_XPATH = f'.//div[contains(concat(" ", normalize-space(@class), " "), " {CARD_NAME_CLASS} ")]'
+
+def _extract_lxml(html):
+    doc = lxml.html.fromstring(html)
+    head = doc.xpath(f'//*[@id="{_element_id(scraper.TABLE_HEADER_ID)}"]')
+    body = doc.xpath(f'//*[@id="{_element_id(scraper.DECKLIST_BODY_ID)}"]')
+    header_rows = None
+    if head:
+        header_rows = [
+            [(th.text_content(), th.get("colspan")) for th in tr.iterdescendants("th")]
+            for tr in head[0].iterdescendants("tr")
+        ]
+    body_rows = None
+    if body:
+        body_rows = []
+        for tr in body[0].iterdescendants("tr"):
+            first_cell = next(tr.iterdescendants("th", "td"), None)
+            name_div = tr.xpath(_NAME_DIV_XPATH)
+            body_rows.append((
+                first_cell.text_content() if first_cell is not None else None,
+                name_div[0].text_content().strip() if name_div else None,
+                [td.text_content() for td in tr.iterdescendants("td")],
+            ))
+    return header_rows, body_rows
+
+
+def _extract_soup(soup):
+    head = soup.select_one(scraper.TABLE_HEADER_ID)
+    body = soup.select_one(scraper.DECKLIST_BODY_ID)
+    header_rows = None
+    if head is not None:
+        header_rows = [
+            [(th.text, th.get("colspan")) for th in tr.find_all("th")]
+            for tr in head.find_all("tr")
+        ]
+    body_rows = None
+    if body is not None:
+        body_rows = []
+        for tr in body.find_all("tr"):
+            first_cell = tr.find(['th', 'td'])
+            name_div = tr.find("div", class_=CARD_NAME_CLASS)
+            body_rows.append((
+                first_cell.text if first_cell is not None else None,
+                name_div.text.strip() if name_div is not None else None,
+                [td.text for td in tr.find_all("td")],
+            ))
+    return header_rows, body_rows
+
+
+def backend_name():
+    if HTMLParser is not None:
+        return "selectolax"
+    if lxml is not None:
+        return "lxml"
+    return "html.parser"
+
+
+def extract_rows(source):
+    """HTML 문자열/바이트나 BeautifulSoup 객체에서 헤더 행과 본문 행의 텍스트를 뽑습니다."""
+    # BeautifulSoup은 폴백 파서로만 쓰므로 필요할 때 불러옵니다. 아직 불러오지 않았다면 source가 soup일 수도 없습니다.
+    bs4 = sys.modules.get("bs4")
+    if bs4 is not None and isinstance(source, bs4.BeautifulSoup):
+        return _extract_soup(source)
+    if HTMLParser is not None:
+        return _extract_selectolax(source)
+    if lxml is not None:
+        return _extract_lxml(source)
+    from bs4 import BeautifulSoup
+    return _extract_soup(BeautifulSoup(source, 'html.parser'))
+
+
+# --- 행렬 구성 ---
+
+def _find_num_samples(header_rows):
+    """헤더 첫 행에서 표본 수(colspan)와 레이팅 값 목록을 찾습니다. 찾지 못하면 (0, [])."""
+    if not header_rows:
+        return 0, []
+    first_row = header_rows[0]
+    for label in SAMPLE_HEADER_LABELS:
+        header = next((cell for cell in first_row if label in cell[0]), None)
+        if header is None or header[1] is None:
+            continue
+        try:
+            num_samples = int(header[1])
+        except ValueError:
+            continue
+        rating_values = []
+        if label == 'レート' and len(header_rows) > 1:
+            rating_values = [text.strip() for text, _ in header_rows[1][:-4]]
+        if num_samples > 0:
+            return num_samples, rating_values
+    return 0, []
+
+
+def build_deck_table(header_rows, body_rows):
+    """추출한 행 텍스트로 DeckTable을 만듭니다. 분석할 수 없는 테이블이면 None."""
+    if header_rows is None:
+        return None
+    num_samples, rating_values = _find_num_samples(header_rows)
+    if num_samples == 0 or body_rows is None:
+        return None
+
+    date_values = []
+    card_names = []
+    cell_texts = []
+    for first_cell, card_name, td_texts in body_rows:
+        if first_cell is None:
+            continue
+        if DATE_ROW_LABEL in first_cell:
+            date_values = [text.strip() for text in td_texts[:num_samples]]
+        elif card_name is not None:
+            cells = td_texts[1:1 + num_samples]
+            if len(cells) != num_samples:
+                continue
+            card_names.append(card_name)
+            cell_texts.extend(cells)
+
+    if not card_names:
+        return None
+
+    # 모든 카드 행의 셀을 한 번에 검사하고 변환합니다. 숫자가 아닌 셀이 있는 행은 버립니다.
+    cells = np.char.strip(np.array(cell_texts, dtype=str)).reshape(len(card_names), num_samples)
+    valid_rows = np.char.isdecimal(cells).all(axis=1)
+    if not valid_rows.any():
+        return None
+    counts = cells[valid_rows].astype(np.int8)
+    if not valid_rows.all():
+        card_names = [name for name, valid in zip(card_names, valid_rows) if valid]
+    return DeckTable(card_names, counts, date_values, rating_values)
+
+
+def parse_deck_table(source):
+    """#table_header와 #decklist_body에서 DeckTable을 만듭니다. 분석할 수 없는 테이블이면 None을 반환합니다."""
+    if source is None:
+        return None
+    with metrics.timed("table_parse"):
+        return build_deck_table(*extract_rows(source))
@@ -0,0 +1,18 @@
+# tests/conftest.py - 테스트 공통 설정
+#
+# 앱 모듈은 불러올 때 환경 변수를 읽으므로, 어떤 모듈보다 먼저 예열을 끄고
+# 저장소 파일이 작업 디렉터리를 건드리지 않도록 임시 경로를 지정합니다.
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="svmeta-tests-")
+os.environ.setdefault("WARM_UP", "0")
+os.environ.setdefault("SNAPSHOT_DB", os.path.join(_tmp, "snapshots.sqlite3"))
+os.environ.setdefault("POST_INDEX_DB", os.path.join(_tmp, "posts.sqlite3"))
+os.environ.setdefault("PRECOMPUTED_DIR", os.path.join(_tmp, "precomputed"))
+os.environ.setdefault("CARD_DATABASE_PATH", os.path.join(ROOT, "card_database.json"))
+os.environ.setdefault("CARD_INDEX_PATH", os.path.join(_tmp, "card_database.idx"))
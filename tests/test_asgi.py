@@ -0,0 +1,63 @@
+# tests/test_asgi.py - ASGI 진입점이 느린 Flask 라우트 때문에 다른 요청을 막지 않는지 확인합니다.
+import asyncio
+import threading
+
+import asgi
+import cache
+
+
+async def _request(path, query=b""):
+    """asgi.app에 GET 요청 하나를 보내고 (상태 코드, 본문)을 반환합니다."""
+    messages = []
+    request_sent = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query, "headers": [], "server": ("testserver", 80), "client": ("127.0.0.1", 1),
+    }
+    try:
+        await asgi.app(scope, receive, send)
+    finally:
+        disconnect.set()
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return status, body
+
+
+def test_healthz_answers_while_analysis_blocks(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_analysis(post_url, deck_name):
+        started.set()
+        release.wait(10)
+        return None
+
+    monkeypatch.setattr(cache, "encoded_analysis", blocking_analysis)
+
+    async def scenario():
+        slow = asyncio.ensure_future(_request("/get_deck_analysis", b"url=http%3A%2F%2Fx%2F&deck_name=d"))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        try:
+            status, _ = await asyncio.wait_for(_request("/healthz"), 5)
+            assert status == 200
+            assert not slow.done()
+        finally:
+            release.set()
+        status, _ = await asyncio.wait_for(slow, 5)
+        assert status == 500  # 분석 결과가 없으면 라우트는 500을 돌려줍니다.
+
+    asyncio.run(scenario())
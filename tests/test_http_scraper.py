@@ -0,0 +1,104 @@
+# tests/test_http_scraper.py - HTTP 경로가 벤치마크 픽스처 페이지에서 기존 파서와 같은 결과를 내는지 확인합니다.
+import glob
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from bs4 import BeautifulSoup
+
+import http_scraper
+import scraper
+from table_parser import parse_deck_table
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+FIXTURES = {os.path.splitext(os.path.basename(path))[0]: path for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))}
+
+
+def _read(name):
+    with open(FIXTURES[name], "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _post_page(name):
+    """픽스처 테이블 앞에 덱 선택 목록을 붙인 포스트 페이지. 기본 선택 덱은 페이지에 테이블이 있고,
+    두 번째 덱은 option의 value 주소에서 같은 테이블을 받습니다."""
+    select = (f'<select id="{scraper.DECK_SELECT_ID}"><option selected>{name}</option>'
+              f'<option value="/deck/{name}/">{name}-linked</option></select>')
+    return _read(name).replace("<body>", "<body>" + select, 1)
+
+
+def _pages():
+    links = "".join(f'<a href="/post/{name}/">{scraper.POST_TITLE_KEYWORD} {name}</a>' for name in FIXTURES)
+    pages = {
+        "/": f'<html><body>{links}<a class="pager_next_link" href="/page/2/">次へ</a></body></html>',
+        # 포스트 링크가 없는 페이지 (스크립트로 목록을 그리는 경우)
+        "/page/2/": '<html><body><a href="/about/">about</a></body></html>',
+    }
+    for name in FIXTURES:
+        pages[f"/post/{name}/"] = _post_page(name)
+        pages[f"/deck/{name}/"] = _read(name)
+    return {path: html.encode("utf-8") for path, html in pages.items()}
+
+
+@pytest.fixture(scope="module")
+def site():
+    pages = _pages()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            self.send_response(404 if body is None else 200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def svlabo(site, monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(scraper, "SVLABO_URL", site)
+    monkeypatch.setattr(scraper, "FETCH_MODE", "http")
+    return site
+
+
+def _same_table(a, b):
+    return (a.card_names == b.card_names and (a.counts == b.counts).all()
+            and a.date_values == b.date_values and a.rating_values == b.rating_values)
+
+
+def test_get_post_page_matches_post_links(svlabo):
+    soup = BeautifulSoup(_pages()["/"], "html.parser")
+    expected = scraper.post_links(((a.get_text(strip=True), a["href"]) for a in soup.find_all("a", href=True)), svlabo)
+
+    posts, next_url = scraper.get_post_page()
+    assert posts == expected
+    assert [post["url"] for post in posts] == [f"{svlabo}post/{name}/" for name in FIXTURES]
+    assert next_url == f"{svlabo}page/2/"
+
+
+def test_get_post_page_without_posts_raises(svlabo):
+    with pytest.raises(http_scraper.HttpFetchError):
+        http_scraper.get_post_page(f"{svlabo}page/2/")
+    assert http_scraper.get_post_page(f"{svlabo}page/3/") == ([], None)
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_deck_table_from_page_matches_parser(svlabo, name):
+    expected = parse_deck_table(_read(name))
+    url = f"{svlabo}post/{name}/"
+    soup = http_scraper.fetch_soup(url)
+    assert http_scraper.get_deck_names(url) == [name, f"{name}-linked"]
+    for deck_name in (name, f"{name}-linked"):
+        table = parse_deck_table(http_scraper.deck_table_from_page(url, soup, deck_name))
+        assert _same_table(table, expected)
@@ -0,0 +1,40 @@
+# tests/test_weight_sweep.py - 일괄 계산 경로가 테이블 하나씩 분석한 결과와 같은지 확인합니다.
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import logic
+import table_parser
+import weight_sweep
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "fixtures", "*.html")))
+TODAY = datetime(2025, 11, 10)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_default_weights_match_analysis(path):
+    with open(path, "r", encoding="utf-8") as f:
+        table = table_parser.parse_deck_table(f.read())
+    cards = logic.calculate_card_stats(table, TODAY)
+    cards.samples = None
+    expected = [row["adjusted_count"] for row in logic.analyze_card_table(cards)[:-1]]
+
+    result = weight_sweep.sweep(
+        weight_sweep.SweepInput(table, TODAY),
+        [logic.HALF_LIFE_DAYS], [logic.RATING_PIVOT], [logic.RATING_SLOPE],
+    )
+    assert result["decks"][result["grid"][0][0][0]] == expected
+
+
+def test_batch_breaks_ties_like_greedy():
+    rng = np.random.default_rng(0)
+    # 평균이 x.5에 몰려 있고 표준편차가 같은 카드가 많아 동점 후보가 자주 생기는 행들
+    averages = rng.integers(0, 6, size=(200, 30)) / 2
+    std_devs = np.repeat(rng.choice([0.25, 0.5], size=(200, 1)), 30, axis=1)
+    batch = logic.greedy_deck_count_batch(averages, std_devs)
+    for row, (v_avg, v_std_dev) in enumerate(zip(averages, std_devs)):
+        expected = logic.greedy_deck_count(v_avg, v_std_dev, np.round(v_avg).astype(np.int64))
+        assert batch[row].tolist() == expected.tolist()
@@ -0,0 +1,120 @@
+# weight_sweep.py - 가중치 설정 격자에 대한 일괄 분석 (what-if)
+#
+# 덱 테이블 하나를 반감기 × 레이팅 기준점 × 레이팅 기울기 격자의 모든 점에서 다시 분석합니다.
+# 격자점별 표본 가중치를 (격자점 수 × 표본 수) 행렬로 만들어 가중 평균과 분산은 표본 열마다 모든 격자점을 함께 누적하고,
+# 40장 조정은 logic.greedy_deck_count_batch로 모든 격자점을 함께 맞추므로 다시 스크래핑할 필요가 없습니다.
+import numpy as np
+
+import logic
+
+AXES = ("half_life_days", "rating_pivot", "rating_slope")
+
+
+class SweepInput:
+    """격자 분석에 필요한 테이블 값을 미리 배열로 바꿔 둔 것. 슬라이더 요청마다 캐시에서 재사용합니다."""
+
+    def __init__(self, table, today=None):
+        self.table = table
+        self.today = today
+        self.names = list(table.card_names)
+        self.counts = table.counts.astype(np.float64)
+        self.days_ago, self.ratings = logic.sample_features(table, today)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def nbytes(self):
+        """캐시 메모리 예산 계산용 근사 크기. 카드 이름은 장당 100바이트로 어림합니다."""
+        return (self.table.counts.nbytes + self.counts.nbytes
+                + self.days_ago.nbytes + self.ratings.nbytes + 100 * len(self.names))
+
+
+def grid_weights(sweep_input, half_lives, pivots, slopes):
+    """격자점별 표본 가중치 행렬 (격자점 수 × 표본 수). 격자점 순서는 (반감기, 기준점, 기울기) 순 C 배열입니다.
+
+    logic.calculate_weights와 같은 식을 원소별로 계산하므로 각 가중치 값은 그 결과와 같습니다.
+    """
+    h, p, s = (axis.reshape(-1, 1) for axis in np.meshgrid(half_lives, pivots, slopes, indexing="ij"))
+    days_ago, ratings = sweep_input.days_ago, sweep_input.ratings
+    with np.errstate(invalid="ignore"):
+        date_weights = np.maximum(logic.MIN_DATE_WEIGHT, 1.0 - (days_ago / (h * 2)))
+        rating_weights = 1.0 + np.maximum(0, (ratings - p) / 100.0 * s)
+    return (np.where(np.isnan(days_ago), 1.0, date_weights)
+            * np.where(np.isnan(ratings), 1.0, rating_weights))
+
+
+def weighted_stats(sweep_input, weights):
+    """격자점별 카드 가중 평균과 가중 분산 ((격자점 수 × 카드 수) 배열 두 개).
+
+    logic._weighted_moments와 같은 순서(표본 열 순서대로 누적, 평균을 구한 뒤 편차 제곱을 누적)로
+    더하므로, 각 격자점의 값은 같은 가중치로 calculate_card_stats를 부른 결과와 비트 단위로 같습니다.
+    """
+    counts = sweep_input.counts
+    total = np.zeros(len(weights))
+    for j in range(weights.shape[1]):
+        total += weights[:, j]
+    total[total == 0] = 1
+    total = total[:, None]
+
+    numerator = np.zeros((len(weights), len(counts)))
+    for j in range(weights.shape[1]):
+        numerator += counts[:, j] * weights[:, j, None]
+    averages = numerator / total
+
+    squares = np.zeros_like(averages)
+    for j in range(weights.shape[1]):
+        squares += weights[:, j, None] * (counts[:, j] - averages) ** 2
+    return averages, squares / total
+
+
+def sweep(sweep_input, half_lives, pivots, slopes):
+    """격자의 모든 점에서 추천 40장을 계산하고, 이웃한 격자점 사이에서 추천 리스트가 바뀌는 곳을 찾습니다.
+
+    decks는 서로 다른 추천 리스트(카드 순서는 cards), grid는 격자점별 decks 번호를
+    (반감기 × 기준점 × 기울기) 중첩 리스트로 담습니다. changes의 각 항목은 한 축을 따라 이웃한 두 격자점과
+    그 사이에서 매수가 바뀐 카드 {이름: [이전, 이후]}입니다.
+    """
+    axes = [np.asarray(values, dtype=np.float64) for values in (half_lives, pivots, slopes)]
+    shape = tuple(len(values) for values in axes)
+    weights = grid_weights(sweep_input, *axes)
+    averages, variances = weighted_stats(sweep_input, weights)
+    counts = logic.greedy_deck_count_batch(averages, np.sqrt(variances))
+
+    decks, deck_ids = np.unique(counts, axis=0, return_inverse=True)
+    deck_ids = deck_ids.reshape(shape)
+    changes = []
+    for axis, name in enumerate(AXES):
+        before = np.moveaxis(deck_ids, axis, 0)[:-1]
+        after = np.moveaxis(deck_ids, axis, 0)[1:]
+        for point in np.argwhere(before != after):
+            point = np.insert(np.delete(point, 0), axis, point[0])
+            next_point = point.copy()
+            next_point[axis] += 1
+            a, b = decks[deck_ids[tuple(point)]], decks[deck_ids[tuple(next_point)]]
+            changes.append({
+                "axis": name,
+                "from": {key: float(values[i]) for key, values, i in zip(AXES, axes, point)},
+                "to": {key: float(values[i]) for key, values, i in zip(AXES, axes, next_point)},
+                "cards": {sweep_input.names[j]: [int(a[j]), int(b[j])] for j in np.flatnonzero(a != b)},
+            })
+    return {
+        "cards": sweep_input.names,
+        "axes": {name: values.tolist() for name, values in zip(AXES, axes)},
+        "decks": decks.tolist(),
+        "grid": deck_ids.tolist(),
+        "changes": changes,
+    }
+
+
+def what_if(sweep_input, half_life_days, rating_pivot, rating_slope):
+    """가중치 설정 하나로 다시 분석한 결과. /get_deck_analysis와 같은 형식입니다.
+
+    슬라이더 응답이 늦어지지 않도록 신뢰 구간 재추출은 하지 않습니다.
+    """
+    cards = logic.calculate_card_stats(
+        sweep_input.table, sweep_input.today,
+        half_life_days=half_life_days, rating_pivot=rating_pivot, rating_slope=rating_slope,
+    )
+    cards.samples = None
+    return logic.analyze_card_table(cards)